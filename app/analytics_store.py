@@ -0,0 +1,282 @@
+"""Day-partitioned analytics events with incrementally maintained rollups.
+
+Events are appended to one JSONL segment per UTC day
+(ANALYTICS_DIR/events-YYYY-MM-DD.jsonl). The segments are the source of truth.
+The same flush that appends a batch also adds it to two rollup tables in
+ANALYTICS_DIR/rollups.db:
+
+  daily_counts  (day, tenant, event) -> n
+  page_counts   (day, tenant, page)  -> n   (play/listen/hit/miss per page)
+
+Dashboards read only the rollups, so a query costs days x tenants x events
+rows no matter how many raw events exist. Raw reads (iter_events) open only
+the segments for the requested days. Retention deletes whole segments and
+rollup days older than ANALYTICS_RETENTION_DAYS.
+
+Rollups are derived data. If updating them fails after a segment was
+written, rebuild_day() recomputes that day from its segment.
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from threading import Lock
+from typing import Iterator, Optional
+
+from app.buffered_writer import BufferedWriter
+
+logger = logging.getLogger("easyaudio")
+
+ANALYTICS_DIR = Path(
+    os.getenv("ANALYTICS_DIR", str(Path(os.getenv("CACHE_ROOT", "/cache")) / "analytics"))
+)
+ANALYTICS_RETENTION_DAYS = int(os.getenv("ANALYTICS_RETENTION_DAYS", "400"))
+# Page URLs are user-supplied; keep rollup keys bounded.
+_MAX_PAGE_LEN = 500
+_SEGMENT = re.compile(r"^events-(\d{4}-\d{2}-\d{2})\.jsonl$")
+
+_db_lock = Lock()
+_conn: Optional[sqlite3.Connection] = None
+_pruned_day: Optional[str] = None
+_stats = {"rollup_errors": 0, "segments_pruned": 0, "last_rollup_ms": 0}
+
+
+def day_of(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000, timezone.utc).date().isoformat()
+
+
+def segment_path(day: str) -> Path:
+    return ANALYTICS_DIR / f"events-{day}.jsonl"
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        ANALYTICS_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(ANALYTICS_DIR / "rollups.db"), timeout=5, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS daily_counts ("
+            "day TEXT NOT NULL, tenant TEXT NOT NULL, event TEXT NOT NULL, n INTEGER NOT NULL, "
+            "PRIMARY KEY (day, tenant, event)) WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS page_counts ("
+            "day TEXT NOT NULL, tenant TEXT NOT NULL, page TEXT NOT NULL, n INTEGER NOT NULL, "
+            "PRIMARY KEY (day, tenant, page)) WITHOUT ROWID"
+        )
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _aggregate(records: list[dict]) -> tuple[dict, dict]:
+    daily: dict[tuple[str, str, str], int] = {}
+    pages: dict[tuple[str, str, str], int] = {}
+    for rec in records:
+        day = day_of(rec["ts"])
+        key = (day, rec["tenant"], rec["event"])
+        daily[key] = daily.get(key, 0) + 1
+        page = (rec.get("page_url") or "")[:_MAX_PAGE_LEN]
+        if page:
+            pkey = (day, rec["tenant"], page)
+            pages[pkey] = pages.get(pkey, 0) + 1
+    return daily, pages
+
+
+def _apply_rollups(daily: dict, pages: dict) -> None:
+    with _db_lock:
+        conn = _db()
+        with conn:
+            conn.executemany(
+                "INSERT INTO daily_counts (day, tenant, event, n) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(day, tenant, event) DO UPDATE SET n = n + excluded.n",
+                [(*k, n) for k, n in daily.items()],
+            )
+            conn.executemany(
+                "INSERT INTO page_counts (day, tenant, page, n) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(day, tenant, page) DO UPDATE SET n = n + excluded.n",
+                [(*k, n) for k, n in pages.items()],
+            )
+
+
+class AnalyticsWriter(BufferedWriter):
+    """BufferedWriter whose records are event dicts, routed to day segments plus rollups."""
+
+    def write_batch(self, records: list) -> None:
+        by_day: dict[str, list[str]] = {}
+        for rec in records:
+            by_day.setdefault(day_of(rec["ts"]), []).append(
+                json.dumps(rec, separators=(",", ":"), ensure_ascii=False)
+            )
+        for day, lines in by_day.items():
+            self.append_lines(segment_path(day), lines)
+        t0 = time.perf_counter()
+        try:
+            _apply_rollups(*_aggregate(records))
+        except Exception as e:
+            # The segments already hold these events; raising would write them twice.
+            _stats["rollup_errors"] += 1
+            logger.warning("[analytics] rollup update failed days=%s err=%s; run rebuild_day()", sorted(by_day), e)
+        _stats["last_rollup_ms"] = int((time.perf_counter() - t0) * 1000)
+        prune()
+
+
+def _days_since(since_day: str) -> list[str]:
+    if not ANALYTICS_DIR.exists():
+        return []
+    days = []
+    for p in ANALYTICS_DIR.iterdir():
+        m = _SEGMENT.match(p.name)
+        if m and m.group(1) >= since_day:
+            days.append(m.group(1))
+    return sorted(days)
+
+
+def iter_events(since_ts: int, tenant: str | None = None) -> Iterator[dict]:
+    """Raw events at or after `since_ts`, reading only the segments for those days."""
+    since_day = day_of(since_ts) if since_ts else "0000-00-00"
+    for day in _days_since(since_day):
+        with segment_path(day).open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if since_ts and int(rec.get("ts") or 0) < since_ts:
+                    continue
+                if tenant and rec.get("tenant") != tenant:
+                    continue
+                yield rec
+
+
+def daily_counts(since_day: str, tenant: str | None = None) -> list[tuple[str, str, str, int]]:
+    sql = "SELECT day, tenant, event, n FROM daily_counts WHERE day >= ?"
+    args: list = [since_day]
+    if tenant:
+        sql += " AND tenant = ?"
+        args.append(tenant)
+    with _db_lock:
+        return _db().execute(sql + " ORDER BY day, tenant, event", args).fetchall()
+
+
+def totals(since_day: str, tenant: str | None = None) -> list[tuple[str, str, int]]:
+    """(tenant, event, n) summed over the days since `since_day`."""
+    sql = "SELECT tenant, event, SUM(n) FROM daily_counts WHERE day >= ?"
+    args: list = [since_day]
+    if tenant:
+        sql += " AND tenant = ?"
+        args.append(tenant)
+    with _db_lock:
+        return _db().execute(sql + " GROUP BY tenant, event", args).fetchall()
+
+
+def top_pages(since_day: str, tenant: str | None = None, limit: int = 20) -> list[tuple[str, int]]:
+    sql = "SELECT page, SUM(n) AS total FROM page_counts WHERE day >= ?"
+    args: list = [since_day]
+    if tenant:
+        sql += " AND tenant = ?"
+        args.append(tenant)
+    args.append(limit)
+    with _db_lock:
+        return _db().execute(sql + " GROUP BY page ORDER BY total DESC LIMIT ?", args).fetchall()
+
+
+def rebuild_day(day: str) -> int:
+    """Recompute one day's rollups from its segment; returns the events counted."""
+    records = []
+    path = segment_path(day)
+    if path.exists():
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    rec["ts"] = int(rec.get("ts") or 0)
+                except (ValueError, TypeError, AttributeError):
+                    continue
+                if rec.get("tenant") and rec.get("event"):
+                    records.append(rec)
+    with _db_lock:
+        conn = _db()
+        with conn:
+            conn.execute("DELETE FROM daily_counts WHERE day = ?", (day,))
+            conn.execute("DELETE FROM page_counts WHERE day = ?", (day,))
+    _apply_rollups(*_aggregate(records))
+    return len(records)
+
+
+def prune(today: date | None = None) -> int:
+    """Drop segments and rollup days past retention; cheap no-op after the first call each day."""
+    global _pruned_day
+    today = today or datetime.now(timezone.utc).date()
+    if _pruned_day == today.isoformat() or ANALYTICS_RETENTION_DAYS <= 0:
+        return 0
+    _pruned_day = today.isoformat()
+    cutoff = (today - timedelta(days=ANALYTICS_RETENTION_DAYS)).isoformat()
+    removed = 0
+    if ANALYTICS_DIR.exists():
+        for p in ANALYTICS_DIR.iterdir():
+            m = _SEGMENT.match(p.name)
+            if m and m.group(1) < cutoff:
+                p.unlink(missing_ok=True)
+                removed += 1
+    with _db_lock:
+        conn = _db()
+        with conn:
+            conn.execute("DELETE FROM daily_counts WHERE day < ?", (cutoff,))
+            conn.execute("DELETE FROM page_counts WHERE day < ?", (cutoff,))
+    _stats["segments_pruned"] += removed
+    return removed
+
+
+def import_legacy(path: Path, writer: AnalyticsWriter, batch: int = 10000) -> int:
+    """One-time split of the old single analytics.jsonl into segments; renames it to *.imported.
+
+    Every gunicorn worker calls this at startup. The rename to *.importing is
+    the claim: exactly one worker wins it and the others return 0 instead of
+    importing the same events again. A leftover *.importing file means an
+    import died part-way and is left for an operator rather than re-run.
+    """
+    claimed = path.with_name(path.name + ".importing")
+    try:
+        path.rename(claimed)
+    except FileNotFoundError:
+        return 0
+    count = 0
+    chunk: list[dict] = []
+    with claimed.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+                rec["ts"] = int(rec.get("ts") or 0)
+            except (ValueError, TypeError, AttributeError):
+                continue
+            if not rec.get("tenant") or not rec.get("event"):
+                continue
+            chunk.append(rec)
+            if len(chunk) >= batch:
+                with writer._io_lock:
+                    writer.write_batch(chunk)
+                count += len(chunk)
+                chunk = []
+    if chunk:
+        with writer._io_lock:
+            writer.write_batch(chunk)
+        count += len(chunk)
+    claimed.replace(path.with_name(path.name + ".imported"))
+    return count
+
+
+def stats() -> dict:
+    segments = _days_since("0000-00-00")
+    return {
+        "dir": str(ANALYTICS_DIR),
+        "segments": len(segments),
+        "oldest": segments[0] if segments else None,
+        "retention_days": ANALYTICS_RETENTION_DAYS,
+        **_stats,
+    }
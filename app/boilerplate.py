@@ -0,0 +1,198 @@
+"""Per-publisher boilerplate index.
+
+Publishers repeat the same newsletter plugs, bylines, share prompts and footer
+lines in every article. For each domain we count, across the articles we have
+extracted, how many contained each line (by a short fingerprint of the
+normalized line). Once a domain has BOILERPLATE_MIN_DOCS articles behind it, a
+line that appeared in at least BOILERPLATE_THRESHOLD of them is dropped before
+narration. Stripping is one dict lookup per line.
+
+Counts are halved whenever a domain reaches BOILERPLATE_WINDOW articles, so a
+site redesign ages out old footers, and the index is snapshotted to JSON under
+CACHE_ROOT so it survives restarts.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("easyaudio")
+
+BOILERPLATE_ENABLED = os.getenv("BOILERPLATE_ENABLED", "1").lower() in {"1", "true", "yes", "on"}
+BOILERPLATE_MIN_DOCS = int(os.getenv("BOILERPLATE_MIN_DOCS", "5"))
+BOILERPLATE_THRESHOLD = float(os.getenv("BOILERPLATE_THRESHOLD", "0.5"))
+BOILERPLATE_WINDOW = int(os.getenv("BOILERPLATE_WINDOW", "200"))
+BOILERPLATE_MAX_LINES = int(os.getenv("BOILERPLATE_MAX_LINES", "20000"))
+BOILERPLATE_MAX_DOMAINS = int(os.getenv("BOILERPLATE_MAX_DOMAINS", "2000"))
+BOILERPLATE_SNAPSHOT = Path(
+    os.getenv("BOILERPLATE_SNAPSHOT", str(Path(os.getenv("CACHE_ROOT", "/cache")) / "boilerplate.json"))
+)
+BOILERPLATE_SNAPSHOT_INTERVAL_S = float(os.getenv("BOILERPLATE_SNAPSHOT_INTERVAL_S", "300"))
+
+# Article URLs remembered per domain, so a page extracted twice (another profile,
+# a changed body, the widget posting its text) is only counted once.
+_RECENT_DOCS = 256
+# Digits are folded so "Published 3 hours ago" and "Published 5 hours ago" share a fingerprint.
+_DIGITS = re.compile(r"\d+")
+_SPACE = re.compile(r"\s+")
+
+
+class _Domain:
+    __slots__ = ("docs", "counts", "recent")
+
+    def __init__(self, docs: int = 0, counts: dict | None = None):
+        self.docs = docs
+        self.counts: dict[int, int] = counts or {}
+        self.recent: "OrderedDict[bytes, None]" = OrderedDict()
+
+
+_domains: "OrderedDict[str, _Domain]" = OrderedDict()
+_lock = Lock()
+_stats = {"articles": 0, "learned": 0, "lines_stripped": 0, "chars_stripped": 0}
+_dirty = False
+_saved_at = time.time()
+
+
+def domain_of(url: str | None) -> str:
+    host = (urlsplit(url or "").hostname or "").lower().rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+
+def line_fingerprint(line: str) -> int:
+    norm = _DIGITS.sub("0", _SPACE.sub(" ", line).strip().lower())
+    return int.from_bytes(hashlib.blake2b(norm.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _cutoff(d: _Domain) -> int:
+    return max(2, math.ceil(d.docs * BOILERPLATE_THRESHOLD))
+
+
+def _learn(d: _Domain, url: str, fps: set[int]) -> None:
+    global _dirty
+    parts = urlsplit(url)
+    doc_key = hashlib.blake2b(f"{parts.path}?{parts.query}".encode("utf-8", "ignore"), digest_size=16).digest()
+    if doc_key in d.recent:
+        return
+    d.recent[doc_key] = None
+    if len(d.recent) > _RECENT_DOCS:
+        d.recent.popitem(last=False)
+    counts = d.counts
+    for fp in fps:
+        counts[fp] = counts.get(fp, 0) + 1
+    d.docs += 1
+    if d.docs >= BOILERPLATE_WINDOW:
+        d.docs //= 2
+        d.counts = {fp: c // 2 for fp, c in counts.items() if c > 1}
+    elif len(counts) > BOILERPLATE_MAX_LINES:
+        # Lines seen in a single article are article text; forget them first.
+        d.counts = {fp: c for fp, c in counts.items() if c > 1}
+        if len(d.counts) > BOILERPLATE_MAX_LINES:
+            keep = sorted(d.counts.items(), key=lambda kv: kv[1], reverse=True)[:BOILERPLATE_MAX_LINES]
+            d.counts = dict(keep)
+    _stats["learned"] += 1
+    _dirty = True
+
+
+def filter_text(url: str | None, text: str, *, learn: bool = True) -> str:
+    """
+    Drop lines that recur across the domain's articles, then (optionally) add
+    this article to the domain's counts. Line breaks of kept lines are preserved.
+    """
+    if not BOILERPLATE_ENABLED or not text:
+        return text
+    domain = domain_of(url)
+    if not domain:
+        return text
+    lines = text.split("\n")
+    fps = [line_fingerprint(ln) if ln.strip() else 0 for ln in lines]
+    with _lock:
+        d = _domains.get(domain)
+        if d is None:
+            if not learn:
+                return text
+            d = _domains[domain] = _Domain()
+            while len(_domains) > BOILERPLATE_MAX_DOMAINS:
+                _domains.popitem(last=False)
+        else:
+            _domains.move_to_end(domain)
+        _stats["articles"] += 1
+        out = text
+        if d.docs >= BOILERPLATE_MIN_DOCS:
+            cutoff = _cutoff(d)
+            counts = d.counts
+            drop = [bool(fp) and counts.get(fp, 0) >= cutoff for fp in fps]
+            if any(drop):
+                kept = [ln for ln, x in zip(lines, drop) if not x]
+                out = "\n".join(kept)
+                _stats["lines_stripped"] += sum(drop)
+                _stats["chars_stripped"] += len(text) - len(out)
+        if learn:
+            _learn(d, url, {fp for fp in fps if fp})
+    return out
+
+
+def snapshot_due() -> bool:
+    return _dirty and time.time() - _saved_at >= BOILERPLATE_SNAPSHOT_INTERVAL_S
+
+
+def save(path: Path = BOILERPLATE_SNAPSHOT) -> bool:
+    """Write the index atomically; safe to call from a worker thread."""
+    global _dirty, _saved_at
+    with _lock:
+        data = {
+            "version": 1,
+            "domains": {
+                name: {"docs": d.docs, "lines": {format(fp, "x"): c for fp, c in d.counts.items()}}
+                for name, d in _domains.items()
+            },
+        }
+        _dirty = False
+        _saved_at = time.time()
+    tmp = path.with_suffix(".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+        return True
+    except Exception as e:
+        logger.warning("[boilerplate] snapshot save failed path=%s err=%s", path, e)
+        with _lock:
+            _dirty = True
+        return False
+
+
+def load(path: Path = BOILERPLATE_SNAPSHOT) -> int:
+    """Restore a snapshot written by save(); returns the number of domains loaded."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return 0
+    except Exception as e:
+        logger.warning("[boilerplate] snapshot load failed path=%s err=%s", path, e)
+        return 0
+    loaded = 0
+    with _lock:
+        for name, entry in (data.get("domains") or {}).items():
+            try:
+                counts = {int(fp, 16): int(c) for fp, c in (entry.get("lines") or {}).items()}
+                _domains[name] = _Domain(int(entry.get("docs") or 0), counts)
+                loaded += 1
+            except (TypeError, ValueError, AttributeError):
+                continue
+        while len(_domains) > BOILERPLATE_MAX_DOMAINS:
+            _domains.popitem(last=False)
+    return loaded
+
+
+def stats() -> dict:
+    with _lock:
+        lines = sum(len(d.counts) for d in _domains.values())
+        ready = sum(d.docs >= BOILERPLATE_MIN_DOCS for d in _domains.values())
+        return {"enabled": BOILERPLATE_ENABLED, "domains": len(_domains), "ready": ready, "lines": lines, **_stats}
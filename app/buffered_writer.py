@@ -0,0 +1,218 @@
+"""Buffered append-only file writers for metrics and analytics.
+
+Request paths call BufferedWriter.append(line), which only pushes the
+pre-rendered line onto an in-memory ring; no file is opened on the hit path.
+A background task per writer drains the ring in batches, when
+WRITER_FLUSH_RECORDS lines are waiting or every WRITER_FLUSH_INTERVAL_S,
+whichever comes first. File I/O happens in a worker thread, one open and one
+write per batch, so batches from several processes never interleave.
+
+Durability is set by WRITER_FSYNC:
+  none      leave it to the OS (default; the page cache survives a process crash)
+  batch     fsync after every batch
+  interval  fsync at most every WRITER_FSYNC_INTERVAL_S
+
+The ring holds WRITER_BUFFER_RECORDS lines. If the disk stalls long enough to
+fill it, the oldest lines are dropped and counted rather than blocking
+requests. stop() and the atexit hook drain everything, so a graceful shutdown
+loses nothing.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import time
+from collections import deque
+from pathlib import Path
+from threading import Lock
+
+logger = logging.getLogger("easyaudio")
+
+WRITER_BUFFER_RECORDS = int(os.getenv("WRITER_BUFFER_RECORDS", "100000"))
+WRITER_FLUSH_RECORDS = int(os.getenv("WRITER_FLUSH_RECORDS", "500"))
+WRITER_FLUSH_INTERVAL_S = float(os.getenv("WRITER_FLUSH_INTERVAL_S", "1"))
+WRITER_FSYNC = os.getenv("WRITER_FSYNC", "none").strip().lower()
+WRITER_FSYNC_INTERVAL_S = float(os.getenv("WRITER_FSYNC_INTERVAL_S", "5"))
+
+_writers: dict[str, "BufferedWriter"] = {}
+
+
+class BufferedWriter:
+    def __init__(
+        self,
+        name: str,
+        path: Path,
+        header: str | None = None,
+        *,
+        capacity: int = WRITER_BUFFER_RECORDS,
+        flush_records: int = WRITER_FLUSH_RECORDS,
+        flush_interval_s: float = WRITER_FLUSH_INTERVAL_S,
+        fsync: str = WRITER_FSYNC,
+    ):
+        self.name = name
+        self.path = Path(path)
+        self.header = header
+        self.capacity = capacity
+        self.flush_records = flush_records
+        self.flush_interval_s = flush_interval_s
+        self.fsync = fsync if fsync in ("none", "batch", "interval") else "none"
+        self._buf: deque = deque()
+        self._lock = Lock()
+        # Serializes file writes so the background flush and a forced flush never interleave.
+        self._io_lock = Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._kicked = False
+        self._task: asyncio.Task | None = None
+        self._fsynced_at = 0.0
+        self._stats = {
+            "appended": 0,
+            "written": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "fsyncs": 0,
+            "errors": 0,
+            "max_depth": 0,
+            "last_flush_ms": 0,
+        }
+        _writers[name] = self
+
+    def append(self, line) -> None:
+        """Queue one line (without trailing newline), or one record for a subclass. Never touches the file."""
+        with self._lock:
+            if len(self._buf) >= self.capacity:
+                self._buf.popleft()
+                self._stats["dropped"] += 1
+            self._buf.append(line)
+            self._stats["appended"] += 1
+            depth = len(self._buf)
+            if depth > self._stats["max_depth"]:
+                self._stats["max_depth"] = depth
+            kick = depth >= self.flush_records and not self._kicked and self._loop is not None
+            if kick:
+                self._kicked = True
+        if kick:
+            try:
+                self._loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+    def flush(self) -> int:
+        """Write everything buffered; returns the number of lines written. Blocking."""
+        with self._io_lock:
+            with self._lock:
+                if not self._buf:
+                    self._kicked = False
+                    return 0
+                lines = list(self._buf)
+                self._buf.clear()
+                self._kicked = False
+            t0 = time.perf_counter()
+            try:
+                self.write_batch(lines)
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.warning("[writer] %s flush failed lines=%s err=%s", self.name, len(lines), e)
+                # Put the batch back in front so the next flush retries it in order.
+                with self._lock:
+                    room = max(self.capacity - len(self._buf), 0)
+                    keep = lines[-room:] if room else []
+                    self._stats["dropped"] += len(lines) - len(keep)
+                    self._buf.extendleft(reversed(keep))
+                return 0
+            self._stats["flushes"] += 1
+            self._stats["written"] += len(lines)
+            self._stats["last_flush_ms"] = int((time.perf_counter() - t0) * 1000)
+            return len(lines)
+
+    def write_batch(self, lines: list) -> None:
+        """Append one drained batch to the file. Subclasses override this to route records elsewhere."""
+        self.append_lines(self.path, lines, header=self.header)
+
+    def append_lines(self, path: Path, lines: list[str], header: str | None = None) -> None:
+        # gunicorn workers append to the same files. One write() of the whole batch on an
+        # O_APPEND fd keeps each batch contiguous; a buffered text file splits it into
+        # ~8 KB writes that another process can land between, mid-line.
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_EXCL, 0o644)
+            is_new = True
+        except FileExistsError:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+            is_new = False
+        try:
+            if not is_new:
+                is_new = os.fstat(fd).st_size == 0
+            text = "\n".join(lines) + "\n"
+            if is_new and header:
+                text = header + "\n" + text
+            data = memoryview(text.encode("utf-8"))
+            while data:
+                data = data[os.write(fd, data):]
+            self._maybe_fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _maybe_fsync(self, fd: int) -> None:
+        now = time.monotonic()
+        if self.fsync == "batch" or (self.fsync == "interval" and now - self._fsynced_at >= WRITER_FSYNC_INTERVAL_S):
+            os.fsync(fd)
+            self._fsynced_at = now
+            self._stats["fsyncs"] += 1
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await asyncio.to_thread(self.flush)
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the flusher and drain what is left."""
+        task, self._task = self._task, None
+        self._loop = None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.to_thread(self.flush)
+
+    def depth(self) -> int:
+        return len(self._buf)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "path": str(self.path),
+                "depth": len(self._buf),
+                "capacity": self.capacity,
+                "fsync": self.fsync,
+                **self._stats,
+            }
+
+
+def flush_all() -> None:
+    for writer in list(_writers.values()):
+        try:
+            writer.flush()
+        except Exception:
+            pass
+
+
+def stats() -> dict:
+    return {name: w.stats() for name, w in _writers.items()}
+
+
+atexit.register(flush_all)
@@ -0,0 +1,98 @@
+"""Sentence chunker for chunked synthesis.
+
+`iter_chunks` is a generator: it walks the text lazily and hands each chunk to
+the synthesis loop as soon as it is complete. The first chunk is kept short so
+the first audio arrives quickly; later chunks grow toward CHUNK_TARGET_CHARS.
+No chunk ever exceeds the provider's per-request character limit for the model
+(or CHUNK_MAX_CHARS, whichever is lower). A sentence longer than that is split
+at the last clause boundary that fits, then at a space, and only as a last
+resort mid-word.
+"""
+import os
+import re
+from typing import Iterator
+
+# Per-request character limits published by ElevenLabs, by model id.
+PROVIDER_CHAR_LIMITS = {
+    "eleven_multilingual_v2": 10_000,
+    "eleven_monolingual_v1": 10_000,
+    "eleven_multilingual_v1": 10_000,
+    "eleven_turbo_v2": 30_000,
+    "eleven_flash_v2": 30_000,
+    "eleven_turbo_v2_5": 40_000,
+    "eleven_flash_v2_5": 40_000,
+}
+DEFAULT_PROVIDER_LIMIT = 5_000
+
+CHUNK_FIRST_CHARS = int(os.getenv("CHUNK_FIRST_CHARS", "250"))
+CHUNK_TARGET_CHARS = int(os.getenv("CHUNK_TARGET_CHARS", "1200"))
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "1600"))
+# Each chunk may be this much larger than the previous one until the target is reached.
+CHUNK_GROWTH = float(os.getenv("CHUNK_GROWTH", "2.0"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_CLAUSE_END = re.compile(r"[,;:—–)](?=\s)|\s[—–-]\s")
+
+
+def provider_char_limit(model_id: str | None) -> int:
+    return PROVIDER_CHAR_LIMITS.get((model_id or "").strip(), DEFAULT_PROVIDER_LIMIT)
+
+
+def _sentences(text: str) -> Iterator[str]:
+    start = 0
+    for m in _SENTENCE_END.finditer(text):
+        s = text[start:m.start()].strip()
+        if s:
+            yield s
+        start = m.end()
+    s = text[start:].strip()
+    if s:
+        yield s
+
+
+def _split_long(sentence: str, limit: int) -> Iterator[str]:
+    rest = sentence
+    while len(rest) > limit:
+        window = rest[: limit + 1]
+        cut = 0
+        for m in _CLAUSE_END.finditer(window):
+            cut = m.end()
+        if cut < limit // 3:
+            # No clause boundary in a useful place; fall back to the last space.
+            cut = window.rfind(" ")
+            if cut < limit // 3:
+                cut = limit
+        piece = rest[:cut].strip()
+        if piece:
+            yield piece
+        rest = rest[cut:].lstrip()
+    if rest:
+        yield rest
+
+
+def iter_chunks(
+    text: str,
+    model_id: str | None = None,
+    *,
+    first_chars: int = CHUNK_FIRST_CHARS,
+    target_chars: int = CHUNK_TARGET_CHARS,
+    max_chars: int | None = None,
+) -> Iterator[str]:
+    """Yield sentence-aligned chunks of `text`, small first, each within the provider limit."""
+    hard = min(max_chars or CHUNK_MAX_CHARS, provider_char_limit(model_id))
+    target = min(target_chars, hard)
+    budget = min(first_chars, target) if first_chars > 0 else target
+    cur: list[str] = []
+    size = 0
+    for sentence in _sentences(text or ""):
+        for piece in _split_long(sentence, hard) if len(sentence) > hard else (sentence,):
+            added = len(piece) + (1 if cur else 0)
+            if cur and size + added > budget:
+                yield " ".join(cur)
+                cur, size = [], 0
+                budget = min(target, max(budget + 1, int(budget * CHUNK_GROWTH)))
+                added = len(piece)
+            cur.append(piece)
+            size += added
+    if cur:
+        yield " ".join(cur)
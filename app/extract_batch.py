@@ -0,0 +1,67 @@
+"""Batch article extraction for archive qualification.
+
+URLs are fetched concurrently under a global limit and a per-origin limit, so
+a back catalogue from one publisher never has more than a few requests open
+against that origin. Results are yielded as each URL finishes, not in input
+order, so callers can stream them straight back as NDJSON.
+"""
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Awaitable, Callable
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("easyaudio")
+
+BATCH_MAX_URLS = int(os.getenv("BATCH_MAX_URLS", "5000"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "32"))
+BATCH_PER_ORIGIN = int(os.getenv("BATCH_PER_ORIGIN", "4"))
+
+
+def origin_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme.lower()}://{(parts.netloc or '').lower()}"
+
+
+async def run_batch(
+    urls: list[str],
+    extract_one: Callable[[str], Awaitable[dict]],
+    *,
+    concurrency: int = BATCH_CONCURRENCY,
+    per_origin: int = BATCH_PER_ORIGIN,
+) -> AsyncIterator[dict]:
+    """
+    Yield `extract_one(url)` results as they complete.
+
+    `extract_one` should return a dict; any exception it raises is reported as
+    {"url", "ok": False, "error"} so one bad page never aborts the batch.
+    """
+    global_slots = asyncio.Semaphore(max(1, concurrency))
+    origin_slots: dict[str, asyncio.Semaphore] = {}
+
+    async def _one(url: str) -> dict:
+        slot = origin_slots.setdefault(origin_of(url), asyncio.Semaphore(max(1, per_origin)))
+        # Take the origin slot first so a busy origin never parks global capacity.
+        async with slot:
+            async with global_slots:
+                try:
+                    return await extract_one(url)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    status = getattr(e, "status_code", None) or 500
+                    detail = getattr(e, "detail", None) or str(e) or type(e).__name__
+                    return {"url": url, "ok": False, "status": status, "error": str(detail)[:300]}
+
+    tasks = [asyncio.ensure_future(_one(u)) for u in urls]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+    finally:
+        # Client went away mid-stream: stop fetching the rest of the catalogue.
+        pending = [t for t in tasks if not t.done()]
+        for t in pending:
+            t.cancel()
+        if pending:
+            logger.info("[batch] cancelled %s pending urls", len(pending))
+            await asyncio.gather(*pending, return_exceptions=True)
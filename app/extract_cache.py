@@ -0,0 +1,117 @@
+"""URL-keyed cache of extraction results with HTTP revalidation.
+
+Entries hold the extracted document plus the origin's ETag/Last-Modified so a
+repeat fetch can be a conditional GET. A 304 (or an unchanged body) reuses the
+stored document and skips extraction entirely.
+"""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+EXTRACT_CACHE_SIZE = int(os.getenv("EXTRACT_CACHE_SIZE", "2048"))
+
+_TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "_ga", "ref", "ref_src"}
+
+_entries: "OrderedDict[str, dict]" = OrderedDict()
+_stats = {"hits": 0, "revalidated": 0, "misses": 0}
+
+
+def normalize_article_url(url: str) -> str:
+    """Canonical form used as the cache key: no fragment, tracking params or default port."""
+    raw = (url or "").strip()
+    if "://" not in raw:
+        raw = f"https://{raw}"
+    parts = urlsplit(raw)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower().rstrip(".")
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    ]
+    query.sort()
+    path = parts.path or "/"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def cache_key(url: str, profile: str = "article") -> str:
+    return f"{profile}|{normalize_article_url(url)}"
+
+
+def body_digest(body: str) -> str:
+    return hashlib.sha1(body.encode("utf-8", "ignore")).hexdigest()
+
+
+def get_entry(key: str) -> Optional[dict]:
+    entry = _entries.get(key)
+    if entry is not None:
+        _entries.move_to_end(key)
+    return entry
+
+
+def put_entry(
+    key: str,
+    doc: dict,
+    *,
+    etag: str | None = None,
+    last_modified: str | None = None,
+    digest: str | None = None,
+) -> dict:
+    entry = {
+        "doc": doc,
+        "etag": etag or None,
+        "last_modified": last_modified or None,
+        "digest": digest,
+        "fetched_at": time.time(),
+    }
+    _entries[key] = entry
+    _entries.move_to_end(key)
+    while len(_entries) > EXTRACT_CACHE_SIZE:
+        _entries.popitem(last=False)
+    return entry
+
+
+def touch_entry(entry: dict, *, etag: str | None = None, last_modified: str | None = None) -> None:
+    """Record a successful revalidation, keeping any validators the origin re-sent."""
+    if etag:
+        entry["etag"] = etag
+    if last_modified:
+        entry["last_modified"] = last_modified
+    entry["fetched_at"] = time.time()
+
+
+def conditional_headers(entry: Optional[dict]) -> dict:
+    if not entry:
+        return {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def invalidate(url: str | None = None) -> int:
+    if url is None:
+        n = len(_entries)
+        _entries.clear()
+        return n
+    suffix = f"|{normalize_article_url(url)}"
+    keys = [k for k in _entries if k.endswith(suffix)]
+    for k in keys:
+        _entries.pop(k, None)
+    return len(keys)
+
+
+def record(outcome: str) -> None:
+    _stats[outcome] = _stats.get(outcome, 0) + 1
+
+
+def stats() -> dict:
+    return {"entries": len(_entries), "capacity": EXTRACT_CACHE_SIZE, **_stats}
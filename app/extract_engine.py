@@ -0,0 +1,171 @@
+"""Process-pool article extraction.
+
+trafilatura parsing is pure CPU under the GIL, so a large news page can hold
+the event loop for hundreds of milliseconds. Documents are handed to a pool of
+worker processes sized to the host instead. Each job parses the HTML once and
+returns title, author, body, subtitle and og:image together.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - non-POSIX hosts
+    resource = None
+
+logger = logging.getLogger("easyaudio")
+
+# 0 workers runs extraction in a thread instead (no memory cap, timeout is best-effort).
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+EXTRACT_TIMEOUT_S = float(os.getenv("EXTRACT_TIMEOUT_S", "10"))
+EXTRACT_MAX_MEMORY_MB = int(os.getenv("EXTRACT_MAX_MEMORY_MB", "1024"))
+# Recycle workers periodically so lxml/trafilatura heap growth never accumulates.
+EXTRACT_MAX_TASKS_PER_CHILD = int(os.getenv("EXTRACT_MAX_TASKS_PER_CHILD", "200"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+class ExtractionTimeout(Exception):
+    """Raised when a single document exceeds EXTRACT_TIMEOUT_S."""
+
+
+def _empty_result() -> dict:
+    return {"title": "", "author": "", "text": "", "subtitle": "", "image": ""}
+
+
+def _join_author(value) -> str:
+    if isinstance(value, (list, tuple)):
+        return ", ".join([x for x in value if x]).strip()
+    return (value or "").strip()
+
+
+def extract_document(html: str, url: str | None = None, favor_precision: bool = False) -> dict:
+    """Parse `html` once and return every field the handlers need as plain strings."""
+    import trafilatura
+
+    from app.html_meta import extract_page_meta
+
+    # The streaming meta pass stops early, so it is cheap next to trafilatura's parse.
+    page = extract_page_meta(html)
+    doc = trafilatura.bare_extraction(
+        html,
+        url=url,
+        with_metadata=True,
+        include_comments=False,
+        include_tables=False,
+        include_links=False,
+        favor_precision=favor_precision,
+    )
+    data = {} if doc is None else (doc.as_dict() if hasattr(doc, "as_dict") else dict(doc))
+    return {
+        "title": (data.get("title") or page["title"] or "").strip(),
+        "author": _join_author(data.get("author")) or page["author"] or "",
+        "text": (data.get("text") or "").strip(),
+        "subtitle": (data.get("description") or page["subtitle"] or "").strip(),
+        "image": (data.get("image") or page["image"] or "").strip(),
+    }
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout(f"extraction exceeded {EXTRACT_TIMEOUT_S}s")
+
+
+def _init_worker(max_memory_mb: int) -> None:
+    if resource is not None and max_memory_mb > 0:
+        limit = max_memory_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError) as e:
+            logger.warning("[extract] unable to set worker memory cap: %s", e)
+    signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def _extract_job(html: str, url: str | None, favor_precision: bool, timeout_s: float) -> dict:
+    # Runs in the worker's main thread, so SIGALRM interrupts a runaway parse.
+    signal.setitimer(signal.ITIMER_REAL, timeout_s)
+    try:
+        return extract_document(html, url=url, favor_precision=favor_precision)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def start_extraction_pool() -> None:
+    global _pool
+    if _pool is not None or EXTRACT_WORKERS <= 0:
+        return
+    # spawn is required for max_tasks_per_child and avoids forking a live event loop.
+    _pool = ProcessPoolExecutor(
+        max_workers=EXTRACT_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(EXTRACT_MAX_MEMORY_MB,),
+        max_tasks_per_child=EXTRACT_MAX_TASKS_PER_CHILD or None,
+    )
+    logger.info("[extract] pool started workers=%s", EXTRACT_WORKERS)
+
+
+def _kill_pool(pool: Optional[ProcessPoolExecutor]) -> None:
+    """Tear down `pool` if it is still the live one; a stale pool is left alone.
+
+    Other requests' jobs on the killed pool fail with BrokenProcessPool and
+    retry on the next one, so their futures are not cancelled here.
+    """
+    global _pool
+    if pool is None or _pool is not pool:
+        return
+    _pool = None
+    for proc in list((getattr(pool, "_processes", None) or {}).values()):
+        try:
+            proc.terminate()
+        except Exception:
+            pass
+    pool.shutdown(wait=False)
+
+
+async def shutdown_extraction_pool() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await asyncio.to_thread(pool.shutdown, True, cancel_futures=True)
+
+
+async def extract_html(html: str, *, url: str | None = None, favor_precision: bool = False) -> dict:
+    """Extract `html` off the event loop. Raises ExtractionTimeout on slow documents."""
+    if not html:
+        return _empty_result()
+    if EXTRACT_WORKERS <= 0:
+        try:
+            return await asyncio.wait_for(
+                asyncio.to_thread(extract_document, html, url, favor_precision),
+                timeout=EXTRACT_TIMEOUT_S,
+            )
+        except asyncio.TimeoutError:
+            raise ExtractionTimeout(f"extraction exceeded {EXTRACT_TIMEOUT_S}s")
+
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        start_extraction_pool()
+        # Remember which pool ran the job: by the time it fails, another request
+        # may already have replaced it, and that replacement must survive.
+        pool = _pool
+        fut = loop.run_in_executor(pool, _extract_job, html, url, favor_precision, EXTRACT_TIMEOUT_S)
+        try:
+            # The worker alarm should fire first; this is the backstop for parses stuck in C code.
+            return await asyncio.wait_for(fut, timeout=EXTRACT_TIMEOUT_S + 2.0)
+        except asyncio.TimeoutError:
+            logger.warning("[extract] worker unresponsive; restarting pool url=%s", url)
+            _kill_pool(pool)
+            raise ExtractionTimeout(f"extraction exceeded {EXTRACT_TIMEOUT_S}s")
+        except BrokenProcessPool:
+            # A worker died (memory cap, OOM killer); rebuild the pool and retry once.
+            logger.warning("[extract] pool broken attempt=%s url=%s", attempt, url)
+            _kill_pool(pool)
+            if attempt:
+                raise
+    raise BrokenProcessPool("extraction pool unavailable")
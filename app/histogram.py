@@ -0,0 +1,369 @@
+"""Fixed-memory latency histograms and counters, merged across workers.
+
+Each series is a LogHistogram: HIST_BUCKETS counters on a geometric grid
+(every bucket is HIST_GROWTH times wider than the previous), so any quantile
+is reported to within that relative error, about 4% by default. Memory per
+series is fixed no matter how many samples arrive. Two histograms with the
+same grid merge by adding counters, which is how worker processes are
+combined. Plain counters (inc) ride along in the same snapshots.
+
+Series are keyed by metric name plus a small label set (model, tenant tier,
+extraction profile, route). The number of series is capped at
+HIST_MAX_SERIES per kind, and anything beyond the cap is folded into an
+"other" label.
+
+Every worker publishes a sparse snapshot to HIST_SHARE_DIR/<pid>.json every
+HIST_PUBLISH_S seconds. Snapshots are cumulative, so collect() adds this
+process's live series to every other worker's file. When a worker exits (or
+its pid is found dead) its totals are folded into retired.json under an
+exclusive lock, so merged counters never go backwards when gunicorn recycles
+workers. Readers hold a shared lock, so a retirement is never seen half done.
+The share dir is per host; workers on different hosts are merged by the scraper.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+from array import array
+from pathlib import Path
+from threading import Lock
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX dev boxes: no cross-process lock, single worker
+    fcntl = None
+
+logger = logging.getLogger("easyaudio")
+
+HIST_GROWTH = float(os.getenv("HIST_GROWTH", "1.04"))
+HIST_MAX_MS = float(os.getenv("HIST_MAX_MS", str(60 * 60 * 1000)))
+HIST_MAX_SERIES = int(os.getenv("HIST_MAX_SERIES", "2000"))
+HIST_SHARE_DIR = Path(
+    os.getenv("HIST_SHARE_DIR", str(Path(os.getenv("CACHE_ROOT", "/cache")) / "metrics-shared"))
+)
+HIST_PUBLISH_S = float(os.getenv("HIST_PUBLISH_S", "5"))
+
+_LOG_GROWTH = math.log(HIST_GROWTH)
+HIST_BUCKETS = int(math.ceil(math.log(HIST_MAX_MS) / _LOG_GROWTH)) + 2
+QUANTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p999", 0.999))
+
+
+def bucket_of(value: float) -> int:
+    """Bucket 0 holds [0, 1]; bucket i holds (growth**(i-1), growth**i]."""
+    if value <= 1:
+        return 0
+    return min(int(math.ceil(math.log(value) / _LOG_GROWTH)), HIST_BUCKETS - 1)
+
+
+def bucket_upper(i: int) -> float:
+    return HIST_GROWTH ** i if i else 1.0
+
+
+class LogHistogram:
+    __slots__ = ("counts", "count", "sum", "min", "max")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * HIST_BUCKETS))
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        value = max(float(value), 0.0)
+        self.counts[bucket_of(value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LogHistogram") -> None:
+        counts = self.counts
+        for i, n in enumerate(other.counts):
+            if n:
+                counts[i] += n
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(max(bucket_upper(i), self.min), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        out = {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 1) if self.count else None,
+            "min": round(self.min, 1) if self.count else None,
+            "max": round(self.max, 1) if self.count else None,
+        }
+        for label, q in QUANTILES:
+            v = self.quantile(q)
+            out[label] = round(v, 1) if v is not None else None
+        return out
+
+    def to_dict(self) -> dict:
+        return {
+            "counts": {str(i): n for i, n in enumerate(self.counts) if n},
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LogHistogram":
+        h = cls()
+        for i, n in (data.get("counts") or {}).items():
+            idx = int(i)
+            if 0 <= idx < HIST_BUCKETS:
+                h.counts[idx] += int(n)
+        h.count = int(data.get("count") or 0)
+        h.sum = float(data.get("sum") or 0.0)
+        h.min = float(data["min"]) if data.get("min") is not None else math.inf
+        h.max = float(data.get("max") or 0.0)
+        return h
+
+
+SeriesKey = tuple[str, tuple[tuple[str, str], ...]]
+
+_series: dict[SeriesKey, LogHistogram] = {}
+_counters: dict[SeriesKey, float] = {}
+_lock = Lock()
+_RETIRED = "retired.json"
+
+
+def _key(name: str, labels: dict) -> SeriesKey:
+    return name, tuple(sorted((k, str(v) if v is not None else "none") for k, v in labels.items()))
+
+
+def observe(name: str, value_ms: float, **labels) -> None:
+    """Record one latency sample (milliseconds) for `name` with `labels`."""
+    key = _key(name, labels)
+    with _lock:
+        h = _series.get(key)
+        if h is None:
+            if len(_series) >= HIST_MAX_SERIES:
+                key = _key(name, {k: "other" for k in labels})
+                h = _series.get(key)
+            if h is None:
+                h = _series[key] = LogHistogram()
+        h.record(value_ms)
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    """Add `value` to the counter `name` with `labels`."""
+    key = _key(name, labels)
+    with _lock:
+        if key not in _counters and len(_counters) >= HIST_MAX_SERIES:
+            key = _key(name, {k: "other" for k in labels})
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def snapshot() -> dict:
+    with _lock:
+        series = [
+            {"name": name, "labels": dict(labels), **h.to_dict()}
+            for (name, labels), h in _series.items()
+        ]
+        counters = [
+            {"name": name, "labels": dict(labels), "value": v}
+            for (name, labels), v in _counters.items()
+        ]
+    return {"version": 2, "growth": HIST_GROWTH, "buckets": HIST_BUCKETS, "series": series, "counters": counters}
+
+
+Collected = tuple[dict[SeriesKey, LogHistogram], dict[SeriesKey, float]]
+
+
+def _merge_into(out: Collected, snap: dict) -> None:
+    hists, counters = out
+    for c in snap.get("counters") or []:
+        key = _key(c["name"], c.get("labels") or {})
+        counters[key] = counters.get(key, 0) + float(c.get("value") or 0)
+    if snap.get("growth") != HIST_GROWTH or snap.get("buckets") != HIST_BUCKETS:
+        return  # different grid (config change mid-deploy); histograms not mergeable
+    for s in snap.get("series") or []:
+        key = _key(s["name"], s.get("labels") or {})
+        h = LogHistogram.from_dict(s)
+        if key in hists:
+            hists[key].merge(h)
+        else:
+            hists[key] = h
+
+
+def _to_snapshot(merged: Collected) -> dict:
+    hists, counters = merged
+    return {
+        "version": 2,
+        "growth": HIST_GROWTH,
+        "buckets": HIST_BUCKETS,
+        "series": [{"name": n, "labels": dict(l), **h.to_dict()} for (n, l), h in hists.items()],
+        "counters": [{"name": n, "labels": dict(l), "value": v} for (n, l), v in counters.items()],
+    }
+
+
+def _own_file() -> Path:
+    return HIST_SHARE_DIR / f"{os.getpid()}.json"
+
+
+class _DirLock:
+    """flock on HIST_SHARE_DIR/.lock: shared for readers, exclusive for retirement."""
+
+    def __init__(self, exclusive: bool):
+        self.mode = fcntl.LOCK_EX if (fcntl and exclusive) else (fcntl.LOCK_SH if fcntl else None)
+        self.fd = None
+
+    def __enter__(self):
+        if self.mode is not None:
+            self.fd = os.open(HIST_SHARE_DIR / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self.fd, self.mode)
+        return self
+
+    def __exit__(self, *exc):
+        if self.fd is not None:
+            os.close(self.fd)  # releases the lock
+
+
+def _write_atomic(path: Path, snap: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(snap, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _read(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("[hist] unreadable snapshot path=%s err=%s", path, e)
+        return None
+
+
+def publish() -> None:
+    """Write this worker's snapshot for the others to merge."""
+    path = _own_file()
+    try:
+        HIST_SHARE_DIR.mkdir(parents=True, exist_ok=True)
+        _write_atomic(path, snapshot())
+    except Exception as e:
+        logger.warning("[hist] publish failed path=%s err=%s", path, e)
+
+
+def _retire(paths: list[Path]) -> None:
+    """Fold worker snapshots into retired.json and remove them; caller holds no lock."""
+    HIST_SHARE_DIR.mkdir(parents=True, exist_ok=True)
+    with _DirLock(exclusive=True):
+        merged: Collected = ({}, {})
+        retired = _read(HIST_SHARE_DIR / _RETIRED)
+        if retired:
+            _merge_into(merged, retired)
+        found = []
+        for path in paths:
+            snap = _read(path)
+            if snap is not None:
+                _merge_into(merged, snap)
+                found.append(path)
+        if not found:
+            return
+        _write_atomic(HIST_SHARE_DIR / _RETIRED, _to_snapshot(merged))
+        for path in found:
+            path.unlink(missing_ok=True)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists but not ours to signal
+    return True
+
+
+def retire_dead() -> int:
+    """Fold the snapshots of workers that exited without retiring themselves."""
+    if not HIST_SHARE_DIR.exists():
+        return 0
+    own = _own_file().name
+    dead = [
+        p for p in HIST_SHARE_DIR.glob("*.json")
+        if p.stem.isdigit() and p.name != own and not _pid_alive(int(p.stem))
+    ]
+    if dead:
+        _retire(dead)
+        logger.info("[hist] retired snapshots of %s dead workers", len(dead))
+    return len(dead)
+
+
+def collect_all(local_only: bool = False) -> Collected:
+    """(histograms, counters): this process's series plus every other worker's and retired totals."""
+    out: Collected = ({}, {})
+    _merge_into(out, snapshot())
+    if local_only or not HIST_SHARE_DIR.exists():
+        return out
+    own = _own_file().name
+    with _DirLock(exclusive=False):
+        for path in HIST_SHARE_DIR.glob("*.json"):
+            if path.name == own:
+                continue
+            snap = _read(path)
+            if snap is not None:
+                _merge_into(out, snap)
+    return out
+
+
+def collect(local_only: bool = False) -> dict[SeriesKey, LogHistogram]:
+    return collect_all(local_only)[0]
+
+
+def stats() -> dict:
+    with _lock:
+        n, c = len(_series), len(_counters)
+    workers = len([p for p in HIST_SHARE_DIR.glob("*.json") if p.stem.isdigit()]) if HIST_SHARE_DIR.exists() else 0
+    return {
+        "series": n,
+        "counters": c,
+        "max_series": HIST_MAX_SERIES,
+        "buckets": HIST_BUCKETS,
+        "growth": HIST_GROWTH,
+        "share_dir": str(HIST_SHARE_DIR),
+        "workers_publishing": workers,
+    }
+
+
+async def run_publisher(interval: float = HIST_PUBLISH_S) -> None:
+    """
+    Background task: publish on an interval and sweep dead workers' files.
+    On cancel, folds this worker's final totals into retired.json.
+    """
+    # A file under our pid belongs to an earlier process that reused it.
+    await asyncio.to_thread(_retire, [_own_file()])
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(publish)
+            await asyncio.to_thread(retire_dead)
+    except asyncio.CancelledError:
+        try:
+            publish()
+            _retire([_own_file()])
+            # Those totals now live in retired.json; a restarted loop must not count them again.
+            with _lock:
+                _series.clear()
+                _counters.clear()
+        except Exception as e:
+            logger.warning("[hist] retire on shutdown failed: %s", e)
+        raise
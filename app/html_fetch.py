@@ -0,0 +1,131 @@
+"""Bounded streaming fetch for publisher pages.
+
+Pages are read chunk by chunk instead of via `r.text`, so a hostile or bloated
+URL never costs more than FETCH_MAX_BYTES of memory. Non-HTML responses are
+rejected from their headers or first bytes. Reading stops a short margin after
+`</body>`, since nothing past that feeds extraction. `</article>` is not a stop
+point: news pages often put teaser cards in `<article>` ahead of the story.
+"""
+import codecs
+import logging
+import os
+import re
+
+import httpx
+
+logger = logging.getLogger("easyaudio")
+
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(5 * 1024 * 1024)))
+# Bytes kept after the closing tag: trailing JSON-LD, bylines in <footer>, etc.
+FETCH_TAIL_MARGIN_BYTES = int(os.getenv("FETCH_TAIL_MARGIN_BYTES", str(64 * 1024)))
+
+HTML_TYPES = {"text/html", "application/xhtml+xml", "text/plain", ""}
+
+_CLOSE_TAG = re.compile(r"</body\s*>", re.I)
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([A-Za-z0-9_\-]+)""", re.I)
+_BINARY_MAGIC = (
+    b"%PDF", b"PK\x03\x04", b"\x89PNG", b"GIF8", b"\xff\xd8\xff", b"ID3",
+    b"\x1f\x8b", b"RIFF", b"OggS", b"fLaC",
+)
+
+
+class FetchRejected(Exception):
+    """The response is not something we will buffer; carries the HTTP status to report."""
+
+    def __init__(self, status: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class FetchedPage:
+    __slots__ = ("status_code", "headers", "url", "text", "truncated")
+
+    def __init__(self, status_code: int, headers: httpx.Headers, url: httpx.URL, text: str = "", truncated: bool = False):
+        self.status_code = status_code
+        self.headers = headers
+        self.url = url
+        self.text = text
+        self.truncated = truncated
+
+
+def _looks_binary(head: bytes) -> bool:
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):  # UTF-16 BOM; NULs are expected
+        return False
+    if head.startswith(_BINARY_MAGIC):
+        return True
+    return b"\x00" in head[:1024]
+
+
+def _charset(r: httpx.Response, head: bytes) -> str:
+    name = r.charset_encoding
+    if not name:
+        m = _META_CHARSET.search(head[:4096])
+        name = m.group(1).decode("ascii") if m else "utf-8"
+    try:
+        codecs.lookup(name)
+    except LookupError:
+        name = "utf-8"
+    return name
+
+
+async def fetch_html(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    headers: dict | None = None,
+    timeout: float = 15,
+    follow_redirects: bool = True,
+    max_bytes: int = FETCH_MAX_BYTES,
+    stop_after_close: bool = True,
+    allowed_types=HTML_TYPES,
+) -> FetchedPage:
+    """
+    GET `url` and decode at most `max_bytes` of HTML.
+
+    Non-200 responses come back with empty text (callers handle 304 themselves).
+    Raises FetchRejected(415) for non-HTML and FetchRejected(413) when the
+    declared Content-Length is over budget; bodies that only turn out to be
+    large are truncated at the budget instead.
+    """
+    async with client.stream(
+        "GET", url, headers=headers, timeout=timeout, follow_redirects=follow_redirects
+    ) as r:
+        if r.status_code != 200:
+            return FetchedPage(r.status_code, r.headers, r.url)
+
+        mime = r.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        if mime not in allowed_types:
+            raise FetchRejected(415, f"Not HTML (content-type: {mime})")
+        declared = r.headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > max_bytes:
+            raise FetchRejected(413, f"Page too large ({int(declared)} bytes)")
+
+        decoder = None
+        parts: list[str] = []
+        total = 0
+        stop_at = None
+        truncated = False
+        async for chunk in r.aiter_bytes():
+            if decoder is None:
+                if _looks_binary(chunk):
+                    raise FetchRejected(415, "Not HTML (binary body)")
+                decoder = codecs.getincrementaldecoder(_charset(r, chunk))(errors="replace")
+            if total + len(chunk) > max_bytes:
+                chunk = chunk[: max_bytes - total]
+                truncated = True
+            total += len(chunk)
+            text = decoder.decode(chunk)
+            if stop_after_close and stop_at is None:
+                # Overlap with the previous piece so a tag split across chunks still matches.
+                window = (parts[-1][-16:] if parts else "") + text
+                if _CLOSE_TAG.search(window):
+                    stop_at = total + FETCH_TAIL_MARGIN_BYTES
+            parts.append(text)
+            if truncated or (stop_at is not None and total >= stop_at):
+                break
+        if decoder is not None:
+            parts.append(decoder.decode(b"", final=True))
+        if truncated:
+            logger.warning("[fetch] truncated at %s bytes url=%s", max_bytes, r.url)
+        return FetchedPage(r.status_code, r.headers, r.url, "".join(parts), truncated)
@@ -0,0 +1,142 @@
+"""Single-pass page metadata (title, subtitle, author, og:image).
+
+Feeds the HTML through lxml's pull parser once and collects <title>, meta
+tags, JSON-LD authors, the first <h2> and a "By ..." byline as they stream
+past. Parsing stops as soon as every field is settled, which for most
+publisher pages is shortly after the first <h2> rather than the end of a
+multi-megabyte document.
+"""
+import json
+import re
+from typing import Optional
+
+from lxml import etree
+
+_WS = re.compile(r"\s+")
+_BYLINE = re.compile(r"^\s*By\s+([A-Za-z][A-Za-z0-9.\- ]+?)\s*$", re.I)
+
+META_CHUNK_SIZE = 64 * 1024
+
+
+def _clean(value: str | None) -> str:
+    return _WS.sub(" ", value or "").strip()
+
+
+def _author_name(value) -> Optional[str]:
+    if isinstance(value, str):
+        return _clean(value) or None
+    if isinstance(value, dict):
+        return _author_name(value.get("name"))
+    if isinstance(value, list):
+        names = [n for n in (_author_name(v) for v in value) if n]
+        return ", ".join(names) or None
+    return None
+
+
+def _ld_author(raw: str) -> Optional[str]:
+    try:
+        data = json.loads(raw)
+    except Exception:
+        return None
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+        name = _author_name(node.get("author"))
+        if name:
+            return name
+        graph = node.get("@graph")
+        if isinstance(graph, list):
+            stack.extend(reversed(graph))
+    return None
+
+
+def _byline(text: str | None) -> Optional[str]:
+    if not text or len(text) > 120:
+        return None
+    m = _BYLINE.match(text)
+    return _clean(m.group(1)) if m else None
+
+
+class _Collector:
+    def __init__(self) -> None:
+        self.title: Optional[str] = None
+        self.h2: Optional[str] = None
+        self.meta: dict[str, str] = {}
+        self.ld_author: Optional[str] = None
+        self.byline: Optional[str] = None
+        self.head_done = False
+
+    def feed(self, el) -> None:
+        tag = el.tag
+        if not isinstance(tag, str):
+            return
+        tag = tag.lower()
+        if tag == "meta":
+            key = (el.get("name") or el.get("property") or "").strip().lower()
+            content = el.get("content")
+            if key and content and key not in self.meta:
+                self.meta[key] = content.strip()
+        elif tag == "title":
+            if self.title is None:
+                self.title = _clean("".join(el.itertext()))
+        elif tag == "script":
+            if self.ld_author is None and "ld+json" in (el.get("type") or "").lower():
+                self.ld_author = _ld_author(el.text or "")
+        elif tag == "h2":
+            if self.h2 is None:
+                self.h2 = _clean("".join(el.itertext()))
+        elif tag == "head":
+            self.head_done = True
+        if self.byline is None and tag not in ("script", "style", "title"):
+            self.byline = _byline(el.text)
+            if self.byline is None:
+                for child in el:
+                    self.byline = _byline(child.tail)
+                    if self.byline:
+                        break
+
+    def author(self) -> Optional[str]:
+        return _clean(self.meta.get("author")) or self.ld_author or self.byline or None
+
+    def settled(self) -> bool:
+        # <head> holds title/meta/JSON-LD; the body only matters for <h2> and a byline.
+        if not self.head_done or self.h2 is None:
+            return False
+        return bool(self.meta.get("author") or self.ld_author or self.byline)
+
+    def result(self) -> dict:
+        description = self.meta.get("description")
+        subtitle = self.h2 or (_clean(description) if description else None)
+        image = self.meta.get("og:image")
+        return {
+            "title": self.title or "",
+            "subtitle": subtitle or None,
+            "author": self.author(),
+            "image": image.strip() if image else None,
+        }
+
+
+def extract_page_meta(html: str | bytes, chunk_size: int = META_CHUNK_SIZE) -> dict:
+    """Return {"title", "subtitle", "author", "image"} from one streaming parse."""
+    collector = _Collector()
+    if not html:
+        return collector.result()
+    parser = etree.HTMLPullParser(events=("end",), recover=True)
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+        for _event, el in parser.read_events():
+            collector.feed(el)
+        if collector.settled():
+            return collector.result()
+    try:
+        parser.close()
+    except etree.LxmlError:
+        pass
+    for _event, el in parser.read_events():
+        collector.feed(el)
+    return collector.result()
@@ -0,0 +1,148 @@
+"""Word-level multi-pattern matching.
+
+A Lexicon compiles its phrases into a trie keyed by word tokens. Matching
+tokenizes the text once and, at each token, walks the trie for the longest
+phrase starting there; the walk is bounded by the longest phrase in the
+lexicon, so a pass is linear in the text no matter how many entries there
+are. Matches always cover whole words ("war" never matches inside "award").
+
+A phrase must be reproduced exactly, apart from runs of whitespace:
+punctuation between its words ("Dr. Who") and around them ("C++", ".NET")
+is matched literally, and a phrase made only of punctuation is rejected.
+Phrases written in lowercase match in any case. A phrase containing an
+uppercase letter matches only as written, so an entry for "US" leaves "us" alone.
+
+Used for tone detection (which words occur) and for per-tenant pronunciation
+rewrites (replace each match with its spoken form).
+"""
+import json
+import re
+from typing import Iterable, Iterator, Mapping, Optional
+
+# Words, including internal apostrophes, dots, ampersands and hyphens: "AT&T", "Node.js", "e-mail".
+_TOKEN = re.compile(r"\w+(?:[’'&.\-]\w+)*")
+_WS = re.compile(r"\s+")
+
+# Trie node key holding [(prefix, suffix, value)] for phrases ending there.
+_END = object()
+
+
+def _norm_gap(gap: str) -> str:
+    return _WS.sub(" ", gap)
+
+
+class Lexicon:
+    def __init__(self, entries: Mapping[str, object] | Iterable[str]):
+        if not isinstance(entries, Mapping):
+            entries = {e: e for e in entries}
+        # Lowercase phrases match any case; phrases with capitals match exactly.
+        self._ci: dict = {}
+        self._cs: dict = {}
+        self._depth = 0
+        self.size = 0
+        self.rejected: list[str] = []
+        for phrase, value in entries.items():
+            phrase = (phrase or "").strip()
+            found = list(_TOKEN.finditer(phrase))
+            if not found:
+                if phrase:
+                    self.rejected.append(phrase)
+                continue
+            exact = phrase != phrase.lower()
+            node = self._cs if exact else self._ci
+            for k, m in enumerate(found):
+                tok = m.group() if exact else m.group().lower()
+                # Every token after the first is keyed with the literal gap before it.
+                key = tok if k == 0 else (_norm_gap(phrase[found[k - 1].end():m.start()]), tok)
+                node = node.setdefault(key, {})
+            prefix = phrase[:found[0].start()]
+            suffix = phrase[found[-1].end():]
+            ends = node.setdefault(_END, [])
+            for n, (p, s, _) in enumerate(ends):
+                if p == prefix and s == suffix:
+                    ends[n] = (prefix, suffix, value)
+                    break
+            else:
+                ends.append((prefix, suffix, value))
+                # Longest affixes first, so "C++" wins over "C" where both fit.
+                ends.sort(key=lambda e: -(len(e[0]) + len(e[1])))
+                self.size += 1
+            self._depth = max(self._depth, len(found))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _walk(self, root: dict, text: str, tokens: list, i: int, floor: int, lower: bool):
+        """Longest (start, end, value) for a phrase whose first token is tokens[i], or None."""
+        n = len(tokens)
+        node = root.get(tokens[i][3 if lower else 2])
+        best = None
+        j = i
+        while node is not None:
+            for prefix, suffix, value in node.get(_END, ()):
+                start = tokens[i][0] - len(prefix)
+                end = tokens[j][1] + len(suffix)
+                if start >= floor and text.startswith(prefix, start) and text.startswith(suffix, tokens[j][1]):
+                    best = (start, end, value, j)
+                    break
+            j += 1
+            if j >= n or j - i >= self._depth:
+                break
+            gap = _norm_gap(text[tokens[j - 1][1]:tokens[j][0]])
+            node = node.get((gap, tokens[j][3 if lower else 2]))
+        return best
+
+    def finditer(self, text: str) -> Iterator[tuple[int, int, object]]:
+        """Yield (start, end, value) for non-overlapping, leftmost-longest matches."""
+        if not self.size or not text:
+            return
+        tokens = [(m.start(), m.end(), m.group(), m.group().lower()) for m in _TOKEN.finditer(text)]
+        n = len(tokens)
+        i = 0
+        floor = 0
+        while i < n:
+            best: Optional[tuple] = None
+            for root, lower in ((self._cs, False), (self._ci, True)):
+                if root:
+                    found = self._walk(root, text, tokens, i, floor, lower)
+                    if found is not None and (best is None or found[1] > best[1]):
+                        best = found
+            if best is None:
+                i += 1
+                continue
+            start, end, value, last = best
+            yield start, end, value
+            floor = end
+            i = last + 1
+            while i < n and tokens[i][0] < end:  # a suffix like "++" may run into the next token
+                i += 1
+
+    def matches(self, text: str) -> set:
+        """Distinct values matched anywhere in `text`."""
+        return {value for _, _, value in self.finditer(text)}
+
+    def replace(self, text: str) -> str:
+        """Replace every match with its value (the spoken form)."""
+        out: list[str] = []
+        pos = 0
+        for start, end, value in self.finditer(text):
+            out.append(text[pos:start])
+            out.append(str(value))
+            pos = end
+        if not out:
+            return text
+        out.append(text[pos:])
+        return "".join(out)
+
+
+def parse_pronunciations(value: str | None) -> dict[str, str]:
+    """Decode the tenant `pronunciations` column: a JSON object of written -> spoken."""
+    if not value:
+        return {}
+    try:
+        data = json.loads(value)
+    except Exception:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {str(k).strip(): str(v).strip() for k, v in data.items() if str(k).strip() and str(v).strip()}
@@ -0,0 +1,223 @@
+"""Durable outbox for transactional email.
+
+Request handlers never talk to the email provider. enqueue() writes one
+email_outbox row and returns; a background task (run_worker) picks up due
+rows, POSTs them to EMAIL_OUTBOX_URL (Resend by default) and records the
+outcome. A failed send is retried with exponential backoff up to
+EMAIL_OUTBOX_MAX_ATTEMPTS, then marked failed. A provider outage therefore
+costs the audio path one local INSERT, not a 10-second HTTP timeout.
+
+Rows are claimed by pushing next_attempt_at forward with a compare-and-set,
+so several workers can drain the same table without sending twice; a row
+whose sender died mid-flight becomes due again after EMAIL_OUTBOX_LEASE_S.
+
+Point EMAIL_OUTBOX_URL at any HTTP endpoint that accepts the Resend JSON body
+(see bench/email_sink.py) to exercise the whole path locally.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+
+import httpx
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.tenant_store import OutboxEmail, mark_quota_email_sent, tenant_session
+
+logger = logging.getLogger("easyaudio")
+
+RESEND_URL = "https://api.resend.com/emails"
+EMAIL_OUTBOX_URL = os.getenv("EMAIL_OUTBOX_URL", RESEND_URL).strip()
+EMAIL_OUTBOX_POLL_S = float(os.getenv("EMAIL_OUTBOX_POLL_S", "2"))
+EMAIL_OUTBOX_BATCH = int(os.getenv("EMAIL_OUTBOX_BATCH", "20"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "8"))
+EMAIL_OUTBOX_BACKOFF_S = float(os.getenv("EMAIL_OUTBOX_BACKOFF_S", "30"))
+EMAIL_OUTBOX_BACKOFF_MAX_S = float(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX_S", "3600"))
+EMAIL_OUTBOX_LEASE_S = float(os.getenv("EMAIL_OUTBOX_LEASE_S", "60"))
+EMAIL_OUTBOX_TIMEOUT_S = float(os.getenv("EMAIL_OUTBOX_TIMEOUT_S", "10"))
+
+DEDUPE_WINDOW = timedelta(hours=24)
+
+# tenant/kind -> monotonic time of the last enqueue attempt, so a tenant hammering
+# a 402 costs one DB write per window rather than one per request.
+_recent: dict[str, float] = {}
+_recent_lock = Lock()
+_stats = {"enqueued": 0, "deduped": 0, "sent": 0, "retried": 0, "failed": 0}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _backoff(attempts: int) -> float:
+    return min(EMAIL_OUTBOX_BACKOFF_S * (2 ** max(attempts - 1, 0)), EMAIL_OUTBOX_BACKOFF_MAX_S)
+
+
+def enabled(api_key: str, sender: str) -> bool:
+    """Email is on with a sender plus either a Resend key or a non-Resend sink URL."""
+    return bool(sender) and (bool(api_key) or EMAIL_OUTBOX_URL != RESEND_URL)
+
+
+def recently_queued(kind: str, tenant_key: str | None) -> bool:
+    """True if this process queued (or deduped) a `kind` email for the tenant within the window."""
+    with _recent_lock:
+        last = _recent.get(f"{kind}:{tenant_key}")
+    return last is not None and time.monotonic() - last < DEDUPE_WINDOW.total_seconds()
+
+
+def enqueue(kind: str, payload: dict, tenant_key: str | None = None, *, dedupe: bool = False) -> bool:
+    """
+    Queue one email. With `dedupe`, at most one `kind` email per tenant is queued
+    per 24h window. Returns False when the message was deduplicated.
+    """
+    now = _utcnow()
+    recent_key = f"{kind}:{tenant_key}"
+    if dedupe and tenant_key:
+        if recently_queued(kind, tenant_key):
+            _stats["deduped"] += 1
+            return False
+        with _recent_lock:
+            _recent[recent_key] = time.monotonic()
+    dedupe_key = None
+    if dedupe and tenant_key:
+        # The day bucket backs up the rolling check below when two workers enqueue at once.
+        dedupe_key = f"{kind}:{tenant_key}:{int(now.timestamp() // DEDUPE_WINDOW.total_seconds())}"
+    try:
+        with tenant_session() as session:
+            if dedupe and tenant_key:
+                recent = session.execute(
+                    select(OutboxEmail.id)
+                    .where(
+                        OutboxEmail.tenant_key == tenant_key,
+                        OutboxEmail.kind == kind,
+                        OutboxEmail.created_at >= now - DEDUPE_WINDOW,
+                        OutboxEmail.status != "failed",
+                    )
+                    .limit(1)
+                ).first()
+                if recent is not None:
+                    _stats["deduped"] += 1
+                    return False
+            session.add(
+                OutboxEmail(
+                    kind=kind,
+                    tenant_key=tenant_key,
+                    dedupe_key=dedupe_key,
+                    payload=json.dumps(payload, ensure_ascii=False),
+                    status="pending",
+                    attempts=0,
+                    next_attempt_at=now,
+                    created_at=now,
+                )
+            )
+    except IntegrityError:
+        _stats["deduped"] += 1
+        return False
+    except Exception:
+        with _recent_lock:
+            _recent.pop(recent_key, None)
+        raise
+    _stats["enqueued"] += 1
+    return True
+
+
+def _claim_due(limit: int) -> list[OutboxEmail]:
+    now = _utcnow()
+    lease_until = now + timedelta(seconds=EMAIL_OUTBOX_LEASE_S)
+    claimed = []
+    with tenant_session() as session:
+        rows = session.execute(
+            select(OutboxEmail)
+            .where(OutboxEmail.status == "pending", OutboxEmail.next_attempt_at <= now)
+            .order_by(OutboxEmail.next_attempt_at)
+            .limit(limit)
+        ).scalars().all()
+        for row in rows:
+            res = session.execute(
+                update(OutboxEmail)
+                .where(OutboxEmail.id == row.id, OutboxEmail.next_attempt_at == row.next_attempt_at)
+                .values(next_attempt_at=lease_until, attempts=OutboxEmail.attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+            if res.rowcount == 1:
+                row.attempts = (row.attempts or 0) + 1
+                claimed.append(row)
+    return claimed
+
+
+def _record(row: OutboxEmail, error: str | None) -> None:
+    now = _utcnow()
+    with tenant_session() as session:
+        if error is None:
+            values = {"status": "sent", "sent_at": now, "last_error": None}
+            if row.kind == "quota" and row.tenant_key:
+                mark_quota_email_sent(session, row.tenant_key, now)
+            _stats["sent"] += 1
+        elif row.attempts >= EMAIL_OUTBOX_MAX_ATTEMPTS:
+            values = {"status": "failed", "last_error": error[:500]}
+            _stats["failed"] += 1
+            logger.warning("[outbox] giving up id=%s kind=%s attempts=%s err=%s", row.id, row.kind, row.attempts, error)
+        else:
+            values = {
+                "last_error": error[:500],
+                "next_attempt_at": now + timedelta(seconds=_backoff(row.attempts)),
+            }
+            _stats["retried"] += 1
+        session.execute(update(OutboxEmail).where(OutboxEmail.id == row.id).values(**values))
+
+
+async def _send(client: httpx.AsyncClient, row: OutboxEmail, api_key: str) -> str | None:
+    try:
+        resp = await client.post(
+            EMAIL_OUTBOX_URL,
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else {},
+            content=row.payload.encode("utf-8"),
+            timeout=EMAIL_OUTBOX_TIMEOUT_S,
+        )
+        if resp.status_code >= 400:
+            return f"HTTP {resp.status_code}: {resp.text[:200]}"
+        return None
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+async def drain(client: httpx.AsyncClient, api_key: str) -> int:
+    """Send every due message once; returns how many were attempted."""
+    total = 0
+    while True:
+        rows = await asyncio.to_thread(_claim_due, EMAIL_OUTBOX_BATCH)
+        if not rows:
+            return total
+        results = await asyncio.gather(*(_send(client, row, api_key) for row in rows))
+        for row, error in zip(rows, results):
+            await asyncio.to_thread(_record, row, error)
+        total += len(rows)
+        if len(rows) < EMAIL_OUTBOX_BATCH:
+            return total
+
+
+async def run_worker(api_key: str, interval: float = EMAIL_OUTBOX_POLL_S) -> None:
+    """Background task: drain the outbox on an interval until cancelled."""
+    async with httpx.AsyncClient(headers={"content-type": "application/json"}) as client:
+        while True:
+            try:
+                await drain(client, api_key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("[outbox] drain failed: %s", e)
+            await asyncio.sleep(interval)
+
+
+def stats() -> dict:
+    out = {"url": EMAIL_OUTBOX_URL, **_stats}
+    try:
+        with tenant_session() as session:
+            out["pending"] = session.query(OutboxEmail).filter(OutboxEmail.status == "pending").count()
+    except Exception:
+        out["pending"] = None
+    return out
@@ -0,0 +1,194 @@
+"""Prometheus / OpenMetrics text exposition.
+
+Counters and latency histograms come from app.histogram, which already merges
+every gunicorn worker on the host (live snapshots plus retired totals). A
+scrape therefore costs one read of a few small JSON files plus string
+formatting, whichever worker answers it, and can run every 15s without
+touching request paths.
+
+Log-bucketed histograms are exported on the fixed PROM_BUCKETS_MS grid. Each
+`le` bucket counts the log buckets that lie entirely below the bound, so
+cumulative counts are exact for the grid and at most one log bucket (~4%)
+conservative at the edges. Latencies are exported in seconds, per Prometheus
+convention.
+
+RequestMetrics is a plain ASGI middleware that counts requests by route
+template, method and status, plus response body bytes. Unmatched paths share
+one label so cardinality stays bounded.
+"""
+import logging
+import os
+import time
+from typing import Callable, Iterable
+
+from app import histogram
+
+logger = logging.getLogger("easyaudio")
+
+PROM_PREFIX = os.getenv("PROM_PREFIX", "easyaudio")
+PROM_BUCKETS_MS = tuple(
+    float(x)
+    for x in os.getenv(
+        "PROM_BUCKETS_MS", "5,10,25,50,100,250,500,1000,2500,5000,10000,30000,60000,120000"
+    ).split(",")
+    if x.strip()
+)
+
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+TEXT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# name -> help. Counter names are given without the _total suffix.
+COUNTERS = {
+    "http_requests": "HTTP requests by route template, method and status.",
+    "http_response_bytes": "Response body bytes sent, by route template.",
+    "tts_cache_requests": "TTS audio cache lookups by result (hit/miss) and plan tier.",
+    "provider_requests": "Calls to the TTS provider by mode and HTTP status (error = no response).",
+    "provider_retries": "Provider calls repeated after a failure, by reason.",
+    "voice_fallbacks": "Renders retried with the default voice after the tenant voice failed.",
+    "quota_rejections": "Requests refused for monthly quota, by plan tier.",
+    "ratelimit_rejections": "Requests refused by the rate limiter, by scope (ip/tenant).",
+}
+HISTOGRAMS = {
+    "http_request_ms": ("http_request_duration_seconds", "Request handling time to the last body byte, by route."),
+    "tts_first_byte_ms": ("tts_first_byte_seconds", "Time from provider call to first audio byte."),
+    "tts_render_ms": ("tts_render_seconds", "Full render time of an uncached TTS request."),
+    "extraction_ms": ("extraction_seconds", "Article extraction time, by profile."),
+    "cache_hit_serve_ms": ("cache_hit_serve_seconds", "Time to answer a TTS cache hit."),
+}
+
+# (name, help, fn) where fn returns [(labels, value)]; evaluated per scrape.
+Gauge = tuple[str, str, Callable[[], Iterable[tuple[dict, float]]]]
+_gauges: list[Gauge] = []
+
+
+def register_gauge(name: str, help_text: str, fn: Callable[[], Iterable[tuple[dict, float]]]) -> None:
+    """Add a gauge computed at scrape time; fn must be cheap or cache its own result."""
+    _gauges.append((name, help_text, fn))
+
+
+def _upper_index(bound_ms: float) -> int:
+    """Largest log bucket whose upper edge is <= bound_ms, or -1."""
+    idx = -1
+    for i in range(histogram.HIST_BUCKETS):
+        if histogram.bucket_upper(i) <= bound_ms * (1 + 1e-9):
+            idx = i
+        else:
+            break
+    return idx
+
+
+_BOUND_INDEX = [(b, _upper_index(b)) for b in PROM_BUCKETS_MS]
+_LE_INF = 'le="+Inf"'
+
+
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Iterable[tuple[str, str]], extra: str = "") -> str:
+    parts = [f'{k}="{_esc(str(v))}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    if v == int(v) and abs(v) < 1e15:
+        return str(int(v))
+    return repr(float(v))
+
+
+def _le(bound_ms: float) -> str:
+    return _num(bound_ms / 1000)
+
+
+def render(openmetrics: bool = False, local_only: bool = False) -> str:
+    hists, counters = histogram.collect_all(local_only)
+    out: list[str] = []
+
+    by_counter: dict[str, list] = {}
+    for (name, labels), v in counters.items():
+        by_counter.setdefault(name, []).append((labels, v))
+    for name in sorted(set(COUNTERS) | set(by_counter)):
+        family = f"{PROM_PREFIX}_{name}"
+        meta = family if openmetrics else family + "_total"
+        out.append(f"# HELP {meta} {COUNTERS.get(name, name)}")
+        out.append(f"# TYPE {meta} counter")
+        for labels, v in sorted(by_counter.get(name, [])):
+            out.append(f"{family}_total{_labels(labels)} {_num(v)}")
+
+    by_hist: dict[str, list] = {}
+    for (name, labels), h in hists.items():
+        by_hist.setdefault(name, []).append((labels, h))
+    for name in sorted(set(HISTOGRAMS) | set(by_hist)):
+        metric, help_text = HISTOGRAMS.get(name, (name.removesuffix("_ms") + "_seconds", name))
+        family = f"{PROM_PREFIX}_{metric}"
+        out.append(f"# HELP {family} {help_text}")
+        out.append(f"# TYPE {family} histogram")
+        for labels, h in sorted(by_hist.get(name, []), key=lambda x: x[0]):
+            counts = h.counts
+            cum = 0
+            pos = 0
+            for bound, idx in _BOUND_INDEX:
+                while pos <= idx:
+                    cum += counts[pos]
+                    pos += 1
+                le = 'le="%s"' % _le(bound)
+                out.append(f"{family}_bucket{_labels(labels, le)} {cum}")
+            out.append(f"{family}_bucket{_labels(labels, _LE_INF)} {h.count}")
+            out.append(f"{family}_sum{_labels(labels)} {_num(h.sum / 1000)}")
+            out.append(f"{family}_count{_labels(labels)} {h.count}")
+
+    for name, help_text, fn in _gauges:
+        family = f"{PROM_PREFIX}_{name}"
+        try:
+            samples = list(fn())
+        except Exception as e:
+            logger.warning("[prom] gauge %s failed: %s", name, e)
+            continue
+        out.append(f"# HELP {family} {help_text}")
+        out.append(f"# TYPE {family} gauge")
+        for labels, v in samples:
+            if v is not None:
+                out.append(f"{family}{_labels(sorted(labels.items()))} {_num(v)}")
+
+    if openmetrics:
+        out.append("# EOF")
+    return "\n".join(out) + "\n"
+
+
+def wants_openmetrics(accept: str | None) -> bool:
+    return "application/openmetrics-text" in (accept or "")
+
+
+class RequestMetrics:
+    """ASGI middleware: request count, duration and body bytes per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+        status = 500
+        sent = 0
+
+        async def counting_send(message):
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body") or b"")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, counting_send)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            histogram.inc("http_requests", route=template, method=scope.get("method", ""), status=status)
+            if sent:
+                histogram.inc("http_response_bytes", sent, route=template)
+            histogram.observe("http_request_ms", (time.perf_counter() - t0) * 1000, route=template)
@@ -0,0 +1,174 @@
+"""Request rate limiting (GCRA).
+
+Each key keeps one float, its theoretical arrival time (TAT): the moment its
+bucket would be empty again. A request costs window/limit seconds; it is
+allowed when pushing the TAT forward by that cost leaves it no more than
+`window` ahead of now. That admits `limit` back-to-back requests and then a
+steady limit/window rate, like the old sliding window of timestamps, but in
+O(1) time and memory per key.
+
+A key whose TAT is in the past is indistinguishable from a key never seen, so
+idle keys are simply dropped: the in-memory table evicts them as it goes and
+never holds more than RATE_LIMIT_MAX_KEYS.
+
+With RATE_LIMIT_BACKEND=sqlite the TATs live in a small SQLite file
+(RATE_LIMIT_DB) shared by every worker on the host, so `gunicorn -w N` no
+longer multiplies the limit by N. Each check is a single upsert. If the file
+cannot be used the limiter falls back to the in-process table.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger("easyaudio")
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").strip().lower()
+RATE_LIMIT_DB = Path(
+    os.getenv("RATE_LIMIT_DB", str(Path(os.getenv("CACHE_ROOT", "/cache")) / "ratelimit.db"))
+)
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "200000"))
+RATE_LIMIT_SWEEP_S = float(os.getenv("RATE_LIMIT_SWEEP_S", "30"))
+
+_tats: "OrderedDict[str, float]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {"allowed": 0, "limited": 0, "evicted_idle": 0, "evicted_full": 0, "shared_errors": 0}
+
+
+def _check(tat: float | None, now: float, cost: float, window_s: float) -> tuple[bool, float, float]:
+    """GCRA step: (allowed, new_tat, retry_after_s)."""
+    new_tat = max(tat or now, now) + cost
+    over = new_tat - now - window_s
+    if over > 1e-9:
+        return False, tat or now, over
+    return True, new_tat, 0.0
+
+
+def _hit_memory(key: str, cost: float, window_s: float, now: float) -> tuple[bool, float]:
+    with _lock:
+        ok, new_tat, retry = _check(_tats.get(key), now, cost, window_s)
+        if ok:
+            _tats[key] = new_tat
+            _tats.move_to_end(key)
+            # The front holds the least recently admitted keys; anything idle there is free to drop.
+            for oldest_key, oldest_tat in _tats.items():
+                if oldest_tat > now:
+                    break
+                del _tats[oldest_key]
+                _stats["evicted_idle"] += 1
+                break
+            while len(_tats) > RATE_LIMIT_MAX_KEYS:
+                _tats.popitem(last=False)
+                _stats["evicted_full"] += 1
+    return ok, retry
+
+
+class _Shared:
+    """TATs in a SQLite file; one connection per thread."""
+
+    # Insert a fresh key, or advance an existing one only if the request fits.
+    # No row comes back when the WHERE rejects the update, i.e. the request is limited.
+    UPSERT = (
+        "INSERT INTO rl (key, tat) VALUES (:key, :now + :cost) "
+        "ON CONFLICT(key) DO UPDATE SET tat = max(tat, :now) + :cost "
+        "WHERE max(tat, :now) + :cost - :now <= :window + 1e-9 "
+        "RETURNING tat"
+    )
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.local = threading.local()
+        self.swept_at = 0.0
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=1.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Limiter state is disposable; losing the last few writes on power loss is fine.
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("CREATE TABLE IF NOT EXISTS rl (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID")
+            self.local.conn = conn
+        return conn
+
+    def hit(self, key: str, cost: float, window_s: float, now: float) -> tuple[bool, float]:
+        conn = self._connect()
+        row = conn.execute(self.UPSERT, {"key": key, "now": now, "cost": cost, "window": window_s}).fetchone()
+        if row is not None:
+            if now - self.swept_at >= RATE_LIMIT_SWEEP_S:
+                self.swept_at = now
+                conn.execute("DELETE FROM rl WHERE tat <= ?", (now,))
+            return True, 0.0
+        tat = conn.execute("SELECT tat FROM rl WHERE key = ?", (key,)).fetchone()
+        retry = _check(tat[0] if tat else None, now, cost, window_s)[2]
+        return False, max(retry, cost)
+
+    def size(self) -> int:
+        return self._connect().execute("SELECT count(*) FROM rl").fetchone()[0]
+
+
+def _open_shared() -> "_Shared | None":
+    if RATE_LIMIT_BACKEND != "sqlite":
+        return None
+    if sqlite3.sqlite_version_info < (3, 35, 0):
+        logger.warning("[ratelimit] sqlite %s lacks RETURNING; using per-process limits", sqlite3.sqlite_version)
+        return None
+    try:
+        return _Shared(RATE_LIMIT_DB)
+    except Exception as e:
+        logger.warning("[ratelimit] shared store unavailable path=%s err=%s; using per-process limits", RATE_LIMIT_DB, e)
+        return None
+
+
+_shared = _open_shared()
+
+
+def blocking() -> bool:
+    """True when hit() does file I/O (the shared SQLite store); async callers should run it in a thread."""
+    return _shared is not None
+
+
+def hit(bucket: str, key: str, limit: int, window_s: float, now: float | None = None) -> tuple[bool, float]:
+    """
+    Count one request for `key` in `bucket` against `limit` per `window_s`.
+    Returns (allowed, retry_after_s); a limited request consumes nothing.
+    """
+    if limit <= 0:
+        return False, float(window_s)
+    now = time.time() if now is None else now
+    cost = window_s / limit
+    full_key = f"{bucket}:{key}"
+    if _shared is not None:
+        try:
+            ok, retry = _shared.hit(full_key, cost, window_s, now)
+        except sqlite3.Error as e:
+            _stats["shared_errors"] += 1
+            if _stats["shared_errors"] == 1 or _stats["shared_errors"] % 1000 == 0:
+                logger.warning("[ratelimit] shared store error (falling back to local): %s", e)
+            ok, retry = _hit_memory(full_key, cost, window_s, now)
+    else:
+        ok, retry = _hit_memory(full_key, cost, window_s, now)
+    _stats["allowed" if ok else "limited"] += 1
+    return ok, retry
+
+
+def stats() -> dict:
+    with _lock:
+        local_keys = len(_tats)
+    out = {
+        "backend": "sqlite" if _shared is not None else "memory",
+        "keys": local_keys,
+        "max_keys": RATE_LIMIT_MAX_KEYS,
+        **_stats,
+    }
+    if _shared is not None:
+        try:
+            out["shared_keys"] = _shared.size()
+        except sqlite3.Error:
+            out["shared_keys"] = None
+    return out
@@ -0,0 +1,166 @@
+"""SSRF guard for user-supplied URLs, with an async DNS cache and IP pinning.
+
+Hostnames are resolved with the loop's getaddrinfo (off the event loop) and
+the vetted addresses are cached: public results for SSRF_DNS_TTL_S, blocked or
+unresolvable hosts for SSRF_DNS_NEGATIVE_TTL_S. The fetch client built by
+`pinned_client()` connects through the same cache, so every socket it opens
+(including redirect hops) goes to an address that passed the check rather than
+whatever the name resolves to a moment later.
+"""
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import ssl
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlparse
+
+import certifi
+import httpcore
+import httpx
+
+logger = logging.getLogger("easyaudio")
+
+# getaddrinfo does not expose record TTLs, so these bound how long a vetted answer is trusted.
+SSRF_DNS_TTL_S = float(os.getenv("SSRF_DNS_TTL_S", "300"))
+SSRF_DNS_NEGATIVE_TTL_S = float(os.getenv("SSRF_DNS_NEGATIVE_TTL_S", "30"))
+SSRF_DNS_CACHE_SIZE = int(os.getenv("SSRF_DNS_CACHE_SIZE", "4096"))
+
+_BLOCKED_SUFFIXES = (".local", ".lan", ".internal", ".localhost")
+
+# host -> (expires_at, vetted ips or None when blocked)
+_dns: "OrderedDict[str, tuple[float, Optional[tuple[str, ...]]]]" = OrderedDict()
+_inflight: dict[str, asyncio.Future] = {}
+_stats = {"hits": 0, "misses": 0, "blocked": 0}
+
+
+def _is_public_ip(ip: str) -> bool:
+    try:
+        ip_obj = ipaddress.ip_address(ip.split("%", 1)[0])
+    except ValueError:
+        return False
+    if isinstance(ip_obj, ipaddress.IPv6Address) and ip_obj.ipv4_mapped:
+        ip_obj = ip_obj.ipv4_mapped
+    return not (
+        ip_obj.is_private or ip_obj.is_loopback or ip_obj.is_link_local or
+        ip_obj.is_multicast or ip_obj.is_reserved or ip_obj.is_unspecified
+    )
+
+
+def _store(host: str, ips: Optional[tuple[str, ...]]) -> Optional[tuple[str, ...]]:
+    ttl = SSRF_DNS_TTL_S if ips else SSRF_DNS_NEGATIVE_TTL_S
+    _dns[host] = (time.monotonic() + ttl, ips)
+    _dns.move_to_end(host)
+    while len(_dns) > SSRF_DNS_CACHE_SIZE:
+        _dns.popitem(last=False)
+    return ips
+
+
+async def _lookup(host: str) -> Optional[tuple[str, ...]]:
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError, OSError):
+        return None
+    ips = tuple(dict.fromkeys(sockaddr[0] for *_, sockaddr in infos))
+    # One private answer taints the host; a resolver may rotate between them.
+    if not ips or not all(_is_public_ip(ip) for ip in ips):
+        return None
+    return ips
+
+
+async def resolve_public(host: str) -> Optional[tuple[str, ...]]:
+    """Return the vetted public addresses for `host`, or None if it must not be fetched."""
+    host = (host or "").strip().lower().rstrip(".")
+    if not host or host == "localhost" or host.endswith(_BLOCKED_SUFFIXES):
+        return None
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        literal = host.strip("[]")
+        return (literal,) if _is_public_ip(literal) else None
+    except ValueError:
+        pass
+
+    hit = _dns.get(host)
+    if hit is not None and hit[0] > time.monotonic():
+        _dns.move_to_end(host)
+        _stats["hits"] += 1
+        return hit[1]
+
+    # Concurrent requests for the same cold host share one lookup.
+    fut = _inflight.get(host)
+    if fut is None:
+        _stats["misses"] += 1
+        fut = asyncio.ensure_future(_lookup(host))
+        _inflight[host] = fut
+        try:
+            ips = await fut
+        finally:
+            _inflight.pop(host, None)
+        if ips is None:
+            _stats["blocked"] += 1
+        return _store(host, ips)
+    return await asyncio.shield(fut)
+
+
+async def is_public_http_url(u: str) -> bool:
+    try:
+        p = urlparse(u)
+        if p.scheme not in ("http", "https"):
+            return False
+        return bool(await resolve_public(p.hostname or ""))
+    except Exception:
+        return False
+
+
+def dns_stats() -> dict:
+    return {"entries": len(_dns), "capacity": SSRF_DNS_CACHE_SIZE, **_stats}
+
+
+class _PinnedBackend(httpcore.AsyncNetworkBackend):
+    """Connects to the vetted address for a host instead of re-resolving it."""
+
+    def __init__(self) -> None:
+        self._inner = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        ips = await resolve_public(host)
+        if not ips:
+            raise httpcore.ConnectError(f"blocked non-public host {host!r}")
+        last_err: Exception | None = None
+        for ip in ips:
+            try:
+                return await self._inner.connect_tcp(
+                    ip, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_err = e
+        raise last_err
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        raise httpcore.ConnectError("unix sockets are not allowed")
+
+    async def sleep(self, seconds: float) -> None:
+        await self._inner.sleep(seconds)
+
+
+class _PinnedTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, limits: httpx.Limits = httpx.Limits()) -> None:
+        super().__init__(limits=limits)
+        # httpx has no public hook for the network backend; swap the pool it built.
+        # TLS still verifies against the hostname since the URL is left untouched.
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=ssl.create_default_context(cafile=certifi.where()),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=_PinnedBackend(),
+        )
+
+
+def pinned_client(**kwargs) -> httpx.AsyncClient:
+    """AsyncClient for user-supplied URLs; it can only reach vetted public addresses."""
+    return httpx.AsyncClient(transport=_PinnedTransport(), trust_env=False, **kwargs)
@@ -0,0 +1,219 @@
+"""Stripe webhook inbox.
+
+The webhook handler only verifies the signature and calls record(), which
+inserts the raw event keyed by its Stripe id; a retry of an event we already
+hold is a no-op. It then answers 200 straight away. run_processor() applies
+stored events in the background through a handler coroutine, with retries
+and backoff, and marks each one done or failed.
+
+Events are applied in Stripe `created` order per customer: a customer whose
+earliest unfinished event is not yet due (backing off, or claimed by another
+worker) is skipped for the whole pass, so a later event never overtakes an
+earlier one. Claims use the same compare-and-set lease as app.outbox.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.tenant_store import StripeEvent, as_utc, tenant_session
+
+logger = logging.getLogger("easyaudio")
+
+STRIPE_EVENTS_POLL_S = float(os.getenv("STRIPE_EVENTS_POLL_S", "1"))
+STRIPE_EVENTS_BATCH = int(os.getenv("STRIPE_EVENTS_BATCH", "50"))
+STRIPE_EVENTS_MAX_ATTEMPTS = int(os.getenv("STRIPE_EVENTS_MAX_ATTEMPTS", "10"))
+STRIPE_EVENTS_BACKOFF_S = float(os.getenv("STRIPE_EVENTS_BACKOFF_S", "10"))
+STRIPE_EVENTS_BACKOFF_MAX_S = float(os.getenv("STRIPE_EVENTS_BACKOFF_MAX_S", "1800"))
+STRIPE_EVENTS_LEASE_S = float(os.getenv("STRIPE_EVENTS_LEASE_S", "120"))
+# Stripe retries for up to three days; keep finished events longer than that for dedupe.
+STRIPE_EVENTS_RETENTION_DAYS = float(os.getenv("STRIPE_EVENTS_RETENTION_DAYS", "30"))
+
+_stats = {"received": 0, "duplicates": 0, "processed": 0, "retried": 0, "failed": 0}
+_wake: asyncio.Event | None = None
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _customer_of(event: dict) -> str:
+    obj = (event.get("data") or {}).get("object") or {}
+    customer = obj.get("customer")
+    if isinstance(customer, dict):
+        customer = customer.get("id")
+    return customer or obj.get("customer_email") or obj.get("id") or event.get("id") or ""
+
+
+def record(payload: bytes | str, options: dict | None = None, *, replay: bool = False) -> bool:
+    """
+    Store a verified event; returns False if it was already stored. With
+    `replay`, an already-stored event is queued again with the new options.
+    """
+    raw = payload.decode("utf-8") if isinstance(payload, bytes) else payload
+    event = json.loads(raw)
+    now = _utcnow()
+    row = StripeEvent(
+        id=event["id"],
+        type=event.get("type") or "",
+        customer=_customer_of(event),
+        created=int(event.get("created") or 0),
+        payload=raw,
+        options=json.dumps(options or {}),
+        status="pending",
+        attempts=0,
+        next_attempt_at=now,
+        received_at=now,
+    )
+    try:
+        with tenant_session() as session:
+            session.add(row)
+    except IntegrityError:
+        _stats["duplicates"] += 1
+        if not replay:
+            return False
+        with tenant_session() as session:
+            session.execute(
+                update(StripeEvent)
+                .where(StripeEvent.id == event["id"])
+                .values(status="pending", attempts=0, next_attempt_at=now, options=json.dumps(options or {}))
+            )
+        return True
+    _stats["received"] += 1
+    return True
+
+
+def notify() -> None:
+    """Wake the processor early; call from the event loop thread after record()."""
+    if _wake is not None:
+        try:
+            _wake.set()
+        except RuntimeError:
+            pass
+
+
+def _backoff(attempts: int) -> float:
+    return min(STRIPE_EVENTS_BACKOFF_S * (2 ** max(attempts - 1, 0)), STRIPE_EVENTS_BACKOFF_MAX_S)
+
+
+def _claim_due(limit: int) -> list[StripeEvent]:
+    now = _utcnow()
+    lease_until = now + timedelta(seconds=STRIPE_EVENTS_LEASE_S)
+    claimed: list[StripeEvent] = []
+    blocked: set[str] = set()
+    with tenant_session() as session:
+        rows = session.execute(
+            select(StripeEvent)
+            .where(StripeEvent.status == "pending")
+            .order_by(StripeEvent.created, StripeEvent.received_at)
+            .limit(limit * 4)
+        ).scalars().all()
+        for row in rows:
+            if row.customer in blocked:
+                continue
+            # Only the customer's earliest unfinished event may run; later ones wait for it.
+            blocked.add(row.customer)
+            if as_utc(row.next_attempt_at) > now:
+                continue
+            res = session.execute(
+                update(StripeEvent)
+                .where(StripeEvent.id == row.id, StripeEvent.next_attempt_at == row.next_attempt_at)
+                .values(next_attempt_at=lease_until, attempts=StripeEvent.attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+            if res.rowcount == 1:
+                row.attempts = (row.attempts or 0) + 1
+                claimed.append(row)
+                if len(claimed) >= limit:
+                    break
+    return claimed
+
+
+def _finish(row: StripeEvent, error: str | None) -> None:
+    now = _utcnow()
+    if error is None:
+        values = {"status": "done", "processed_at": now, "last_error": None}
+        _stats["processed"] += 1
+    elif row.attempts >= STRIPE_EVENTS_MAX_ATTEMPTS:
+        values = {"status": "failed", "last_error": error[:500]}
+        _stats["failed"] += 1
+        logger.warning("[stripe] giving up event=%s type=%s attempts=%s err=%s", row.id, row.type, row.attempts, error)
+    else:
+        values = {"last_error": error[:500], "next_attempt_at": now + timedelta(seconds=_backoff(row.attempts))}
+        _stats["retried"] += 1
+    with tenant_session() as session:
+        session.execute(update(StripeEvent).where(StripeEvent.id == row.id).values(**values))
+
+
+def _prune() -> int:
+    cutoff = _utcnow() - timedelta(days=STRIPE_EVENTS_RETENTION_DAYS)
+    with tenant_session() as session:
+        res = session.execute(
+            delete(StripeEvent).where(StripeEvent.status == "done", StripeEvent.received_at < cutoff)
+        )
+        return res.rowcount or 0
+
+
+Handler = Callable[[dict, dict], Awaitable[None]]
+
+
+async def process_due(handler: Handler) -> int:
+    """Apply every due event once, in order per customer; returns how many ran."""
+    total = 0
+    while True:
+        rows = await asyncio.to_thread(_claim_due, STRIPE_EVENTS_BATCH)
+        if not rows:
+            return total
+        for row in rows:
+            error = None
+            try:
+                await handler(json.loads(row.payload), json.loads(row.options or "{}"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                logger.warning("[stripe] event=%s type=%s attempt=%s failed: %s", row.id, row.type, row.attempts, e)
+            await asyncio.to_thread(_finish, row, error)
+        total += len(rows)
+
+
+async def run_processor(handler: Handler, interval: float = STRIPE_EVENTS_POLL_S) -> None:
+    """Background task: apply stored events until cancelled; notify() wakes it early."""
+    global _wake
+    _wake = asyncio.Event()
+    pruned_at = 0.0
+    try:
+        while True:
+            try:
+                await process_due(handler)
+                if time.monotonic() - pruned_at > 3600:
+                    pruned_at = time.monotonic()
+                    await asyncio.to_thread(_prune)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("[stripe] event processor pass failed: %s", e)
+            try:
+                await asyncio.wait_for(_wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            _wake.clear()
+    finally:
+        _wake = None
+
+
+def stats() -> dict:
+    out = dict(_stats)
+    try:
+        with tenant_session() as session:
+            out["pending"] = session.query(StripeEvent).filter(StripeEvent.status == "pending").count()
+            out["failed_total"] = session.query(StripeEvent).filter(StripeEvent.status == "failed").count()
+    except Exception:
+        out["pending"] = None
+    return out
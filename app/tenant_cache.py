@@ -0,0 +1,133 @@
+"""In-process cache of tenant records for the request auth path.
+
+Every widget request resolves its tenant key and checks the Origin against
+the tenant's allowlist. A cached entry holds the detached Tenant row (status,
+plan, quota, voice, pronunciations) and the allowlist already parsed into a
+set, so a hit costs no DB round-trip and no JSON decode.
+
+Entries live TENANT_CACHE_TTL_S; unknown or inactive keys are remembered for
+TENANT_CACHE_NEGATIVE_TTL_S so a bad key cannot hammer the DB. Writers call
+invalidate() after committing. Each invalidation bumps a generation counter,
+and a load that started before it is not stored, so a slow read racing an
+admin write can never put the old row back. Other worker processes converge
+within the TTL.
+
+The cached row's usage counters are whatever they were at load time; quota
+and usage paths keep reading those from the DB.
+"""
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Awaitable, Callable, Iterable, Optional
+
+TENANT_CACHE_TTL_S = float(os.getenv("TENANT_CACHE_TTL_S", "30"))
+TENANT_CACHE_NEGATIVE_TTL_S = float(os.getenv("TENANT_CACHE_NEGATIVE_TTL_S", "5"))
+TENANT_CACHE_SIZE = int(os.getenv("TENANT_CACHE_SIZE", "10000"))
+
+
+class CachedTenant:
+    __slots__ = ("tenant", "allowed", "expires")
+
+    def __init__(self, tenant, allowed: frozenset, expires: float):
+        self.tenant = tenant
+        self.allowed = allowed
+        self.expires = expires
+
+
+_entries: "OrderedDict[str, CachedTenant]" = OrderedDict()
+_lock = Lock()
+_generation = 0
+_stats = {"hits": 0, "negative_hits": 0, "misses": 0, "invalidations": 0}
+
+
+def generation() -> int:
+    return _generation
+
+
+def lookup(tenant_key: str) -> Optional[CachedTenant]:
+    """Live entry for `tenant_key`, or None. A negative entry has tenant=None."""
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(tenant_key)
+        if entry is None or entry.expires <= now:
+            if entry is not None:
+                del _entries[tenant_key]
+            _stats["misses"] += 1
+            return None
+        _entries.move_to_end(tenant_key)
+        _stats["negative_hits" if entry.tenant is None else "hits"] += 1
+        return entry
+
+
+def peek(tenant_key: str) -> Optional[CachedTenant]:
+    """Live entry without counting a hit or miss or touching LRU order (for labelling metrics)."""
+    entry = _entries.get(tenant_key)
+    if entry is None or entry.expires <= time.monotonic():
+        return None
+    return entry
+
+
+def store(tenant_key: str, tenant, allowed: Iterable[str] = (), *, since: int) -> CachedTenant:
+    """
+    Cache a loaded tenant (or None for unknown/inactive). `since` is the
+    generation() read before the DB load; if anything was invalidated in the
+    meantime the entry is returned but not kept.
+    """
+    ttl = TENANT_CACHE_TTL_S if tenant is not None else TENANT_CACHE_NEGATIVE_TTL_S
+    entry = CachedTenant(tenant, frozenset(allowed), time.monotonic() + ttl)
+    if ttl <= 0:
+        return entry
+    with _lock:
+        if since != _generation:
+            return entry
+        _entries[tenant_key] = entry
+        _entries.move_to_end(tenant_key)
+        while len(_entries) > TENANT_CACHE_SIZE:
+            _entries.popitem(last=False)
+    return entry
+
+
+def get_or_load(tenant_key: str, load: Callable[[str], tuple[object, Iterable[str]]]) -> CachedTenant:
+    """lookup(), falling back to `load(key) -> (tenant|None, allowed_domains)` on a miss."""
+    entry = lookup(tenant_key)
+    if entry is not None:
+        return entry
+    since = _generation
+    tenant, allowed = load(tenant_key)
+    return store(tenant_key, tenant, allowed, since=since)
+
+
+async def aget_or_load(
+    tenant_key: str,
+    load: Callable[[str], Awaitable[tuple[object, Iterable[str]]]],
+) -> CachedTenant:
+    """get_or_load() for async loaders."""
+    entry = lookup(tenant_key)
+    if entry is not None:
+        return entry
+    since = _generation
+    tenant, allowed = await load(tenant_key)
+    return store(tenant_key, tenant, allowed, since=since)
+
+
+def invalidate(tenant_key: str | None = None) -> None:
+    """Drop one tenant (or everything) after a write has committed."""
+    global _generation
+    with _lock:
+        _generation += 1
+        _stats["invalidations"] += 1
+        if tenant_key is None:
+            _entries.clear()
+        else:
+            _entries.pop(tenant_key, None)
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "entries": len(_entries),
+            "capacity": TENANT_CACHE_SIZE,
+            "ttl_s": TENANT_CACHE_TTL_S,
+            **_stats,
+        }
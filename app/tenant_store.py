@@ -1,14 +1,31 @@
+import base64
 import json
 import os
-import math
+import re
 import secrets
 from urllib.parse import urlparse
 from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Iterable, Optional
-
-from sqlalchemy import Column, DateTime, Integer, String, create_engine, text
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    and_,
+    bindparam,
+    case,
+    create_engine,
+    func,
+    insert,
+    or_,
+    select,
+    text,
+    update,
+)
 from sqlalchemy import inspect
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
@@ -73,25 +90,113 @@ class Tenant(Base):
     tenant_key = Column(String, primary_key=True, index=True)
     plan_tier = Column(String, nullable=False)
     used_seconds_month = Column(Integer, nullable=False, default=0)
+    # Estimated seconds of renders in flight; released when their usage is recorded.
+    reserved_seconds_month = Column(Integer, nullable=True, default=0)
     renewal_at = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
     updated_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
     allowed_domains = Column(String, nullable=True)
     status = Column(String, nullable=True)
-    contact_email = Column(String, nullable=True)
-    stripe_customer_id = Column(String, nullable=True)
-    stripe_subscription_id = Column(String, nullable=True)
-    stripe_checkout_session_id = Column(String, nullable=True)
+    contact_email = Column(String, nullable=True, index=True)
+    stripe_customer_id = Column(String, nullable=True, index=True)
+    stripe_subscription_id = Column(String, nullable=True, index=True)
+    stripe_checkout_session_id = Column(String, nullable=True, index=True)
     quota_seconds_month = Column(Integer, nullable=True)
     voice_id = Column(String, nullable=True)
     voice_name = Column(String, nullable=True)
     voice_provider = Column(String, nullable=True, default="elevenlabs")
+    # JSON object of written form -> spoken form, applied before synthesis.
+    pronunciations = Column(String, nullable=True)
+
+    __table_args__ = (
+        # Keyset pagination order for the admin list and stats streams.
+        Index("ix_tenants_created_at_key", "created_at", "tenant_key"),
+        # Case-insensitive exact email search.
+        Index("ix_tenants_contact_email_lower", func.lower(contact_email)),
+    )
 
     @property
     def public_site_key(self) -> str:
         return self.tenant_key
 
 
+class UsageEvent(Base):
+    """Append-only audit row, one per recorded render."""
+
+    __tablename__ = "usage_log"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tenant_key = Column(String, nullable=False, index=True)
+    seconds = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+
+
+class TenantEmail(Base):
+    """Signup email -> tenant key (formerly /cache/tenants.json)."""
+
+    __tablename__ = "tenant_emails"
+
+    email = Column(String, primary_key=True)  # lowercased
+    tenant_key = Column(String, nullable=False, index=True)
+    tier = Column(String, nullable=True)
+    stripe_customer_id = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+
+
+class TenantNotify(Base):
+    """Last quota-reached email per tenant (formerly /cache/notify.json)."""
+
+    __tablename__ = "tenant_notify"
+
+    tenant_key = Column(String, primary_key=True)
+    quota_email_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class OutboxEmail(Base):
+    """Queued transactional email; app.outbox sends it and records the outcome."""
+
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String, nullable=False)
+    tenant_key = Column(String, nullable=True)
+    # Unique when set: a second enqueue for the same key is dropped.
+    dedupe_key = Column(String, nullable=True, unique=True)
+    payload = Column(String, nullable=False)  # JSON body for the provider
+    status = Column(String, nullable=False, default="pending")  # pending | sent | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_due", "status", "next_attempt_at"),
+        Index("ix_email_outbox_tenant_kind", "tenant_key", "kind", "created_at"),
+    )
+
+
+class StripeEvent(Base):
+    """Verified Stripe webhook event, stored on receipt and applied by app.stripe_events."""
+
+    __tablename__ = "stripe_events"
+
+    id = Column(String, primary_key=True)  # Stripe event id (evt_...)
+    type = Column(String, nullable=False)
+    customer = Column(String, nullable=False, index=True)  # ordering key
+    created = Column(Integer, nullable=False, default=0)  # Stripe's epoch seconds
+    payload = Column(String, nullable=False)
+    options = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="pending")  # pending | done | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    last_error = Column(String, nullable=True)
+    received_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (Index("ix_stripe_events_status_created", "status", "created"),)
+
+
 TIER_QUOTAS_SECONDS = {
     "trial": 600,        # 10 min
     "creator": 7200,     # 2h
@@ -107,6 +212,7 @@ def quota_for_plan(plan_tier: str) -> int:
 def init_db() -> None:
     Base.metadata.create_all(bind=engine)
     _ensure_columns()
+    _ensure_indexes()
 
 
 def _ensure_columns() -> None:
@@ -132,6 +238,8 @@ def _ensure_columns() -> None:
         "voice_id": "TEXT",
         "voice_name": "TEXT",
         "voice_provider": "TEXT",
+        "pronunciations": "TEXT",
+        "reserved_seconds_month": "INTEGER DEFAULT 0",
     }
     to_add = {name: sql_type for name, sql_type in missing.items() if name not in existing}
     if not to_add:
@@ -144,6 +252,24 @@ def _ensure_columns() -> None:
         return
 
 
+def _ensure_indexes() -> None:
+    """create_all() skips indexes on tables that already exist; add them to older databases."""
+    statements = [
+        "CREATE INDEX IF NOT EXISTS ix_tenants_contact_email ON tenants (contact_email)",
+        "CREATE INDEX IF NOT EXISTS ix_tenants_stripe_customer_id ON tenants (stripe_customer_id)",
+        "CREATE INDEX IF NOT EXISTS ix_tenants_stripe_subscription_id ON tenants (stripe_subscription_id)",
+        "CREATE INDEX IF NOT EXISTS ix_tenants_stripe_checkout_session_id ON tenants (stripe_checkout_session_id)",
+        "CREATE INDEX IF NOT EXISTS ix_tenants_created_at_key ON tenants (created_at, tenant_key)",
+        "CREATE INDEX IF NOT EXISTS ix_tenants_contact_email_lower ON tenants (lower(contact_email))",
+    ]
+    for stmt in statements:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(stmt))
+        except Exception:
+            continue
+
+
 @contextmanager
 def tenant_session() -> Iterable[Session]:
     session: Session = SessionLocal()
@@ -186,15 +312,107 @@ def refresh_renewal(session: Session, tenant: Tenant, now: Optional[datetime] =
     renewal = as_utc(tenant.renewal_at)
     if renewal is None or now >= renewal:
         tenant.used_seconds_month = 0
+        # Also clears reservations leaked by a worker that died mid-render.
+        tenant.reserved_seconds_month = 0
         tenant.renewal_at = now + timedelta(days=30)
 
 
-def record_usage_seconds(session: Session, tenant: Tenant, seconds: float) -> int:
-    """Increment usage, returns new used_seconds_month."""
-    refresh_renewal(session, tenant)
-    inc = int(math.ceil(max(seconds or 0, 0)))
-    tenant.used_seconds_month = int(tenant.used_seconds_month or 0) + inc
-    return tenant.used_seconds_month
+def reservation_read(tenant_key: str):
+    return select(Tenant.used_seconds_month, func.coalesce(Tenant.reserved_seconds_month, 0)).where(
+        Tenant.tenant_key == tenant_key
+    )
+
+
+def reservation_grant(row, seconds: int, quota: int) -> int:
+    used, reserved = int(row[0] or 0), int(row[1] or 0)
+    return min(int(seconds), int(quota) - used - reserved)
+
+
+def reservation_write(tenant_key: str, row, grant: int):
+    """Compare-and-set: only applies if (used, reserved) are still what `row` saw."""
+    used, reserved = int(row[0] or 0), int(row[1] or 0)
+    return (
+        update(Tenant)
+        .where(
+            Tenant.tenant_key == tenant_key,
+            Tenant.used_seconds_month == used,
+            func.coalesce(Tenant.reserved_seconds_month, 0) == reserved,
+        )
+        .values(reserved_seconds_month=reserved + grant)
+        .execution_options(synchronize_session=False)
+    )
+
+
+RESERVE_ATTEMPTS = 5
+
+
+def reserve_seconds(session: Session, tenant_key: str, seconds: int, quota: int) -> int:
+    """
+    Reserve up to `seconds` of the tenant's remaining quota and return how many
+    were granted (0 when nothing is left). The write is a compare-and-set on
+    (used, reserved), so concurrent workers can never hand out the same seconds.
+    """
+    session.flush()
+    for _ in range(RESERVE_ATTEMPTS):
+        row = session.execute(reservation_read(tenant_key)).first()
+        if row is None:
+            return 0
+        grant = reservation_grant(row, seconds, quota)
+        if grant <= 0:
+            return 0
+        if session.execute(reservation_write(tenant_key, row, grant)).rowcount == 1:
+            return grant
+    return 0
+
+
+def apply_usage_batch(
+    session: Session,
+    totals: dict[str, int],
+    events: list[dict],
+    releases: dict[str, int] | None = None,
+) -> None:
+    """
+    Add per-tenant usage totals with one atomic UPDATE each (no read-modify-write),
+    restarting the month first where the renewal date has passed, give back the
+    matching reservations, and append the individual render rows to usage_log.
+    """
+    now = _utcnow()
+    releases = releases or {}
+    keys = set(totals) | set(releases)
+    if keys:
+        expired = or_(Tenant.renewal_at.is_(None), Tenant.renewal_at <= bindparam("now"))
+        reserved = func.coalesce(Tenant.reserved_seconds_month, 0)
+        stmt = (
+            update(Tenant)
+            .where(Tenant.tenant_key == bindparam("key"))
+            .values(
+                used_seconds_month=case(
+                    (expired, bindparam("inc")),
+                    else_=Tenant.used_seconds_month + bindparam("inc"),
+                ),
+                renewal_at=case((expired, bindparam("next_renewal")), else_=Tenant.renewal_at),
+                reserved_seconds_month=case(
+                    (reserved > bindparam("release"), reserved - bindparam("release")),
+                    else_=0,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        session.connection().execute(
+            stmt,
+            [
+                {
+                    "key": key,
+                    "inc": int(totals.get(key, 0)),
+                    "release": int(releases.get(key, 0)),
+                    "now": now,
+                    "next_renewal": now + timedelta(days=30),
+                }
+                for key in keys
+            ],
+        )
+    if events:
+        session.execute(insert(UsageEvent), events)
 
 
 def _generate_public_site_key() -> str:
@@ -361,5 +579,192 @@ def upsert_tenant(
     return tenant
 
 
-def list_tenants(session: Session) -> list[Tenant]:
-    return list(session.query(Tenant).all())
+def encode_page_cursor(tenant: Tenant) -> str:
+    raw = f"{as_utc(tenant.created_at).isoformat()}|{tenant.tenant_key}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_page_cursor(cursor: str | None) -> Optional[tuple[datetime, str]]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created, key = raw.split("|", 1)
+        return datetime.fromisoformat(created), key
+    except Exception:
+        return None
+
+
+# local@domain.tld; partial fragments such as "@acme.com" or "jane@" stay substring searches.
+_FULL_EMAIL = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s.]+")
+
+
+def tenant_search_filter(search: str):
+    """
+    Exact, index-backed matches for the things admins actually paste (an email,
+    a Stripe id, a tenant key); anything else falls back to substring search.
+    """
+    raw = (search or "").strip()
+    if not raw:
+        return None
+    if _FULL_EMAIL.fullmatch(raw):
+        return func.lower(Tenant.contact_email) == raw.lower()
+    if raw.startswith("cus_"):
+        return Tenant.stripe_customer_id == raw
+    if raw.startswith("sub_"):
+        return Tenant.stripe_subscription_id == raw
+    if raw.startswith("cs_"):
+        return Tenant.stripe_checkout_session_id == raw
+    if raw.startswith(("pk_live_", "tnt_")):
+        return Tenant.tenant_key == raw
+    like = f"%{raw.lower()}%"
+    return or_(
+        Tenant.stripe_customer_id.ilike(like),
+        Tenant.stripe_subscription_id.ilike(like),
+        Tenant.contact_email.ilike(like),
+        Tenant.allowed_domains.ilike(like),
+    )
+
+
+def tenant_page(
+    session: Session,
+    limit: int,
+    after: Optional[tuple[datetime, str]] = None,
+    search: str | None = None,
+) -> list[Tenant]:
+    """Newest first, `limit` rows strictly after the (created_at, tenant_key) cursor."""
+    query = session.query(Tenant)
+    cond = tenant_search_filter(search or "")
+    if cond is not None:
+        query = query.filter(cond)
+    if after is not None:
+        created, key = after
+        query = query.filter(
+            or_(
+                Tenant.created_at < created,
+                and_(Tenant.created_at == created, Tenant.tenant_key < key),
+            )
+        )
+    return query.order_by(Tenant.created_at.desc(), Tenant.tenant_key.desc()).limit(limit).all()
+
+
+def iter_tenants(batch_size: int = 500) -> Iterator[Tenant]:
+    """Every tenant, newest first, one short session per batch (nothing held between batches)."""
+    after = None
+    while True:
+        with tenant_session() as session:
+            rows = tenant_page(session, batch_size, after)
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1].created_at, rows[-1].tenant_key)
+
+
+def get_email_binding(session: Session, email: str) -> Optional[TenantEmail]:
+    email_key = (email or "").strip().lower()
+    if not email_key:
+        return None
+    return session.get(TenantEmail, email_key)
+
+
+def email_for_tenant(session: Session, tenant_key: str) -> Optional[str]:
+    if not tenant_key:
+        return None
+    return session.execute(
+        select(TenantEmail.email).where(TenantEmail.tenant_key == tenant_key).limit(1)
+    ).scalar_one_or_none()
+
+
+def bind_email(
+    session: Session,
+    email: str,
+    tenant_key: str,
+    tier: str | None = None,
+    stripe_customer_id: str | None = None,
+) -> TenantEmail:
+    email_key = (email or "").strip().lower()
+    row = session.get(TenantEmail, email_key)
+    if row is None:
+        row = TenantEmail(email=email_key, tenant_key=tenant_key, created_at=_utcnow())
+        session.add(row)
+    row.tenant_key = tenant_key
+    if tier is not None:
+        row.tier = tier
+    if stripe_customer_id is not None:
+        row.stripe_customer_id = stripe_customer_id
+    return row
+
+
+def delete_email_bindings(session: Session, tenant_key: str) -> int:
+    if not tenant_key:
+        return 0
+    removed = session.query(TenantEmail).filter(TenantEmail.tenant_key == tenant_key).delete(synchronize_session=False)
+    session.query(TenantNotify).filter(TenantNotify.tenant_key == tenant_key).delete(synchronize_session=False)
+    return removed
+
+
+def last_quota_email_at(session: Session, tenant_key: str) -> Optional[datetime]:
+    row = session.get(TenantNotify, tenant_key)
+    return as_utc(row.quota_email_at) if row else None
+
+
+def mark_quota_email_sent(session: Session, tenant_key: str, when: Optional[datetime] = None) -> None:
+    when = when or _utcnow()
+    row = session.get(TenantNotify, tenant_key)
+    if row is None:
+        session.add(TenantNotify(tenant_key=tenant_key, quota_email_at=when))
+    else:
+        row.quota_email_at = when
+
+
+def _parse_iso(value) -> Optional[datetime]:
+    if not isinstance(value, str):
+        return None
+    try:
+        return as_utc(datetime.fromisoformat(value))
+    except ValueError:
+        return None
+
+
+def import_json_stores(tenant_store: Path, notify_store: Path) -> dict:
+    """
+    One-time import of the legacy JSON stores. Rows already in the tables win;
+    each file is renamed to *.imported afterwards so the import never reruns.
+    """
+    counts = {"emails": 0, "notify": 0}
+    for path, kind in ((tenant_store, "emails"), (notify_store, "notify")):
+        if not path.exists():
+            continue
+        try:
+            data = json.loads(path.read_text("utf-8"))
+        except Exception:
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        seen: set[str] = set()
+        with tenant_session() as session:
+            for key, value in data.items():
+                if kind == "emails":
+                    email_key = (key or "").strip().lower()
+                    if not email_key or not isinstance(value, dict) or not value.get("tenant_key"):
+                        continue
+                    if email_key in seen or session.get(TenantEmail, email_key) is not None:
+                        continue
+                    seen.add(email_key)
+                    session.add(
+                        TenantEmail(
+                            email=email_key,
+                            tenant_key=value["tenant_key"],
+                            tier=value.get("tier"),
+                            stripe_customer_id=value.get("stripe_customer_id"),
+                            created_at=_parse_iso(value.get("created_at")) or _utcnow(),
+                        )
+                    )
+                else:
+                    when = _parse_iso(value)
+                    if not key or when is None or session.get(TenantNotify, key) is not None:
+                        continue
+                    session.add(TenantNotify(tenant_key=key, quota_email_at=when))
+                counts[kind] += 1
+        path.replace(path.with_name(path.name + ".imported"))
+    return counts
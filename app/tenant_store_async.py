@@ -0,0 +1,132 @@
+"""Async engine for the tenant store.
+
+The request handlers that serve audio are `async def`, and a synchronous
+SQLAlchemy query inside one blocks the whole event loop for the length of the
+round-trip; with a slow Postgres every in-flight stream on the worker stalls.
+This module opens the same database through an async driver (aiosqlite for
+the SQLite file, asyncpg for postgresql:// URLs) with a sized pool, and
+mirrors the tenant_store helpers the hot paths need.
+
+If the driver is not installed (or TENANT_DB_ASYNC=0) ENABLED is False and
+callers fall back to running the sync helpers in a worker thread, which keeps
+the loop free at the cost of a thread hop.
+"""
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.engine import make_url
+
+from app.tenant_store import (
+    DATABASE_URL,
+    DB_PATH,
+    RESERVE_ATTEMPTS,
+    Tenant,
+    reservation_grant,
+    reservation_read,
+    reservation_write,
+)
+
+logger = logging.getLogger("easyaudio")
+
+TENANT_DB_ASYNC = os.getenv("TENANT_DB_ASYNC", "1").strip().lower() in ("1", "true", "yes")
+TENANT_DB_POOL_SIZE = int(os.getenv("TENANT_DB_POOL_SIZE", "10"))
+TENANT_DB_MAX_OVERFLOW = int(os.getenv("TENANT_DB_MAX_OVERFLOW", "20"))
+TENANT_DB_POOL_TIMEOUT_S = float(os.getenv("TENANT_DB_POOL_TIMEOUT_S", "5"))
+TENANT_DB_POOL_RECYCLE_S = int(os.getenv("TENANT_DB_POOL_RECYCLE_S", "1800"))
+
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def _async_url() -> Optional[str]:
+    if not DATABASE_URL:
+        return f"sqlite+aiosqlite:///{DB_PATH}"
+    url = make_url(DATABASE_URL)
+    driver = _ASYNC_DRIVERS.get(url.get_backend_name())
+    if not driver:
+        return None
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def _create_engine():
+    if not TENANT_DB_ASYNC:
+        return None, None
+    try:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = _async_url()
+        if not url:
+            return None, None
+        kwargs = {
+            "pool_size": TENANT_DB_POOL_SIZE,
+            "max_overflow": TENANT_DB_MAX_OVERFLOW,
+            "pool_timeout": TENANT_DB_POOL_TIMEOUT_S,
+            "pool_recycle": TENANT_DB_POOL_RECYCLE_S,
+        }
+        if url.startswith("sqlite"):
+            kwargs["connect_args"] = {"timeout": 5}
+        else:
+            kwargs["pool_pre_ping"] = True
+        engine = create_async_engine(url, **kwargs)
+        return engine, async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    except Exception as e:  # driver missing or URL unsupported: callers use the thread fallback
+        logger.warning("[tenant] async DB driver unavailable, using thread fallback: %s", e)
+        return None, None
+
+
+async_engine, AsyncSessionLocal = _create_engine()
+ENABLED = async_engine is not None
+
+
+@asynccontextmanager
+async def async_tenant_session() -> AsyncIterator:
+    session = AsyncSessionLocal()
+    try:
+        yield session
+        await session.commit()
+    except BaseException:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+async def get_tenant(session, tenant_key: str) -> Optional[Tenant]:
+    if not tenant_key:
+        return None
+    return await session.get(Tenant, tenant_key)
+
+
+async def reserve_seconds(session, tenant_key: str, seconds: int, quota: int) -> int:
+    """Async twin of tenant_store.reserve_seconds (same compare-and-set)."""
+    await session.flush()
+    for _ in range(RESERVE_ATTEMPTS):
+        row = (await session.execute(reservation_read(tenant_key))).first()
+        if row is None:
+            return 0
+        grant = reservation_grant(row, seconds, quota)
+        if grant <= 0:
+            return 0
+        if (await session.execute(reservation_write(tenant_key, row, grant))).rowcount == 1:
+            return grant
+    return 0
+
+
+async def dispose() -> None:
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+def pool_stats() -> dict:
+    if async_engine is None:
+        return {"enabled": False}
+    pool = async_engine.pool
+    status = getattr(pool, "status", None)
+    return {
+        "enabled": True,
+        "driver": async_engine.url.drivername,
+        "pool_size": TENANT_DB_POOL_SIZE,
+        "max_overflow": TENANT_DB_MAX_OVERFLOW,
+        "status": status() if callable(status) else None,
+    }
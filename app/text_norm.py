@@ -0,0 +1,94 @@
+"""Text normalization for TTS input.
+
+`clean_for_tts` strips citations, pronunciation asides and trailing reference
+sections, turns bullets and line breaks into sentence boundaries, and tidies
+spacing around punctuation. `add_pauses` regroups sentences onto lines with a
+blank line every three sentences, which the voices read as a paragraph pause.
+`normalize_for_tts` is both, as sent to the TTS provider.
+
+The output is byte-for-byte what the old preprocess_for_tts + enhance_prosody
+chain produced: audio cache keys hash it, so any change here re-renders (and
+re-bills) every cached MP3. The speedup comes from precompiled patterns,
+skipping passes whose markers are absent, and remembering recent inputs so a
+repeat of the same article body is a dictionary lookup.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+_CITATION_NUM = re.compile(r"\[\d+\]")
+_CITATION_TAG = re.compile(r"\[(?:citation|clarification|verification)\s+needed\]", re.I)
+_PRONUNCIATION_HINT = re.compile(r"\((?:IPA[:\s]|pronunciation[:\s]|listen\b|/)", re.I)
+_PRONUNCIATION = re.compile(r"\s*\((?:IPA[:\s]|pronunciation[:\s]|listen\b|/)[^)]*\)\s*", re.I)
+_TAIL_SECTIONS = re.compile(r"\n(?:References|External links|See also)\n")
+_BULLET = re.compile(r"\n\s*[-•*]\s+")
+_BLANK_LINES = re.compile(r"\n{2,}")
+_LONE_BREAK = re.compile(r"(?<![.!?])\n(?!\n)")
+_SPACE_BEFORE_PUNCT = re.compile(r"\s+([,.;:!?])")
+_NO_SPACE_AFTER_PUNCT = re.compile(r"([,.;:!?])(?=\S)")
+_MULTI_SPACE = re.compile(r"\s{2,}")
+_HSPACE = re.compile(r"[ \t]+")
+_BLANK_RUN = re.compile(r"\n{3,}")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+_RECENT_SIZE = 64
+_recent: "OrderedDict[str, str]" = OrderedDict()
+_recent_lock = threading.Lock()
+
+
+def clean_for_tts(text: str) -> str:
+    """Cleanup to remove citations, IPA/pronunciation, and tidy spacing."""
+    t = text.replace("\r", "\n")
+    if "[" in t:
+        t = _CITATION_NUM.sub("", t)
+        t = _CITATION_TAG.sub("", t)
+    if _PRONUNCIATION_HINT.search(t):
+        t = _PRONUNCIATION.sub(" ", t)
+    if "\n" in t:
+        m = _TAIL_SECTIONS.search(t)
+        if m:
+            t = t[: m.start()]
+        t = _BULLET.sub(". ", t)
+        t = _BLANK_LINES.sub(". ", t)
+        t = _LONE_BREAK.sub(". ", t)
+    t = _SPACE_BEFORE_PUNCT.sub(r"\1", t)
+    t = _NO_SPACE_AFTER_PUNCT.sub(r"\1 ", t)
+    t = _MULTI_SPACE.sub(" ", t)
+    return t.strip()
+
+
+def add_pauses(raw: str | None) -> str:
+    """Lightly adjust whitespace and add gentle pauses for smoother narration."""
+    if not raw:
+        return ""
+    cleaned = _HSPACE.sub(" ", raw.replace("\r", " "))
+    if "\n\n\n" in cleaned:
+        cleaned = _BLANK_RUN.sub("\n\n", cleaned)
+    cleaned = cleaned.strip()
+    sentences = [s for s in (p.strip() for p in _SENTENCE_END.split(cleaned)) if s]
+    if not sentences:
+        return cleaned
+    lines: list[str] = []
+    last = len(sentences) - 1
+    for idx, s in enumerate(sentences):
+        lines.append(s)
+        if idx % 3 == 2 and idx != last:
+            lines.append("")
+    return "\n".join(lines)
+
+
+def normalize_for_tts(text: str | None) -> str:
+    """clean_for_tts followed by add_pauses, as sent to the TTS provider."""
+    if not text:
+        return ""
+    with _recent_lock:
+        out = _recent.get(text)
+        if out is not None:
+            _recent.move_to_end(text)
+            return out
+    out = add_pauses(clean_for_tts(text))
+    with _recent_lock:
+        _recent[text] = out
+        if len(_recent) > _RECENT_SIZE:
+            _recent.popitem(last=False)
+    return out
@@ -0,0 +1,132 @@
+"""Write-behind usage accounting.
+
+Finished renders call record(), which only appends to an in-memory buffer.
+flush() drains the buffer and applies it in one transaction: an atomic
+`used_seconds_month = used_seconds_month + n` per tenant (so concurrent workers
+never lose increments) plus one usage_log row per render for audit. A
+background task flushes every USAGE_FLUSH_INTERVAL_S; anything that reads
+usage to make a quota decision calls flush() first so it sees every render
+this process has recorded.
+
+Renders that reserved quota up front (tenant_store.reserve_seconds) pass the
+reservation to record(), and failed renders pass it to release(); either way
+it is given back in the same UPDATE that adds the usage, so used + reserved
+never counts a render twice.
+
+If a flush fails the drained increments go back into the buffer and are
+retried on the next flush.
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from datetime import datetime, timezone
+from threading import Lock
+
+from app.tenant_store import apply_usage_batch, tenant_session
+
+logger = logging.getLogger("easyaudio")
+
+USAGE_FLUSH_INTERVAL_S = float(os.getenv("USAGE_FLUSH_INTERVAL_S", "2"))
+
+_buffer_lock = Lock()
+# Serializes flushes, so a forced flush waits for one already writing.
+_flush_lock = Lock()
+_totals: dict[str, int] = {}
+_releases: dict[str, int] = {}
+_events: list[dict] = []
+_stats = {"recorded": 0, "flushes": 0, "flushed_events": 0, "errors": 0, "last_flush_ms": 0}
+
+
+def record(tenant_key: str, seconds: float | None, reserved: int = 0) -> int:
+    """Buffer one render's usage (and its reservation to give back); returns the whole seconds charged."""
+    inc = int(math.ceil(max(seconds or 0, 0)))
+    if not tenant_key:
+        return 0
+    if inc <= 0:
+        release(tenant_key, reserved)
+        return 0
+    with _buffer_lock:
+        _totals[tenant_key] = _totals.get(tenant_key, 0) + inc
+        if reserved > 0:
+            _releases[tenant_key] = _releases.get(tenant_key, 0) + int(reserved)
+        _events.append({"tenant_key": tenant_key, "seconds": inc, "created_at": datetime.now(timezone.utc)})
+        _stats["recorded"] += 1
+    return inc
+
+
+def release(tenant_key: str, reserved: int) -> None:
+    """Give back a reservation whose render failed or was abandoned."""
+    if not tenant_key or not reserved or reserved <= 0:
+        return
+    with _buffer_lock:
+        _releases[tenant_key] = _releases.get(tenant_key, 0) + int(reserved)
+
+
+def _has_pending(tenant_key: str) -> bool:
+    with _buffer_lock:
+        return tenant_key in _totals or tenant_key in _releases
+
+
+def flush(tenant_key: str | None = None) -> int:
+    """
+    Write buffered usage to the DB; returns the number of renders written.
+    With `tenant_key`, skips the DB entirely when that tenant has nothing pending.
+    """
+    if tenant_key is not None and not _has_pending(tenant_key) and not _flush_lock.locked():
+        return 0
+    with _flush_lock:
+        with _buffer_lock:
+            if not _events and not _releases:
+                return 0
+            totals, releases, events = dict(_totals), dict(_releases), list(_events)
+            _totals.clear()
+            _releases.clear()
+            _events.clear()
+        t0 = time.perf_counter()
+        try:
+            with tenant_session() as session:
+                apply_usage_batch(session, totals, events, releases)
+        except Exception as e:
+            _stats["errors"] += 1
+            logger.warning("[usage] flush failed tenants=%s events=%s err=%s", len(totals), len(events), e)
+            with _buffer_lock:
+                for key, inc in totals.items():
+                    _totals[key] = _totals.get(key, 0) + inc
+                for key, rel in releases.items():
+                    _releases[key] = _releases.get(key, 0) + rel
+                _events[:0] = events
+            return 0
+        _stats["flushes"] += 1
+        _stats["flushed_events"] += len(events)
+        _stats["last_flush_ms"] = int((time.perf_counter() - t0) * 1000)
+        return len(events)
+
+
+async def aflush(tenant_key: str | None = None) -> int:
+    """flush() from async code: returns at once when there is nothing to wait for, else runs in a thread."""
+    if tenant_key is not None and not _has_pending(tenant_key) and not _flush_lock.locked():
+        return 0
+    return await asyncio.to_thread(flush, tenant_key)
+
+
+async def run_flusher(interval: float = USAGE_FLUSH_INTERVAL_S) -> None:
+    """Background task: flush on an interval until cancelled, then flush once more."""
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(flush)
+    except asyncio.CancelledError:
+        await asyncio.to_thread(flush)
+        raise
+
+
+def stats() -> dict:
+    with _buffer_lock:
+        return {
+            "pending_events": len(_events),
+            "pending_tenants": len(set(_totals) | set(_releases)),
+            "interval_s": USAGE_FLUSH_INTERVAL_S,
+            **_stats,
+        }
@@ -0,0 +1,136 @@
+"""Benchmark: legacy regex metadata cascade vs app.html_meta single pass.
+
+    python bench/bench_html_meta.py --pages ~/saved_pages --repeat 5
+
+With no --pages directory, synthetic 1-3 MB publisher-style pages are used.
+"""
+import argparse
+import pathlib
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from app.html_meta import extract_page_meta  # noqa: E402
+
+
+# --- legacy /meta helpers, as they were in main.py
+def _meta_clean(s: str) -> str:
+    return re.sub(r'\s+', ' ', s).strip()
+
+def find_subtitle(html: str) -> str | None:
+    m = re.search(r'<h2[^>]*>(.*?)</h2>', html, flags=re.I|re.S)
+    if m:
+        return _meta_clean(re.sub(r'<[^>]+>', '', m.group(1)))
+    m = re.search(r'<meta[^>]+name=["\']description["\'][^>]+content=["\']([^"\']+)["\']', html, flags=re.I)
+    return _meta_clean(m.group(1)) if m else None
+
+def find_author(html: str) -> str | None:
+    m = re.search(r'<meta[^>]+name=["\']author["\'][^>]+content=["\']([^"\']+)["\']', html, flags=re.I)
+    if m: return _meta_clean(m.group(1))
+    m = re.search(r'"author"\s*:\s*"\s*([^"]+)\s*"', html, flags=re.I)
+    if m: return _meta_clean(m.group(1))
+    m = re.search(r'"author"\s*:\s*{\s*"@type"\s*:\s*"Person"\s*,\s*"name"\s*:\s*"([^"]+)"', html, flags=re.I)
+    if m: return _meta_clean(m.group(1))
+    m = re.search(r'>\s*By\s+([A-Z][A-Za-z0-9.\- ]+)\s*<', html, flags=re.I)
+    return _meta_clean(m.group(1)) if m else None
+
+def find_og_image(html: str) -> str | None:
+    m = re.search(r'<meta[^>]+property=["\']og:image["\'][^>]+content=["\']([^"\']+)["\']', html, flags=re.I)
+    return m.group(1).strip() if m else None
+
+def legacy_meta(html: str) -> dict:
+    mt = re.search(r"<title[^>]*>(.*?)</title>", html, flags=re.I|re.S)
+    return {
+        "title": _meta_clean(mt.group(1)) if mt else "",
+        "subtitle": find_subtitle(html),
+        "author": find_author(html),
+        "image": find_og_image(html),
+    }
+
+
+# --- corpus
+_WORDS = "the council said on tuesday that plans for a new river crossing would be delayed again".split()
+
+def _paragraph(rng: random.Random) -> str:
+    return "<p>" + " ".join(rng.choice(_WORDS) for _ in range(rng.randint(40, 120))) + ".</p>"
+
+def synth_page(rng: random.Random, size: int, variant: int) -> str:
+    head = [
+        "<!doctype html><html><head><meta charset='utf-8'>",
+        f"<title>Bridge plans delayed {variant}</title>",
+        "<meta name='description' content='Council pushes the river crossing back a year.'>",
+        f"<meta property='og:image' content='https://cdn.example.com/img/{variant}.jpg'>",
+    ]
+    # Mix of author sources so every branch of both extractors gets exercised.
+    if variant % 3 == 0:
+        head.append("<meta name='author' content='Jane Doe'>")
+    elif variant % 3 == 1:
+        head.append('<script type="application/ld+json">{"@type":"NewsArticle","author":{"@type":"Person","name":"Jane Doe"}}</script>')
+    head.append("<style>" + ".x{color:red}" * 2000 + "</style></head><body>")
+    body = ["<header><nav>" + "<a href='/s'>Section</a>" * 200 + "</nav></header>",
+            "<article><h1>Bridge plans delayed</h1><h2>Council pushes crossing back a year</h2>"]
+    if variant % 3 == 2:
+        body.append("<div class='byline'>By Jane Doe</div>")
+    out = "".join(head) + "".join(body)
+    parts = [out]
+    n = len(out)
+    while n < size:
+        p = _paragraph(rng)
+        parts.append(p)
+        n += len(p)
+    parts.append("</article><footer>" + "<script>var a=1;</script>" * 500 + "</footer></body></html>")
+    return "".join(parts)
+
+def load_corpus(pages_dir: str | None, count: int) -> list[tuple[str, str]]:
+    if pages_dir:
+        files = sorted(pathlib.Path(pages_dir).expanduser().glob("*.htm*"))
+        if not files:
+            sys.exit(f"no *.html files in {pages_dir}")
+        return [(f.name, f.read_text("utf-8", errors="replace")) for f in files]
+    rng = random.Random(42)
+    return [(f"synthetic-{i}", synth_page(rng, rng.randint(1_000_000, 3_000_000), i)) for i in range(count)]
+
+
+def _time(fn, pages, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _name, html in pages:
+            fn(html)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000 / len(pages)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--pages", help="directory of saved *.html pages")
+    ap.add_argument("--count", type=int, default=12, help="synthetic pages when --pages is not given")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    pages = load_corpus(args.pages, args.count)
+    mb = sum(len(h) for _, h in pages) / len(pages) / 1e6
+    print(f"pages={len(pages)} avg_size={mb:.2f}MB repeat={args.repeat}")
+
+    legacy_ms = _time(legacy_meta, pages, args.repeat)
+    single_ms = _time(extract_page_meta, pages, args.repeat)
+    print(f"legacy regex cascade: {legacy_ms:8.2f} ms/page")
+    print(f"single-pass lxml:     {single_ms:8.2f} ms/page  ({legacy_ms / single_ms:.1f}x)")
+
+    fields = ("title", "subtitle", "author", "image")
+    agree = dict.fromkeys(fields, 0)
+    for name, html in pages:
+        old, new = legacy_meta(html), extract_page_meta(html)
+        for f in fields:
+            if (old[f] or None) == (new[f] or None):
+                agree[f] += 1
+            elif args.pages:
+                print(f"  diff {name} {f}: {old[f]!r} -> {new[f]!r}")
+    print("agreement: " + " ".join(f"{f}={agree[f]}/{len(pages)}" for f in fields))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Benchmark: event-loop lag with sync vs async tenant DB access.
+
+    python bench/bench_loop_lag.py --tasks 100 --requests 20 --hold-ms 20
+
+Runs --tasks concurrent "requests" inside one event loop. Each does what an
+audio handler does on a miss: a tenant lookup, then a quota check with a
+reservation. The first pass calls the synchronous tenant_store helpers
+directly from the coroutine (the old behaviour). The second goes through
+app.tenant_store_async. A ticker task records how late the loop wakes it.
+
+A background thread stands in for other writers (another worker, the usage
+ledger, an admin write): it holds a write transaction for --hold-ms every
+--gap-ms. With sync access, a request waiting on that lock stalls the whole
+loop. With async access, only that request waits.
+"""
+import argparse
+import asyncio
+import os
+import pathlib
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+_tmp = tempfile.mkdtemp(prefix="bench_loop_lag_")
+os.environ["TENANT_DB_PATH"] = os.path.join(_tmp, "tenants.db")
+
+from sqlalchemy import text  # noqa: E402
+
+from app import tenant_store as store  # noqa: E402
+from app import tenant_store_async as astore  # noqa: E402
+
+QUOTA = 10**9
+
+
+def seed(n: int) -> list[str]:
+    store.init_db()
+    keys = [f"bench-{i}" for i in range(n)]
+    with store.tenant_session() as session:
+        for key in keys + ["bench-writer"]:
+            store.create_tenant(session, "newsroom", public_site_key=key)
+    return keys
+
+
+def sync_request(key: str) -> None:
+    with store.tenant_session() as session:
+        tenant = store.get_tenant(session, key)
+        store.refresh_renewal(session, tenant)
+    with store.tenant_session() as session:
+        tenant = store.get_tenant(session, key)
+        store.refresh_renewal(session, tenant)
+        store.reserve_seconds(session, key, 5, QUOTA)
+
+
+async def async_request(key: str) -> None:
+    async with astore.async_tenant_session() as session:
+        tenant = await astore.get_tenant(session, key)
+        store.refresh_renewal(session, tenant)
+    async with astore.async_tenant_session() as session:
+        tenant = await astore.get_tenant(session, key)
+        store.refresh_renewal(session, tenant)
+        await astore.reserve_seconds(session, key, 5, QUOTA)
+
+
+def writer(stop: threading.Event, hold_s: float, gap_s: float) -> None:
+    while not stop.is_set():
+        with store.engine.begin() as conn:
+            conn.execute(text("UPDATE tenants SET used_seconds_month = used_seconds_month WHERE tenant_key = 'bench-writer'"))
+            time.sleep(hold_s)
+        time.sleep(gap_s)
+
+
+async def run(mode: str, keys: list[str], tasks: int, requests: int) -> dict:
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append((time.perf_counter() - t0 - 0.001) * 1000)
+
+    async def worker(rng: random.Random) -> None:
+        for _ in range(requests):
+            key = rng.choice(keys)
+            if mode == "sync":
+                sync_request(key)
+            else:
+                await async_request(key)
+            await asyncio.sleep(0)
+
+    tick = asyncio.ensure_future(ticker())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(random.Random(i)) for i in range(tasks)))
+    elapsed = time.perf_counter() - t0
+    done.set()
+    await tick
+    lags.sort()
+    return {
+        "mode": mode,
+        "requests": tasks * requests,
+        "rps": tasks * requests / elapsed,
+        "p50": statistics.median(lags),
+        "p99": lags[int(len(lags) * 0.99) - 1] if len(lags) > 1 else lags[0],
+        "max": lags[-1],
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--tenants", type=int, default=1000)
+    ap.add_argument("--tasks", type=int, default=100, help="concurrent requests in flight")
+    ap.add_argument("--requests", type=int, default=20, help="requests per task")
+    ap.add_argument("--hold-ms", type=float, default=20.0, help="how long the competing writer holds its lock")
+    ap.add_argument("--gap-ms", type=float, default=30.0, help="pause between competing write transactions")
+    args = ap.parse_args()
+
+    if not astore.ENABLED:
+        sys.exit("async driver unavailable (pip install 'SQLAlchemy[asyncio]' aiosqlite)")
+
+    keys = seed(args.tenants)
+    stop = threading.Event()
+    bg = threading.Thread(target=writer, args=(stop, args.hold_ms / 1000, args.gap_ms / 1000), daemon=True)
+    bg.start()
+    print(f"tenants={args.tenants} tasks={args.tasks} requests/task={args.requests} "
+          f"writer hold={args.hold_ms}ms gap={args.gap_ms}ms")
+    try:
+        for mode in ("sync", "async"):
+            r = asyncio.run(run(mode, keys, args.tasks, args.requests))
+            print(f"{r['mode']:>5}: {r['rps']:8.0f} req/s  loop lag p50={r['p50']:6.2f}ms "
+                  f"p99={r['p99']:7.2f}ms max={r['max']:7.2f}ms")
+    finally:
+        stop.set()
+        bg.join()
+        asyncio.run(astore.dispose())
+
+
+if __name__ == "__main__":
+    main()
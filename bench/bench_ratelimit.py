@@ -0,0 +1,100 @@
+"""Benchmark: old timestamp-list rate limiter vs app.ratelimit (GCRA).
+
+    python bench/bench_ratelimit.py --ips 100000 --requests 500000
+
+Replays --requests hits from --ips distinct client IPs (a hot set of
+--hot IPs gets half the traffic and runs into the limit), first through the
+old per-process `_allow` (a list of timestamps per key, trimmed with
+pop(0), never evicted), then through the in-memory GCRA table, then through
+the shared SQLite table. Reports throughput, keys retained and peak traced
+memory. The clock is simulated so the run covers several windows.
+"""
+import argparse
+import collections
+import importlib
+import os
+import pathlib
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+LIMIT, WINDOW = 60, 60.0
+
+
+def old_allow(counter: dict, key: str, limit: int, window_s: float, now: float) -> bool:
+    arr = counter[key]
+    while arr and now - arr[0] > window_s:
+        arr.pop(0)
+    if len(arr) >= limit:
+        return False
+    arr.append(now)
+    return True
+
+
+def workload(ips: int, hot: int, n: int, span_s: float, seed: int = 7) -> list[tuple[str, float]]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        if rng.random() < 0.5:
+            ip = f"10.0.{rng.randrange(hot) // 256}.{rng.randrange(hot) % 256}"
+        else:
+            ip = f"ip-{rng.randrange(ips)}"
+        out.append((ip, span_s * i / n))
+    return out
+
+
+def run(name: str, make, reqs) -> None:
+    """`make()` returns a fresh (hit(ip, now) -> bool, key_count()) pair; timed once, then traced once."""
+    fn, size = make()
+    t0 = time.perf_counter()
+    allowed = 0
+    for ip, now in reqs:
+        allowed += fn(ip, now)
+    elapsed = time.perf_counter() - t0
+    keys = size()
+    fn, size = make()
+    tracemalloc.start()
+    for ip, now in reqs:
+        fn(ip, now)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:>14}: {len(reqs) / elapsed:9.0f} req/s  allowed={allowed:7d}  "
+          f"keys={keys:7d}  peak_mem={peak / 1e6:7.1f}MB")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--ips", type=int, default=100_000)
+    ap.add_argument("--hot", type=int, default=50)
+    ap.add_argument("--requests", type=int, default=500_000)
+    ap.add_argument("--span-s", type=float, default=600.0, help="simulated seconds the requests are spread over")
+    args = ap.parse_args()
+
+    reqs = workload(args.ips, args.hot, args.requests, args.span_s)
+    print(f"ips={args.ips} hot={args.hot} requests={args.requests} span={args.span_s}s limit={LIMIT}/{WINDOW}s")
+
+    def make_old():
+        hits = collections.defaultdict(list)
+        return (lambda ip, now: old_allow(hits, ip, LIMIT, WINDOW, now)), (lambda: len(hits))
+
+    run("old list", make_old, reqs)
+
+    tmp = tempfile.mkdtemp(prefix="bench_ratelimit_")
+    for backend in ("memory", "sqlite"):
+        def make(backend=backend):
+            os.environ["RATE_LIMIT_BACKEND"] = backend
+            os.environ["RATE_LIMIT_DB"] = tempfile.mktemp(suffix=".db", dir=tmp)
+            from app import ratelimit
+            rl = importlib.reload(ratelimit)
+            key = "shared_keys" if backend == "sqlite" else "keys"
+            return (lambda ip, now: rl.hit("ip", ip, LIMIT, WINDOW, now=now)[0]), (lambda: rl.stats()[key])
+
+        run(f"gcra {backend}", make, reqs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark: legacy preprocess_for_tts + enhance_prosody vs app.text_norm.
+
+    python bench/bench_text_norm.py --size 100000 --repeat 20
+
+Times the full legacy chain, normalize_for_tts, and normalize_for_tts on an
+article body it has just seen (the repeat-click case on the hot paths), and
+checks that the output still matches the legacy chain byte for byte.
+"""
+import argparse
+import pathlib
+import random
+import re
+import sys
+import time
+from typing import Optional
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from app.text_norm import add_pauses, clean_for_tts, normalize_for_tts  # noqa: E402
+
+
+# --- legacy helpers, as they were in main.py
+def preprocess_for_tts(text: str) -> str:
+    t = text.replace("\r", "\n")
+    t = re.sub(r"\[\d+\]", "", t)
+    t = re.sub(r"\[(?:citation|clarification|verification)\s+needed\]", "", t, flags=re.I)
+    t = re.sub(r"\s*\((?:IPA[:\s]|pronunciation[:\s]|listen\b|/)[^)]*\)\s*", " ", t, flags=re.I)
+    t = re.split(r"\n(?:References|External links|See also)\n", t, maxsplit=1)[0]
+    t = re.sub(r"\n\s*[-•*]\s+", ". ", t)
+    t = re.sub(r"\n{2,}", ". ", t)
+    t = re.sub(r"(?<![.!?])\n(?!\n)", ". ", t)
+    t = re.sub(r"\s+([,.;:!?])", r"\1", t)
+    t = re.sub(r"([,.;:!?])(?=\S)", r"\1 ", t)
+    t = re.sub(r"\s{2,}", " ", t)
+    return t.strip()
+
+def enhance_prosody(raw: Optional[str]) -> str:
+    if not raw:
+        return ""
+    cleaned = raw.replace("\r", " ")
+    cleaned = re.sub(r"[ \t]+", " ", cleaned)
+    cleaned = re.sub(r"\n{3,}", "\n\n", cleaned).strip()
+    parts = re.split(r"(?<=[.!?])\s+", cleaned)
+    sentences = [s.strip() for s in parts if s.strip()]
+    if not sentences:
+        return cleaned
+    with_paragraphs: list[str] = []
+    for idx, s in enumerate(sentences):
+        with_paragraphs.append(s)
+        if (idx + 1) % 3 == 0 and idx != len(sentences) - 1:
+            with_paragraphs.append("")
+    return "\n".join(with_paragraphs)
+
+def legacy(text: str) -> str:
+    return enhance_prosody(preprocess_for_tts(text))
+
+
+_WORDS = ("the city council voted on tuesday to approve a revised budget that "
+          "includes funding for transit schools and housing according to officials").split()
+
+def synth_article(rng: random.Random, size: int) -> str:
+    out: list[str] = []
+    n = 0
+    while n < size:
+        sentence = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 28))).capitalize()
+        if rng.random() < 0.1:
+            sentence += f" [{rng.randint(1, 99)}]"
+        if rng.random() < 0.03:
+            sentence += " (IPA: /ˈsɪti/)"
+        end = rng.choice(".....!?")
+        # trafilatura emits one paragraph per line; user text often has blank lines and bullets.
+        sep = rng.choice([" ", " ", " ", "\n", "\n", "\n\n", "\n- "])
+        piece = sentence + end + sep
+        out.append(piece)
+        n += len(piece)
+    out.append("\nReferences\n" + "Some reference list. " * 50)
+    return "".join(out)
+
+
+def _time(fn, texts, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000 / len(texts)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--size", type=int, default=100_000, help="article size in characters")
+    ap.add_argument("--count", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    rng = random.Random(7)
+    texts = [synth_article(rng, args.size) for _ in range(args.count)]
+    print(f"articles={len(texts)} size={args.size} repeat={args.repeat}")
+
+    legacy_ms = _time(legacy, texts, args.repeat)
+    # First pass without the recent-input memo, which would answer every repeat.
+    new_ms = _time(lambda t: add_pauses(clean_for_tts(t)), texts, args.repeat)
+    normalize_for_tts(texts[-1])
+    again_ms = _time(normalize_for_tts, texts[-1:], args.repeat)
+    print(f"legacy preprocess+prosody: {legacy_ms:8.2f} ms/article")
+    print(f"normalize_for_tts:         {new_ms:8.2f} ms/article  ({legacy_ms / new_ms:.2f}x)")
+    print(f"normalize_for_tts (again): {again_ms:8.2f} ms/article")
+
+    same = sum(legacy(t) == normalize_for_tts(t) for t in texts)
+    print(f"identical_to_legacy={same}/{len(texts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Local stand-in for the Resend API, for exercising app.outbox.
+
+    python bench/email_sink.py --port 8025 --fail-rate 0.3 --delay-ms 0
+    EMAIL_OUTBOX_URL=http://127.0.0.1:8025/emails EMAIL_FROM=dev@localhost uvicorn main:app
+
+Accepts POSTed JSON bodies, prints one line per message and appends them to
+--log (JSONL). --fail-rate answers that fraction with a 503 and --delay-ms
+stalls every response, to watch retries and backoff without touching audio
+latency. GET / returns the messages received so far.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(args, received: list, lock: threading.Lock):
+    class Sink(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get("content-length") or 0)
+            raw = self.rfile.read(length)
+            if args.delay_ms:
+                time.sleep(args.delay_ms / 1000)
+            if random.random() < args.fail_rate:
+                print(f"503 {self.path}")
+                self._reply(503, {"error": "sink configured to fail"})
+                return
+            try:
+                msg = json.loads(raw or b"{}")
+            except ValueError:
+                self._reply(400, {"error": "invalid json"})
+                return
+            with lock:
+                received.append(msg)
+                n = len(received)
+                if args.log:
+                    with open(args.log, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(msg) + "\n")
+            print(f"200 #{n} to={msg.get('to')} subject={msg.get('subject')!r}")
+            self._reply(200, {"id": f"sink-{n}"})
+
+        def do_GET(self):
+            with lock:
+                self._reply(200, {"count": len(received), "messages": received})
+
+        def log_message(self, *a):
+            pass
+
+    return Sink
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8025)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--delay-ms", type=float, default=0.0)
+    ap.add_argument("--log", default=None, help="append received messages to this JSONL file")
+    args = ap.parse_args()
+    received: list = []
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args, received, threading.Lock()))
+    print(f"email sink on http://{args.host}:{args.port}/emails fail_rate={args.fail_rate}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -14,12 +14,11 @@ from typing import Optional, Any, Dict
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from fastapi import Query, Body
-import trafilatura, re, requests as http, json
+import re, requests as http, json
 from html import escape
-from trafilatura.metadata import extract_metadata
 from typing import Tuple
 from urllib.parse import urlparse, quote
-import socket, ipaddress, asyncio, json
+import asyncio, json
 import re
 from fastapi.staticfiles import StaticFiles
 import csv
@@ -27,28 +26,62 @@ from threading import Lock
 from datetime import datetime, timezone, date, timedelta
 from mutagen.mp3 import MP3
 import stripe
-from sqlalchemy import or_
 from app.config.tenants import TENANTS, TENANT_USAGE
 from app.tenant_store import (
     DATABASE_URL,
     Tenant,
+    bind_email,
     create_tenant,
+    decode_page_cursor,
+    delete_email_bindings,
+    email_for_tenant,
     deserialize_domains,
+    encode_page_cursor,
+    get_email_binding,
     get_tenant,
     get_tenant_by_stripe_checkout_session_id,
     get_tenant_by_stripe_customer_id,
     get_tenant_by_stripe_subscription_id,
+    import_json_stores,
     init_db as init_tenant_db,
-    list_tenants,
+    iter_tenants,
+    last_quota_email_at,
     normalize_domain,
     normalize_domains,
     quota_for_plan,
-    record_usage_seconds,
     refresh_renewal,
+    reserve_seconds,
+    tenant_page,
     tenant_session,
     TIER_QUOTAS_SECONDS,
     upsert_tenant,
 )
+from app import extract_cache as extraction_cache
+from app import boilerplate
+from app import tenant_cache
+from app import usage_ledger
+from app import tenant_store_async
+from app import ratelimit
+from app import outbox
+from app import stripe_events
+from app import buffered_writer
+from app.buffered_writer import BufferedWriter
+from app import analytics_store
+from app.analytics_store import AnalyticsWriter
+from app import histogram, prometheus
+from app.html_meta import extract_page_meta
+from app.extract_batch import BATCH_CONCURRENCY, BATCH_MAX_URLS, BATCH_PER_ORIGIN, run_batch
+from app.chunker import iter_chunks
+from app.lexicon import Lexicon, parse_pronunciations
+from app.text_norm import add_pauses, clean_for_tts, normalize_for_tts
+from app.html_fetch import FetchRejected, fetch_html
+from app.ssrf_guard import dns_stats, is_public_http_url, pinned_client
+from app.extract_engine import (
+    ExtractionTimeout,
+    extract_html,
+    shutdown_extraction_pool,
+    start_extraction_pool,
+)
 from fastapi.exception_handlers import http_exception_handler as fastapi_http_exception_handler
 
 logger = logging.getLogger("easyaudio")
@@ -126,7 +159,7 @@ def _extract_tenant_key(request: Request, body: object | None = None) -> str | N
     return None
 
 
-def is_domain_allowed(domain: str, allowed_domains: list[str]) -> bool:
+def is_domain_allowed(domain: str, allowed_domains: list[str] | frozenset[str]) -> bool:
     if not domain:
         return False
     return domain in allowed_domains
@@ -145,15 +178,43 @@ def _tenant_is_active(tenant: Tenant) -> bool:
     return status == "active"
 
 
-def _load_tenant_record(tenant_id: str) -> Tenant:
+def _fetch_tenant_row(tenant_id: str) -> tuple[Tenant | None, list[str]]:
     with tenant_session() as session:
         tenant = get_tenant(session, tenant_id)
-        if not tenant:
-            _tenant_error("Tenant not found.", code="tenant_not_found")
-        if not _tenant_is_active(tenant):
-            _tenant_error("Tenant not found.", code="tenant_not_found")
+        if not tenant or not _tenant_is_active(tenant):
+            return None, []
+        refresh_renewal(session, tenant)
+    return tenant, _get_allowed_domains(tenant)
+
+
+def _load_tenant_entry(tenant_id: str) -> tenant_cache.CachedTenant:
+    """Active tenant plus its parsed allowlist; a cache hit touches no DB."""
+    entry = tenant_cache.get_or_load(tenant_id, _fetch_tenant_row)
+    if entry.tenant is None:
+        _tenant_error("Tenant not found.", code="tenant_not_found")
+    return entry
+
+
+def _load_tenant_record(tenant_id: str) -> Tenant:
+    return _load_tenant_entry(tenant_id).tenant
+
+
+async def _afetch_tenant_row(tenant_id: str) -> tuple[Tenant | None, list[str]]:
+    if not tenant_store_async.ENABLED:
+        return await asyncio.to_thread(_fetch_tenant_row, tenant_id)
+    async with tenant_store_async.async_tenant_session() as session:
+        tenant = await tenant_store_async.get_tenant(session, tenant_id)
+        if not tenant or not _tenant_is_active(tenant):
+            return None, []
         refresh_renewal(session, tenant)
-        return tenant
+    return tenant, _get_allowed_domains(tenant)
+
+
+async def _aload_tenant_entry(tenant_id: str) -> tenant_cache.CachedTenant:
+    entry = await tenant_cache.aget_or_load(tenant_id, _afetch_tenant_row)
+    if entry.tenant is None:
+        _tenant_error("Tenant not found.", code="tenant_not_found")
+    return entry
 
 
 def get_validated_tenant(request: Request, body: object | None = None) -> str:
@@ -173,9 +234,26 @@ def get_validated_tenant_record(
             "Missing tenant key (x-tenant-key header, body.tenant, or tenant query param).",
             code="missing_tenant_key",
         )
-    tenant = _load_tenant_record(tenant_id)
-    enforce_domain_allowlist(request, tenant, tenant_id)
-    return tenant_id, tenant
+    entry = _load_tenant_entry(tenant_id)
+    enforce_domain_allowlist(request, entry.tenant, tenant_id, allowed=entry.allowed)
+    return tenant_id, entry.tenant
+
+
+async def aget_validated_tenant_record(
+    request: Request,
+    body: object | None = None,
+) -> tuple[str, Tenant]:
+    """get_validated_tenant_record for async handlers; a cache miss loads through the async engine."""
+    tenant_id = _extract_tenant_key(request, body=body)
+    if not tenant_id:
+        logger.warning("[tenant] Missing tenant key")
+        _tenant_error(
+            "Missing tenant key (x-tenant-key header, body.tenant, or tenant query param).",
+            code="missing_tenant_key",
+        )
+    entry = await _aload_tenant_entry(tenant_id)
+    enforce_domain_allowlist(request, entry.tenant, tenant_id, allowed=entry.allowed)
+    return tenant_id, entry.tenant
 
 
 def get_request_domain_info(request: Request) -> dict[str, str | None]:
@@ -193,10 +271,16 @@ def get_request_domain_info(request: Request) -> dict[str, str | None]:
     }
 
 
-def enforce_domain_allowlist(request: Request, tenant: Tenant, tenant_key: str) -> None:
+def enforce_domain_allowlist(
+    request: Request,
+    tenant: Tenant,
+    tenant_key: str,
+    allowed: frozenset[str] | None = None,
+) -> None:
     domain_info = get_request_domain_info(request)
     domain = domain_info["normalized_domain"]
-    allowed = _get_allowed_domains(tenant)
+    if allowed is None:
+        allowed = frozenset(_get_allowed_domains(tenant))
     match = bool(domain and is_domain_allowed(domain, allowed))
     if not domain:
         if DEMO_MODE:
@@ -235,7 +319,7 @@ def enforce_domain_allowlist(request: Request, tenant: Tenant, tenant_key: str)
                 "message": "Domain not allowed for this tenant",
                 "parsed_domain": domain_info["parsed_domain"],
                 "normalized_domain": domain_info["normalized_domain"],
-                "allowed_domains": allowed,
+                "allowed_domains": sorted(allowed),
             },
         )
 
@@ -318,48 +402,105 @@ def _quota_error_payload(
     return payload
 
 
-def ensure_tenant_quota_ok(tenant_id: str, request: Request | None = None) -> dict[str, object]:
+def ensure_tenant_quota_ok(
+    tenant_id: str,
+    request: Request | None = None,
+    reserve: int = 0,
+) -> dict[str, object]:
     """
     Refresh renewal window and enforce monthly quota for a tenant.
     Returns a small dict with quota state for logging.
+
+    With `reserve` (estimated seconds of the render about to start), also
+    reserves up to that much of the remaining quota; the grant is returned as
+    "reserved" and must be handed back through record_tenant_usage_seconds or
+    release_tenant_reservation. Renders in flight count against the quota, so
+    a burst of concurrent requests cannot all pass on the same remaining seconds.
     """
+    # Usage is written behind; make sure this tenant's recorded renders are in the row.
+    usage_ledger.flush(tenant_id)
     with tenant_session() as session:
         tenant = get_tenant(session, tenant_id)
-        if not tenant:
+        if not tenant or not _tenant_is_active(tenant):
             _tenant_error("Tenant not found.", code="tenant_not_found")
-        if not _tenant_is_active(tenant):
+        refresh_renewal(session, tenant)
+        quota = _tenant_quota_seconds(tenant)
+        reserved = 0
+        if reserve > 0 and _quota_left(tenant, quota):
+            reserved = reserve_seconds(session, tenant_id, reserve, quota)
+    if not _quota_left(tenant, quota) or (reserve > 0 and not reserved):
+        raise _quota_exceeded(tenant, quota, request)
+    return _quota_state(tenant, quota, reserved)
+
+
+async def aensure_tenant_quota_ok(
+    tenant_id: str,
+    request: Request | None = None,
+    reserve: int = 0,
+) -> dict[str, object]:
+    """ensure_tenant_quota_ok for async handlers; never blocks the event loop on the DB."""
+    if not tenant_store_async.ENABLED:
+        return await asyncio.to_thread(ensure_tenant_quota_ok, tenant_id, request, reserve)
+    await usage_ledger.aflush(tenant_id)
+    async with tenant_store_async.async_tenant_session() as session:
+        tenant = await tenant_store_async.get_tenant(session, tenant_id)
+        if not tenant or not _tenant_is_active(tenant):
             _tenant_error("Tenant not found.", code="tenant_not_found")
         refresh_renewal(session, tenant)
-        quota = int(tenant.quota_seconds_month or 0) if tenant.quota_seconds_month else quota_for_plan(tenant.plan_tier)
-        if tenant.used_seconds_month >= quota:
-            payload = _quota_error_payload(
-                tenant.plan_tier,
-                quota,
-                tenant.used_seconds_month,
-                renewal_at=tenant.renewal_at,
-            )
-            try:
-                _maybe_send_quota_email(tenant, quota, request=request)
-            except Exception as e:
-                logger.warning("[quota] notify error: %s", e)
-            raise HTTPException(status_code=402, detail=payload)
-        return {
-            "plan": tenant.plan_tier,
-            "quota": quota,
-            "used": tenant.used_seconds_month,
-            "renewal_at": tenant.renewal_at,
-        }
+        quota = _tenant_quota_seconds(tenant)
+        reserved = 0
+        if reserve > 0 and _quota_left(tenant, quota):
+            reserved = await tenant_store_async.reserve_seconds(session, tenant_id, reserve, quota)
+    if not _quota_left(tenant, quota) or (reserve > 0 and not reserved):
+        raise await asyncio.to_thread(_quota_exceeded, tenant, quota, request)
+    return _quota_state(tenant, quota, reserved)
+
+
+def _tenant_quota_seconds(tenant: Tenant) -> int:
+    return int(tenant.quota_seconds_month or 0) if tenant.quota_seconds_month else quota_for_plan(tenant.plan_tier)
+
+
+def _quota_left(tenant: Tenant, quota: int) -> bool:
+    return int(tenant.used_seconds_month or 0) + int(tenant.reserved_seconds_month or 0) < quota
 
 
-def record_tenant_usage_seconds(tenant_id: str, seconds: float) -> int | None:
+def _quota_state(tenant: Tenant, quota: int, reserved: int) -> dict[str, object]:
+    return {
+        "plan": tenant.plan_tier,
+        "quota": quota,
+        "used": tenant.used_seconds_month,
+        "renewal_at": tenant.renewal_at,
+        "reserved": reserved,
+    }
+
+
+def _quota_exceeded(tenant: Tenant, quota: int, request: Request | None) -> HTTPException:
+    histogram.inc("quota_rejections", tier=tenant.plan_tier or "unknown")
+    payload = _quota_error_payload(
+        tenant.plan_tier,
+        quota,
+        tenant.used_seconds_month,
+        renewal_at=tenant.renewal_at,
+    )
+    try:
+        _maybe_send_quota_email(tenant, quota, request=request)
+    except Exception as e:
+        logger.warning("[quota] notify error: %s", e)
+    return HTTPException(status_code=402, detail=payload)
+
+
+def record_tenant_usage_seconds(tenant_id: str, seconds: float, reserved: int = 0) -> int | None:
+    """Buffer a finished render's usage; the ledger flushes it to the DB in batches."""
     if seconds is None:
+        usage_ledger.release(tenant_id, reserved)
         return None
-    with tenant_session() as session:
-        tenant = get_tenant(session, tenant_id)
-        if not tenant:
-            logger.warning("[tenant] usage skip; missing tenant=%s", tenant_id)
-            return None
-        return record_usage_seconds(session, tenant, seconds)
+    return usage_ledger.record(tenant_id, seconds, reserved=reserved)
+
+
+def release_tenant_reservation(tenant_id: str | None, reserved: int) -> None:
+    """Give back a reservation from ensure_tenant_quota_ok when its render fails."""
+    if tenant_id and reserved:
+        usage_ledger.release(tenant_id, reserved)
 
 
 def mp3_duration_seconds(path: Path) -> int:
@@ -379,25 +520,12 @@ def estimate_seconds_from_text(text: str) -> int:
     return max(5, int(round(len(cleaned) / 15.0)))
 
 # --- rate limiting ---
-import time, collections
+import time
 
 RATE_LIMITS = {
     "per_ip":   (60, 60),   # 60 requests / 60s
     "per_tenant": (300, 60) # 300 requests / 60s
 }
-_ip_hits = collections.defaultdict(list)      # ip -> [timestamps]
-_tenant_hits = collections.defaultdict(list)  # tenant -> [timestamps]
-
-def _allow(counter: dict, key: str, limit: int, window_s: int) -> bool:
-    now = time.time()
-    arr = counter[key]
-    # drop old
-    while arr and now - arr[0] > window_s:
-        arr.pop(0)
-    if len(arr) >= limit:
-        return False
-    arr.append(now)
-    return True
 
 def _client_ip(request: Request) -> str:
     xf = request.headers.get("x-forwarded-for")
@@ -405,12 +533,26 @@ def _client_ip(request: Request) -> str:
 
 def rate_limit_check(request: Request, body: object | None = None):
     ip = _client_ip(request)
-    ok_ip = _allow(_ip_hits, ip, *RATE_LIMITS["per_ip"])
+    ok_ip, retry_ip = ratelimit.hit("ip", ip, *RATE_LIMITS["per_ip"])
     # tenant key (or 'public' if open mode)
     tenant = _extract_tenant_key(request, body=body) or "public"
-    ok_tenant = _allow(_tenant_hits, tenant, *RATE_LIMITS["per_tenant"])
+    ok_tenant, retry_tenant = ratelimit.hit("tenant", tenant, *RATE_LIMITS["per_tenant"])
     if not (ok_ip and ok_tenant):
-        raise HTTPException(status_code=429, detail="Rate limit exceeded. Please retry later.")
+        histogram.inc("ratelimit_rejections", scope="ip" if not ok_ip else "tenant")
+        retry_after = max(1, math.ceil(max(retry_ip, retry_tenant)))
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded. Please retry later.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+async def arate_limit_check(request: Request, body: object | None = None):
+    """rate_limit_check for async handlers; the shared SQLite store is hit off the event loop."""
+    if ratelimit.blocking():
+        await asyncio.to_thread(rate_limit_check, request, body)
+    else:
+        rate_limit_check(request, body)
 
 
 def check_and_increment_quota(tenant_id: str) -> None:
@@ -427,14 +569,12 @@ def check_and_increment_quota(tenant_id: str) -> None:
 # --- metrics setup ---
 METRICS_DIR = Path("metrics"); METRICS_DIR.mkdir(exist_ok=True)
 METRICS_FILE = METRICS_DIR / "streams.csv"
+_stream_writer = BufferedWriter("streams", METRICS_FILE, header="ts_ms,cache,ttfb_ms,bytes,model,hash")
 
 def write_stream_row(ts_ms: int, cache: str, ttfb_ms: int, bytes_total: int, model: str, key_hash: str):
-    is_new = not METRICS_FILE.exists()
-    with METRICS_FILE.open("a", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        if is_new:
-            w.writerow(["ts_ms","cache","ttfb_ms","bytes","model","hash"])
-        w.writerow([ts_ms, cache, ttfb_ms, bytes_total, model, key_hash])
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="").writerow([ts_ms, cache, ttfb_ms, bytes_total, model, key_hash])
+    _stream_writer.append(buf.getvalue())
 
 # --- config / env
 load_dotenv(".env")
@@ -528,9 +668,11 @@ async def tts_bytes(
     try:
         resp = await client.post(stream_url, headers=headers, json=payload, timeout=60.0)
     except Exception as e:
+        histogram.inc("provider_requests", mode="stream", status="error")
         print({"event": "tts_conn_fail", "err": str(e)[:300]})
         raise HTTPException(status_code=502, detail=f"TTS upstream connection failed: {e}")
 
+    histogram.inc("provider_requests", mode="stream", status=resp.status_code)
     if resp.status_code == 200 and resp.content:
         return resp.content
 
@@ -538,7 +680,9 @@ async def tts_bytes(
     print({"event": "tts_upstream_err", "status": resp.status_code, "body": body1})
 
     # --- non-stream fallback
+    histogram.inc("provider_retries", reason="nonstream_fallback")
     resp2 = await client.post(nonstream_url, headers=headers, json=payload, timeout=60.0)
+    histogram.inc("provider_requests", mode="nonstream", status=resp2.status_code)
     if resp2.status_code == 200 and resp2.content:
         print({"event": "tts_nonstream_ok"})
         return resp2.content
@@ -558,62 +702,56 @@ async def tts_bytes_with_fallback(
     model_id: str,
     tenant_key: str,
 ) -> bytes:
+    t0 = time.perf_counter()
     try:
-        return await tts_bytes(text, voice_id, model_id)
+        data = await tts_bytes(text, voice_id, model_id)
     except HTTPException as exc:
-        if _should_retry_default_voice(exc.status_code, str(exc.detail)):
-            fallback_voice = _default_voice_id()
-            if fallback_voice and fallback_voice != voice_id:
-                logger.warning("[tenant] voice fallback tenant=%s voice_id=%s", tenant_key, voice_id)
-                return await tts_bytes(text, fallback_voice, model_id)
-        raise
-
-# --- Simple, robust sentence chunker ---
-SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
-
-def chunk_by_sentence(s: str, target: int = 1200, hard_max: int = 1600) -> list[str]:
-    parts, cur, total = [], [], 0
-    for sent in re.split(SENTENCE_SPLIT, s):
-        sent = (sent or "").strip()
-        if not sent:
-            continue
-        if total + len(sent) > target and cur:
-            parts.append(" ".join(cur)); cur, total = [], 0
-        cur.append(sent); total += len(sent)
-        if total > hard_max:
-            parts.append(" ".join(cur)); cur, total = [], 0
-    if cur:
-        parts.append(" ".join(cur))
-    return parts
+        fallback_voice = _default_voice_id()
+        if not (
+            _should_retry_default_voice(exc.status_code, str(exc.detail))
+            and fallback_voice
+            and fallback_voice != voice_id
+        ):
+            raise
+        logger.warning("[tenant] voice fallback tenant=%s voice_id=%s", tenant_key, voice_id)
+        histogram.inc("voice_fallbacks", tier=_tier_label(tenant_key))
+        data = await tts_bytes(text, fallback_voice, model_id)
+    histogram.observe("tts_render_ms", (time.perf_counter() - t0) * 1000, model=model_id, tier=_tier_label(tenant_key))
+    return data
 
 @app.get("/read_chunked")
 async def read_chunked(request: Request, url: str, voice: str | None = None, model: str | None = None):
-    tenant_id, tenant = get_validated_tenant_record(request)
-    ensure_tenant_quota_ok(tenant_id, request=request)
+    tenant_id, tenant = await aget_validated_tenant_record(request)
+    # Refuse tenants already over quota before paying for the fetch and extraction;
+    # the reservation below needs the narration length.
+    await aensure_tenant_quota_ok(tenant_id, request=request)
     # 1) Extract & prepare
-    title, author, text = extract_article(url)
-    cleaned = preprocess_for_tts(text or "")
-    narration = prepare_article(title, author, cleaned)
+    title, author, text = await extract_article(url)
+    # Clean once up front; chunks split on sentence ends, so each part only needs its pauses.
+    narration = preprocess_for_tts(apply_pronunciations(prepare_article(title, author, text or ""), tenant))
 
     if not narration or len(narration.strip()) < 40:
         raise HTTPException(status_code=422, detail="No narratable text extracted from page")
 
-    parts = chunk_by_sentence(narration, target=900, hard_max=1300)
-    if not parts:
-        raise HTTPException(status_code=422, detail="No narratable chunks produced")
-
     v = resolve_tenant_voice_id(tenant)
     m = model or MODEL_ID
+    # Chunks are produced lazily: a short first one for fast first audio, then larger ones.
+    parts = iter_chunks(narration, m)
+    first_part = next(parts, None)
+    if not first_part:
+        raise HTTPException(status_code=422, detail="No narratable chunks produced")
+
     usage_seconds = estimate_seconds_from_text(narration)
+    reserved = (await aensure_tenant_quota_ok(tenant_id, request=request, reserve=usage_seconds))["reserved"]
 
     # 2) PREFETCH FIRST CHUNK to avoid 200/0B
     try:
-        first_text = enhance_prosody(preprocess_for_tts(parts[0]))
+        first_text = enhance_prosody(first_part)
         first_bytes = await tts_bytes_with_fallback(first_text, v, m, tenant_id)
-        if usage_seconds:
-            record_tenant_usage_seconds(tenant_id, usage_seconds)
+        record_tenant_usage_seconds(tenant_id, usage_seconds, reserved=reserved)
         print({"event": "chunk_ok", "i": 0, "bytes": len(first_bytes)})
     except Exception as e:
+        release_tenant_reservation(tenant_id, reserved)
         # Fail BEFORE starting the stream
         raise HTTPException(status_code=502, detail=f"First chunk failed: {e}")
 
@@ -621,9 +759,9 @@ async def read_chunked(request: Request, url: str, voice: str | None = None, mod
     async def multi():
         # first chunk we already have
         yield first_bytes
-        for i, part in enumerate(parts[1:], start=1):
+        for i, part in enumerate(parts, start=1):
             try:
-                part_text = enhance_prosody(preprocess_for_tts(part))
+                part_text = enhance_prosody(part)
                 data = await tts_bytes_with_fallback(part_text, v, m, tenant_id)
                 print({"event": "chunk_ok", "i": i, "bytes": len(data)})
                 yield data
@@ -653,6 +791,8 @@ app.add_middleware(
     allow_headers=["*"],
     allow_credentials=False,
 )
+# Outermost, so CORS preflights and error responses are counted too.
+app.add_middleware(prometheus.RequestMetrics)
 
 @app.get("/health")
 def health():
@@ -661,53 +801,14 @@ def health():
 app.mount("/static", StaticFiles(directory="static"), name="static")
 app.mount("/cache", StaticFiles(directory=str(CACHE_DIR)), name="cache")
 
-# --- simple preprocess to improve pauses & flow for TTS
+# --- simple preprocess to improve pauses & flow for TTS (rules live in app.text_norm)
 def preprocess_for_tts(text: str) -> str:
     """Cleanup to remove citations, IPA/pronunciation, and tidy spacing."""
-    t = text.replace("\r", "\n")
-
-    # Wikipedia-style citations like [1], and editorial tags
-    t = re.sub(r"\[\d+\]", "", t)
-    t = re.sub(r"\[(?:citation|clarification|verification)\s+needed\]", "", t, flags=re.I)
-
-    # Parenthetical pronunciation/IPA/listen asides e.g. (/ˈkæri/), (IPA: ...), (listen)
-    t = re.sub(r"\s*\((?:IPA[:\s]|pronunciation[:\s]|listen\b|/)[^)]*\)\s*", " ", t, flags=re.I)
-
-    # Strip non-story sections if present
-    t = re.split(r"\n(?:References|External links|See also)\n", t, maxsplit=1)[0]
-
-    # Bullets/newlines → sentences
-    t = re.sub(r"\n\s*[-•*]\s+", ". ", t)
-    t = re.sub(r"\n{2,}", ". ", t)
-    t = re.sub(r"(?<![.!?])\n(?!\n)", ". ", t)
-
-    # Spaces/punctuation tidy
-    t = re.sub(r"\s+([,.;:!?])", r"\1", t)
-    t = re.sub(r"([,.;:!?])(?=\S)", r"\1 ", t)
-    t = re.sub(r"\s{2,}", " ", t)
-    return t.strip()
+    return clean_for_tts(text)
 
 def enhance_prosody(raw: Optional[str]) -> str:
     """Lightly adjust whitespace and add gentle pauses for smoother narration."""
-    if not raw:
-        return ""
-
-    cleaned = raw.replace("\r", " ")
-    cleaned = re.sub(r"[ \t]+", " ", cleaned)
-    cleaned = re.sub(r"\n{3,}", "\n\n", cleaned).strip()
-
-    parts = re.split(r"(?<=[.!?])\s+", cleaned)
-    sentences = [s.strip() for s in parts if s.strip()]
-    if not sentences:
-        return cleaned
-
-    with_paragraphs: list[str] = []
-    for idx, s in enumerate(sentences):
-        with_paragraphs.append(s)
-        if (idx + 1) % 3 == 0 and idx != len(sentences) - 1:
-            with_paragraphs.append("")
-
-    return "\n".join(with_paragraphs)
+    return add_pauses(raw)
 
 # --- Robust fetch for /read
 UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124 Safari/537.36"
@@ -725,62 +826,130 @@ def normalize_url(u: str) -> str:
         u = "https://" + u
     return u
 
-def fetch_url(url: str, retries: int = 2, timeout: int = 15) -> str:
-    last_err = None
-    url = normalize_url(url)
-    hdrs = dict(BASE_HDRS)
-    hdrs["Referer"] = url
-    for i in range(retries + 1):
-        try:
-            r = http.get(url, headers=hdrs, timeout=timeout, allow_redirects=True)
-            if r.status_code in (403, 406) and "text/html" not in r.headers.get("Content-Type",""):
-                hdrs2 = dict(hdrs); hdrs2["Accept"] = "text/html,*/*;q=0.5"
-                r = http.get(url, headers=hdrs2, timeout=timeout, allow_redirects=True)
-            r.raise_for_status()
-            return r.text
-        except Exception as e:
-            last_err = e
-            time.sleep(0.6 * (i + 1))
-    raise HTTPException(status_code=502, detail=f"Fetch failed: {last_err}")
-
 # --- extract article cleanly (title, author, text)
-def extract_article(url: str) -> Tuple[str, str, str]:
-    """Return (title, author, text) using trafilatura with safe fallbacks."""
-    downloaded = trafilatura.fetch_url(url)
-    if not downloaded:
-        raise HTTPException(400, detail="Unable to fetch URL")
-
-    # Body text: prefer plain text (more reliable than output='json')
-    text = trafilatura.extract(
-        downloaded,
-        output="txt",
-        include_comments=False,
-        include_tables=False,
-        include_links=False,
-    ) or ""
-
-    # Metadata: be tolerant to missing/varied shapes
-    title = ""; author = ""
+async def extract_document_or_raise(html: str, url: str | None = None, favor_precision: bool = False) -> dict:
+    """Run the extraction pool and map its failures onto HTTP errors."""
     try:
-        md = extract_metadata(downloaded)
-        if md:
-            title = (getattr(md, "title", "") or "").strip()
-            a = getattr(md, "author", None) or getattr(md, "authors", None)
-            if isinstance(a, (list, tuple)):
-                author = ", ".join([x for x in a if x]).strip()
-            else:
-                author = (a or "").strip()
-    except Exception:
-        pass
+        return await extract_html(html, url=url, favor_precision=favor_precision)
+    except ExtractionTimeout:
+        raise HTTPException(504, detail="Article extraction timed out")
+    except Exception as e:
+        logger.warning("[extract] failed url=%s err=%s", url, e)
+        raise HTTPException(502, detail="Article extraction failed")
 
-    return title, author, text
+
+# Article fetches skip the no-cache headers so CDNs can answer conditional GETs with 304.
+ARTICLE_HDRS = {k: v for k, v in BASE_HDRS.items() if k not in ("Cache-Control", "Pragma")}
+READER_HDRS = {"User-Agent": "Mozilla/5.0 (ReaderBot)"}
+
+
+async def fetch_cached_document(
+    url: str,
+    extract,
+    *,
+    profile: str = "article",
+    headers: dict | None = None,
+    timeout: float = 15,
+    fetch_error_status: int = 502,
+    fetch_error_detail: str = "Fetch failed",
+) -> dict:
+    """
+    Fetch `url` and return its extracted document, reusing the URL-keyed cache.
+
+    Known URLs are revalidated with If-None-Match/If-Modified-Since; a 304 or an
+    unchanged body returns the stored document without running `extract`.
+    `extract(html, final_url)` is only awaited for new or changed pages.
+    """
+    key = extraction_cache.cache_key(url, profile)
+    entry = extraction_cache.get_entry(key)
+    hdrs = dict(headers or ARTICLE_HDRS)
+    hdrs.update(extraction_cache.conditional_headers(entry))
+    try:
+        r = await fetch_html(app.state.fetch_client, url, headers=hdrs, timeout=timeout)
+    except FetchRejected as e:
+        raise HTTPException(e.status, detail=e.detail)
+    except Exception as e:
+        logger.warning("[extract] fetch failed url=%s err=%s", url, e)
+        raise HTTPException(fetch_error_status, detail=fetch_error_detail)
+
+    etag = r.headers.get("etag")
+    last_modified = r.headers.get("last-modified")
+    if r.status_code == 304 and entry:
+        extraction_cache.touch_entry(entry, etag=etag, last_modified=last_modified)
+        extraction_cache.record("revalidated")
+        # Callers get their own copy; edits must not leak into the cached document.
+        return dict(entry["doc"])
+    if r.status_code != 200 or not r.text:
+        raise HTTPException(fetch_error_status, detail=fetch_error_detail)
+
+    html = r.text
+    digest = extraction_cache.body_digest(html)
+    if entry and entry.get("digest") == digest:
+        extraction_cache.touch_entry(entry, etag=etag, last_modified=last_modified)
+        extraction_cache.record("hits")
+        return dict(entry["doc"])
+
+    extraction_cache.record("misses")
+    t0 = time.perf_counter()
+    doc = await extract(html, str(r.url))
+    histogram.observe("extraction_ms", (time.perf_counter() - t0) * 1000, profile=profile)
+    if doc.get("text"):
+        # Drop the publisher's recurring plugs/footers before the document is cached.
+        doc["text"] = boilerplate.filter_text(str(r.url), doc["text"])
+        _maybe_snapshot_boilerplate()
+    extraction_cache.put_entry(key, doc, etag=etag, last_modified=last_modified, digest=digest)
+    return dict(doc)
+
+
+def _maybe_snapshot_boilerplate() -> None:
+    if boilerplate.snapshot_due():
+        asyncio.get_running_loop().run_in_executor(None, boilerplate.save)
+
+
+async def extract_article(url: str) -> Tuple[str, str, str]:
+    """Return (title, author, text) using trafilatura with safe fallbacks."""
+
+    async def _extract(html: str, final_url: str) -> dict:
+        # Body and metadata come from one parse in the extraction pool.
+        return await extract_document_or_raise(html, url=final_url)
+
+    doc = await fetch_cached_document(
+        normalize_url(url),
+        _extract,
+        fetch_error_status=400,
+        fetch_error_detail="Unable to fetch URL",
+    )
+    return doc["title"], doc["author"], doc["text"]
 
 # keep a single async HTTP client alive for connection reuse (lower TTFB)
 @app.on_event("startup")
 async def _startup():
     app.state.http_client = httpx.AsyncClient(timeout=httpx.Timeout(60.0))
+    # Publisher URLs come from users; this client only connects to vetted public IPs.
+    app.state.fetch_client = pinned_client(timeout=httpx.Timeout(15.0))
     app.state.locks = {}
     init_tenant_db()
+    try:
+        imported = import_json_stores(TENANT_STORE, NOTIFY_STORE)
+        if any(imported.values()):
+            logger.info("[tenant] imported legacy JSON stores %s", imported)
+    except Exception as e:
+        logger.warning("[tenant] legacy JSON store import failed: %s", e)
+    app.state.usage_flusher = asyncio.create_task(usage_ledger.run_flusher())
+    _stream_writer.start()
+    _analytics_writer.start()
+    app.state.analytics_import = asyncio.create_task(_import_legacy_analytics())
+    app.state.hist_publisher = asyncio.create_task(histogram.run_publisher())
+    app.state.stripe_events = asyncio.create_task(stripe_events.run_processor(_apply_stripe_event))
+    app.state.email_outbox = (
+        asyncio.create_task(outbox.run_worker(RESEND_API_KEY))
+        if outbox.enabled(RESEND_API_KEY, EMAIL_FROM)
+        else None
+    )
+    start_extraction_pool()
+    domains = boilerplate.load()
+    if domains:
+        logger.info("[boilerplate] loaded index for %s domains", domains)
     db_path = Path(os.getenv("TENANT_DB_PATH", "/cache/tenants.db"))
     db_exists = db_path.exists()
     cache_dir_exists = CACHE_ROOT.exists()
@@ -813,6 +982,39 @@ async def _list_routes():
 @app.on_event("shutdown")
 async def _shutdown():
     await app.state.http_client.aclose()
+    await app.state.fetch_client.aclose()
+    await shutdown_extraction_pool()
+    app.state.usage_flusher.cancel()
+    try:
+        await app.state.usage_flusher
+    except asyncio.CancelledError:
+        pass
+    app.state.hist_publisher.cancel()
+    try:
+        # Its cancellation path publishes and retires this worker's final counts.
+        await app.state.hist_publisher
+    except asyncio.CancelledError:
+        pass
+    app.state.stripe_events.cancel()
+    try:
+        await app.state.stripe_events
+    except asyncio.CancelledError:
+        pass
+    if app.state.email_outbox is not None:
+        app.state.email_outbox.cancel()
+        try:
+            await app.state.email_outbox
+        except asyncio.CancelledError:
+            pass
+    await tenant_store_async.dispose()
+    await asyncio.to_thread(boilerplate.save)
+    app.state.analytics_import.cancel()
+    try:
+        await app.state.analytics_import
+    except asyncio.CancelledError:
+        pass
+    await _stream_writer.stop()
+    await _analytics_writer.stop()
 
 # --- simple PNA preflight helper (FastAPI's CORS doesn't add this header yet)
 @app.options("/{path:path}")
@@ -825,77 +1027,11 @@ async def preflight(req: Request, path: str):
     }
     return Response(status_code=204, headers=headers)
 
-# --- chunk by sentence
-def chunk_by_sentence(s: str, target: int = 1200, hard_max: int = 1600) -> list[str]:
-    parts, cur, total = [], [], 0
-    for sent in re.split(r"(?<=[.!?])\s+", s):
-        if not sent:
-            continue
-        if total + len(sent) > target and cur:
-            parts.append(" ".join(cur)); cur, total = [], 0
-        cur.append(sent); total += len(sent)
-        if total > hard_max:
-            parts.append(" ".join(cur)); cur, total = [], 0
-    if cur:
-        parts.append(" ".join(cur))
-    return parts
-
-@app.get("/read_chunked")
-async def read_chunked(request: Request, url: str, voice: str | None = None, model: str | None = None):
-    tenant_id, tenant = get_validated_tenant_record(request)
-    ensure_tenant_quota_ok(tenant_id, request=request)
-    title, author, text = extract_article(url)
-    narration = prepare_article(title, author, preprocess_for_tts(text))
-    parts = chunk_by_sentence(narration, target=1200, hard_max=1600)
-    usage_seconds = estimate_seconds_from_text(narration)
-    usage_recorded = False
-    voice_id = resolve_tenant_voice_id(tenant)
-
-    async def multi():
-        nonlocal usage_recorded
-        for i, part in enumerate(parts):
-            try:
-                async for b in stream_bytes_for_text_safe(
-                    part, voice_id, model or MODEL_ID
-                ):
-                    if b:
-                        if usage_seconds and not usage_recorded:
-                            record_tenant_usage_seconds(tenant_id, usage_seconds)
-                            usage_recorded = True
-                        yield b
-            except Exception as e:
-                if _should_retry_default_voice(None, str(e)):
-                    fallback_voice = _default_voice_id()
-                    if fallback_voice and fallback_voice != voice_id:
-                        logger.warning("[tenant] voice fallback tenant=%s voice_id=%s", tenant_id, voice_id)
-                        try:
-                            async for b in stream_bytes_for_text_safe(
-                                part, fallback_voice, model or MODEL_ID
-                            ):
-                                if b:
-                                    if usage_seconds and not usage_recorded:
-                                        record_tenant_usage_seconds(tenant_id, usage_seconds)
-                                        usage_recorded = True
-                                    yield b
-                            continue
-                        except Exception as retry_err:
-                            print({"event": "chunk_fail", "i": i, "err": str(retry_err)[:200]})
-                            break
-                # Log, then stop or continue; do NOT raise after streaming started
-                print({"event": "chunk_fail", "i": i, "err": str(e)[:200]})
-                break  # or `continue` to try next part
-
-    return StreamingResponse(multi(), media_type="audio/mpeg", headers={"X-AIL-Tenant": tenant_id})
-
-
-
-
-
-
 # --- metrics API (admin)
 @app.get("/admin/metrics.json")
 async def metrics_json(request: Request, n: int = Query(200, ge=1, le=5000)):
     _require_admin_secret(request)
+    await asyncio.to_thread(_stream_writer.flush)
     file_path = Path("metrics/streams.csv")
     if not file_path.exists():
         return {"rows": []}
@@ -911,10 +1047,11 @@ async def metrics_json(request: Request, n: int = Query(200, ge=1, le=5000)):
     except Exception as e:
         raise HTTPException(500, f"metrics read error: {e}")
 
-# --- analytics tracking (JSONL, internal-only) ---
+# --- analytics tracking (day-partitioned JSONL + rollups, internal-only) ---
+# Legacy single-file log; split into analytics_store segments once at startup.
 ANALYTICS_JSONL = (CACHE_ROOT / "analytics.jsonl").resolve()
 ANALYTICS_EVENTS = {"click_listen", "play_complete", "cache_hit", "cache_miss"}
-_analytics_lock = Lock()
+_analytics_writer = AnalyticsWriter("analytics", analytics_store.ANALYTICS_DIR)
 
 
 class AnalyticsEvent(BaseModel):
@@ -962,13 +1099,16 @@ def _append_analytics_event(
         "page_url": page_url or "",
         "referrer": referrer or "",
     }
+    _analytics_writer.append(record)
+
+
+async def _import_legacy_analytics() -> None:
     try:
-        with _analytics_lock:
-            with ANALYTICS_JSONL.open("a", encoding="utf-8") as f:
-                f.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False))
-                f.write("\n")
+        imported = await asyncio.to_thread(analytics_store.import_legacy, ANALYTICS_JSONL, _analytics_writer)
+        if imported:
+            logger.info("[analytics] split legacy log into day segments events=%s", imported)
     except Exception as e:
-        logger.warning("analytics write failed: %s", e)
+        logger.warning("[analytics] legacy import failed: %s", e)
 
 
 @app.post("/metric")
@@ -984,39 +1124,6 @@ def metric(req: AnalyticsEvent, request: Request):
     return {"ok": True}
 
 
-def _iter_analytics(since_ts: int, tenant: str | None):
-    if not ANALYTICS_JSONL.exists():
-        return
-    with ANALYTICS_JSONL.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-            except Exception:
-                continue
-            try:
-                ts = int(obj.get("ts") or 0)
-            except Exception:
-                ts = 0
-            if since_ts and ts < since_ts:
-                continue
-            tenant_val = obj.get("tenant") or ""
-            if tenant and tenant_val != tenant:
-                continue
-            ev = (obj.get("event") or "").strip().lower()
-            if ev not in ANALYTICS_EVENTS:
-                continue
-            yield {
-                "ts": ts,
-                "event": ev,
-                "tenant": tenant_val,
-                "page_url": obj.get("page_url") or "",
-                "referrer": obj.get("referrer") or "",
-            }
-
-
 @app.get("/admin/analytics_summary.json")
 def analytics_summary_admin(
     request: Request,
@@ -1024,22 +1131,29 @@ def analytics_summary_admin(
     tenant: Optional[str] = Query(None),
 ):
     _require_admin_secret(request)
+    _analytics_writer.flush()
     now_ms = int(time.time() * 1000)
     since_ts = now_ms - int(days * 86400 * 1000)
+    # Rollups are per UTC day, so the range covers the whole of its first day.
+    since_day = analytics_store.day_of(since_ts)
     totals = {ev: 0 for ev in ANALYTICS_EVENTS}
     by_tenant: dict[str, dict[str, int]] = {}
-    for rec in _iter_analytics(since_ts, tenant):
-        ev = rec["event"]
-        tenant_val = rec["tenant"] or ""
-        totals[ev] = totals.get(ev, 0) + 1
+    for tenant_val, ev, n in analytics_store.totals(since_day, tenant):
+        if ev not in ANALYTICS_EVENTS:
+            continue
+        totals[ev] = totals.get(ev, 0) + n
         if tenant_val:
             bucket = by_tenant.setdefault(tenant_val, {k: 0 for k in ANALYTICS_EVENTS})
-            bucket[ev] = bucket.get(ev, 0) + 1
+            bucket[ev] = bucket.get(ev, 0) + n
     return {
         "range_days": days,
         "since_ts": since_ts,
+        "since_day": since_day,
         "totals": totals,
         "by_tenant": by_tenant,
+        "top_pages": [
+            {"page_url": page, "count": n} for page, n in analytics_store.top_pages(since_day, tenant)
+        ],
     }
 
 
@@ -1050,21 +1164,15 @@ def analytics_csv_admin(
     tenant: Optional[str] = Query(None),
 ):
     _require_admin_secret(request)
+    _analytics_writer.flush()
     now_ms = int(time.time() * 1000)
-    since_ts = now_ms - int(days * 86400 * 1000)
-    counts: dict[tuple[str, str, str], int] = {}
-    for rec in _iter_analytics(since_ts, tenant):
-        try:
-            date_key = datetime.fromtimestamp(rec["ts"] / 1000, timezone.utc).date().isoformat()
-        except Exception:
-            continue
-        key = (date_key, rec["tenant"] or "", rec["event"])
-        counts[key] = counts.get(key, 0) + 1
+    since_day = analytics_store.day_of(now_ms - int(days * 86400 * 1000))
     output = io.StringIO()
     writer = csv.writer(output)
     writer.writerow(["date", "tenant", "event", "count"])
-    for (date_key, tnt, ev), count in sorted(counts.items()):
-        writer.writerow([date_key, tnt, ev, count])
+    for date_key, tnt, ev, count in analytics_store.daily_counts(since_day, tenant):
+        if ev in ANALYTICS_EVENTS:
+            writer.writerow([date_key, tnt, ev, count])
     return Response(content=output.getvalue(), media_type="text/csv")
 
 
@@ -1083,6 +1191,10 @@ class TenantVoiceRequest(BaseModel):
     voice_id: str | None = None
     voice_name: str | None = None
 
+class TenantPronunciationsRequest(BaseModel):
+    tenant_key: str | None = None
+    pronunciations: dict[str, str] = {}
+
 
 @app.post("/admin/tenants", response_model=None)
 def create_tenant_admin(
@@ -1146,6 +1258,7 @@ def create_tenant_admin(
             "embed_snippet": embed_snippet,
         }
 
+    tenant_cache.invalidate(response["public_site_key"])
     return response
 
 
@@ -1174,6 +1287,7 @@ def set_tenant_voice_admin(
         if body.voice_name is not None:
             tenant.voice_name = voice_name or None
         tenant.updated_at = datetime.now(timezone.utc)
+    tenant_cache.invalidate(tenant_key)
 
     response = {"ok": True, "tenant_key": tenant_key, "voice_id": voice_id}
     if voice_name:
@@ -1181,12 +1295,43 @@ def set_tenant_voice_admin(
     return response
 
 
+@app.post("/admin/tenants/set_pronunciations")
+def set_tenant_pronunciations_admin(
+    request: Request,
+    body: TenantPronunciationsRequest,
+):
+    _require_admin_secret(request)
+
+    tenant_key = (body.tenant_key or "").strip()
+    if not tenant_key:
+        raise HTTPException(status_code=400, detail="tenant_key is required")
+    # Round-trip through the parser so what we store is exactly what gets applied.
+    entries = parse_pronunciations(json.dumps(body.pronunciations or {}))
+    lexicon = Lexicon(entries)
+    if lexicon.rejected:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Entries must contain at least one word.", "rejected": lexicon.rejected},
+        )
+
+    with tenant_session() as session:
+        tenant = get_tenant(session, tenant_key)
+        if not tenant:
+            raise HTTPException(status_code=404, detail="Tenant not found")
+        tenant.pronunciations = json.dumps(entries, ensure_ascii=False, sort_keys=True) if entries else None
+        tenant.updated_at = datetime.now(timezone.utc)
+    tenant_cache.invalidate(tenant_key)
+
+    return {"ok": True, "tenant_key": tenant_key, "entries": len(lexicon)}
+
+
 @app.get("/admin/tenants/list")
 def list_tenants_admin(
     request: Request,
     limit: int = Query(25, ge=1, le=100),
     search: str | None = Query(None),
     full: int = Query(0, ge=0, le=1),
+    cursor: str | None = Query(None),
 ):
     _require_admin_secret(request)
 
@@ -1198,20 +1343,12 @@ def list_tenants_admin(
     #         -d "{\"tenant_key\":\"$key\"}" "$API/admin/tenants/delete"
     #     done
 
-    search_term = (search or "").strip().lower()
+    # Pages are keyed on (created_at, tenant_key); pass next_cursor back as ?cursor= for the next page.
+    after = decode_page_cursor(cursor)
+    if cursor and after is None:
+        raise HTTPException(status_code=400, detail="invalid cursor")
     with tenant_session() as session:
-        query = session.query(Tenant)
-        if search_term:
-            like = f"%{search_term}%"
-            query = query.filter(
-                or_(
-                    Tenant.stripe_customer_id.ilike(like),
-                    Tenant.stripe_subscription_id.ilike(like),
-                    Tenant.contact_email.ilike(like),
-                    Tenant.allowed_domains.ilike(like),
-                )
-            )
-        tenants = query.order_by(Tenant.created_at.desc()).limit(limit).all()
+        tenants = tenant_page(session, limit, after, search)
 
     results = []
     for tenant in tenants:
@@ -1234,7 +1371,8 @@ def list_tenants_admin(
         }
         results.append(item)
 
-    return {"tenants": results}
+    next_cursor = encode_page_cursor(tenants[-1]) if len(tenants) == limit else None
+    return {"tenants": results, "next_cursor": next_cursor}
 
 # Smoke test:
 # curl -s -H "x-admin-secret: $ADMIN_SECRET" -H "content-type: application/json" \
@@ -1259,6 +1397,7 @@ def delete_tenant_admin(
         if not tenant:
             raise HTTPException(status_code=404, detail="Tenant not found")
         session.delete(tenant)
+    tenant_cache.invalidate(tenant_key)
 
     delete_tenant(tenant_key)
 
@@ -1272,6 +1411,7 @@ def tenant_admin(
 ):
     _require_admin_secret(request)
 
+    usage_ledger.flush(tenant_key)
     with tenant_session() as session:
         tenant = get_tenant(session, tenant_key)
 
@@ -1424,13 +1564,15 @@ async def tts_get(
     speaker_boost: bool = Query(True),
     opt_latency: int = Query(2),
 ):
-    tenant_id, tenant = get_validated_tenant_record(request)
-    rate_limit_check(request)
+    tenant_id, tenant = await aget_validated_tenant_record(request)
+    await arate_limit_check(request)
     v = resolve_tenant_voice_id(tenant)
     if not v:
         raise HTTPException(status_code=400, detail="Voice not provided (and ELEVENLABS_VOICE/VOICE_ID not set).")
-    return stream_with_cache(
-        text,
+    # stream_with_cache is sync (quota DB check, upstream request); keep it off the event loop.
+    return await asyncio.to_thread(
+        stream_with_cache,
+        apply_pronunciations(text, tenant),
         v,
         model or MODEL_ID,
         stability,
@@ -1458,7 +1600,7 @@ def tts_post(
     if not v:
         raise HTTPException(status_code=400, detail="Voice not provided (and ELEVENLABS_VOICE/VOICE_ID not set).")
     return stream_with_cache(
-        body.text,
+        apply_pronunciations(body.text, tenant),
         v,
         model or MODEL_ID,
         stability,
@@ -1483,8 +1625,9 @@ async def api_tts(
     speaker_boost: bool = Query(True),
     opt_latency: int = Query(0),
 ):
-    tenant_id, tenant = get_validated_tenant_record(request, body=body)
-    rate_limit_check(request, body=body)
+    t_start = time.perf_counter()
+    tenant_id, tenant = await aget_validated_tenant_record(request, body=body)
+    await arate_limit_check(request, body=body)
     page_url = request.query_params.get("url") or request.headers.get("referer", "") or ""
     referrer = request.headers.get("referer", "") or ""
 
@@ -1492,17 +1635,30 @@ async def api_tts(
     if not v:
         raise HTTPException(400, "Voice not provided (and ELEVENLABS_VOICE/VOICE_ID not set).")
 
-    # Normalize and (optionally) cap for safety
-    narrated = prepare_article("", "", body.text or "")
-    clean    = preprocess_for_tts(narrated)[:MAX_CHARS]
-    text_for_tts = enhance_prosody(clean)
-
-    key  = _cache_key(text_for_tts, v, (model or MODEL_ID), stability, similarity, style, speaker_boost, opt_latency)
+    # Normalize and (optionally) cap for safety; repeat bodies skip this via the key memo.
+    def _prepare(raw: str) -> str:
+        narrated = apply_pronunciations(prepare_article("", "", raw), tenant)
+        return enhance_prosody(preprocess_for_tts(narrated)[:MAX_CHARS])
+
+    model_id = model or MODEL_ID
+    settings = (stability, similarity, style, speaker_boost, opt_latency)
+    raw_text = body.text or ""
+    key, text_for_tts = memo_cache_key(
+        "api_tts",
+        raw_text,
+        (v, model_id, *settings, pronunciation_tag(tenant)),
+        _prepare,
+        lambda t: _cache_key(t, v, model_id, *settings),
+    )
     outp = _mp3_path(key)
 
     # If file exists & non-empty -> HIT
     if outp.exists() and outp.stat().st_size > 0:
         _append_analytics_event("cache_hit", tenant_id, page_url=page_url, referrer=referrer)
+        histogram.inc("tts_cache_requests", result="hit", tier=tenant.plan_tier)
+        histogram.observe(
+            "cache_hit_serve_ms", (time.perf_counter() - t_start) * 1000, model=model_id, tier=tenant.plan_tier
+        )
         return {
             "audioUrl": public_url(f"/cache/{outp.name}"),
             "hit": True,
@@ -1516,17 +1672,25 @@ async def api_tts(
         # re-check after awaiting
         if outp.exists() and outp.stat().st_size > 0:
             _append_analytics_event("cache_hit", tenant_id, page_url=page_url, referrer=referrer)
+            histogram.inc("tts_cache_requests", result="hit", tier=tenant.plan_tier)
             return {
                 "audioUrl": public_url(f"/cache/{outp.name}"),
                 "hit": True,
                 "duration": mp3_duration_seconds(outp) or None,
             }
 
+        histogram.inc("tts_cache_requests", result="miss", tier=tenant.plan_tier)
+        if text_for_tts is None:
+            text_for_tts = _prepare(raw_text)
         # Quota check is done right before a new render to avoid burning credits on rejects.
-        quota_state = ensure_tenant_quota_ok(tenant_id, request=request)
+        quota_state = await aensure_tenant_quota_ok(
+            tenant_id, request=request, reserve=estimate_seconds_from_text(text_for_tts)
+        )
+        reserved = quota_state["reserved"]
         try:
-            data = await tts_bytes_with_fallback(text_for_tts, v, (model or MODEL_ID), tenant_id)
+            data = await tts_bytes_with_fallback(text_for_tts, v, model_id, tenant_id)
         except Exception as e:
+            release_tenant_reservation(tenant_id, reserved)
             raise HTTPException(status_code=502, detail=f"Provider error: {e}")
 
         tmp = outp.with_suffix(".part")
@@ -1536,8 +1700,7 @@ async def api_tts(
     duration = mp3_duration_seconds(outp)
     if not duration:
         duration = estimate_seconds_from_text(text_for_tts)
-    if duration:
-        record_tenant_usage_seconds(tenant_id, duration)
+    record_tenant_usage_seconds(tenant_id, duration, reserved=reserved)
     _append_analytics_event("cache_miss", tenant_id, page_url=page_url, referrer=referrer)
 
     return {
@@ -1582,32 +1745,35 @@ def debug_config():
 @app.get("/read")
 async def read(request: Request, url: str, voice: str | None = None, model: str | None = None):
     # sanity: key/voice present
-    tenant_id, tenant = get_validated_tenant_record(request)
-    ensure_tenant_quota_ok(tenant_id, request=request)
+    tenant_id, tenant = await aget_validated_tenant_record(request)
     if not API_KEY:
         raise HTTPException(status_code=500, detail="ELEVENLABS_API_KEY is missing")
     v = resolve_tenant_voice_id(tenant)
     if not v:
         raise HTTPException(status_code=400, detail="voice id is required (dataset.voice or VOICE_ID)")
 
+    # Refuse tenants already over quota before paying for the fetch and extraction;
+    # the reservation below needs the narration length.
+    await aensure_tenant_quota_ok(tenant_id, request=request)
     # 1) Extract + prepare
-    title, author, text = extract_article(url)
-    cleaned = preprocess_for_tts(text or "")
+    title, author, text = await extract_article(url)
+    cleaned = preprocess_for_tts(apply_pronunciations(text or "", tenant))
     narration = prepare_article(title, author, cleaned)
     if not narration or len(narration.strip()) < 40:
         raise HTTPException(status_code=422, detail="No narratable text extracted from page")
 
-    # 2) Safe sentence chunks (small enough to never 502)
-    parts = chunk_by_sentence(narration, target=900, hard_max=1200)
-    if not parts:
-        raise HTTPException(status_code=422, detail="No narratable chunks produced")
+    est = estimate_seconds_from_text(narration)
+    reserved = (await aensure_tenant_quota_ok(tenant_id, request=request, reserve=est))["reserved"]
 
-    # 3) Fetch each part to BYTES and concat
+    # 2) Safe sentence chunks (small enough to never 502), produced as we go
     m = model or MODEL_ID
+    parts = iter_chunks(narration, m, max_chars=1200)
+
+    # 3) Fetch each part to BYTES and concat
     bufs: list[bytes] = []
     for i, part in enumerate(parts):
         try:
-            processed_part = enhance_prosody(preprocess_for_tts(part))
+            processed_part = normalize_for_tts(part)
             audio = await tts_bytes_with_fallback(processed_part, v, m, tenant_id)
             bufs.append(audio)
             print({"event":"read_part_ok","i":i,"bytes":len(audio)})
@@ -1618,37 +1784,12 @@ async def read(request: Request, url: str, voice: str | None = None, model: str
 
     merged = b"".join(bufs)
     if not merged:
+        release_tenant_reservation(tenant_id, reserved)
         raise HTTPException(status_code=502, detail="Upstream produced no audio for any chunk")
-    est = estimate_seconds_from_text(narration)
-    if est:
-        record_tenant_usage_seconds(tenant_id, est)
+    record_tenant_usage_seconds(tenant_id, est, reserved=reserved)
 
     return Response(content=merged, media_type="audio/mpeg")
 
-# --- extract
-def is_public_http_url(u:str)->bool:
-    try:
-        p=urlparse(u)
-        if p.scheme not in ("http","https"): return False
-        # block local/lan
-        host=p.hostname or ""
-        if host.endswith((".local",".lan")) or host in ("localhost","127.0.0.1"): return False
-        # resolve and block private/link-local/multicast/broadcast
-        try:
-            infos = socket.getaddrinfo(host, None)
-            for fam,_,_,_,sockaddr in infos:
-                ip = sockaddr[0]
-                ip_obj = ipaddress.ip_address(ip)
-                if (
-                    ip_obj.is_private or ip_obj.is_loopback or ip_obj.is_link_local or
-                    ip_obj.is_multicast or ip_obj.is_reserved
-                ):
-                    return False
-        except Exception:
-            return False
-        return True
-    except: return False
-
 async def stream_tts_for_text(
     text: str,
     voice_id: str = VOICE_ID,
@@ -1670,7 +1811,7 @@ async def stream_tts_for_text(
 
     url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream"
     headers = {"xi-api-key": API_KEY, "Accept": "audio/mpeg", "Content-Type": "application/json"}
-    prepared_text = enhance_prosody(preprocess_for_tts(text))
+    prepared_text = normalize_for_tts(text)
 
     payload = {
         "text": prepared_text,
@@ -1756,9 +1897,18 @@ metrics = {
     "tts_errors": 0,
     "tts_cache_hits": 0,
     "tts_cache_misses": 0,
-    "tts_first_byte_ms": [],
 }
 
+
+def _tier_label(tenant_id: str | None) -> str:
+    """Plan tier for metric labels, from the tenant cache only (never a DB read)."""
+    if not tenant_id:
+        return "public"
+    entry = tenant_cache.peek(tenant_id)
+    if entry is None or entry.tenant is None:
+        return "unknown"
+    return entry.tenant.plan_tier or "unknown"
+
 def _cache_inventory():
     total = 0
     items = []
@@ -1824,103 +1974,122 @@ def stream_with_cache(
       - never-raise-after-yield (avoid 'response already started' runtime error)
       - write-through cache with budget eviction
     """
+    t_start = time.perf_counter()
     metrics["tts_requests"] += 1
-    clean = preprocess_for_tts(text)
-    tts_input = enhance_prosody(clean)
+    tts_input = normalize_for_tts(text)
+    tier = _tier_label(tenant_id)
 
     key  = _cache_key(tts_input, voice, model, stability, similarity, style, speaker_boost, opt_latency)
     path = os.path.join(CACHE_DIR, f"{key}.mp3")
     if os.path.exists(path):
         metrics["tts_cache_hits"] += 1
+        histogram.inc("tts_cache_requests", result="hit", tier=tier)
         dur = mp3_duration_seconds(Path(path))
         headers = {"X-Cache": "HIT"}
         if dur:
             headers["X-AIL-Duration"] = str(dur)
         write_stream_row(int(time.time()*1000), "HIT", 0, os.path.getsize(path), model, os.path.basename(path).split(".")[0])
+        histogram.observe("cache_hit_serve_ms", (time.perf_counter() - t_start) * 1000, model=model, tier=tier)
         return FileResponse(path, media_type="audio/mpeg", headers=headers)
 
     metrics["tts_cache_misses"] += 1
+    histogram.inc("tts_cache_requests", result="miss", tier=tier)
     quota_state = None
+    reserved = 0
     if tenant_id:
-        quota_state = ensure_tenant_quota_ok(tenant_id)
-
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice}/stream"
-    headers = {
-        "xi-api-key": os.environ.get("ELEVENLABS_API_KEY", ""),
-        "Accept": "audio/mpeg",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "text": tts_input,
-        "model_id": model,
-        "optimize_streaming_latency": int(opt_latency),
-        "voice_settings": {
-            "stability": float(stability),
-            "similarity_boost": float(similarity),
-            "style": float(style),
-            "use_speaker_boost": bool(speaker_boost),
-        },
-    }
+        quota_state = ensure_tenant_quota_ok(tenant_id, reserve=estimate_seconds_from_text(tts_input))
+        reserved = quota_state["reserved"]
 
+    # Until the stream is handed over, any failure gives the reservation back.
     try:
-        r = http.post(url, headers=headers, json=payload, stream=True, timeout=60)
-    except Exception as e:
-        metrics["tts_errors"] += 1
-        raise HTTPException(status_code=502, detail=f"Upstream connection failed: {e}")
+        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice}/stream"
+        headers = {
+            "xi-api-key": os.environ.get("ELEVENLABS_API_KEY", ""),
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+        }
+        payload = {
+            "text": tts_input,
+            "model_id": model,
+            "optimize_streaming_latency": int(opt_latency),
+            "voice_settings": {
+                "stability": float(stability),
+                "similarity_boost": float(similarity),
+                "style": float(style),
+                "use_speaker_boost": bool(speaker_boost),
+            },
+        }
 
-    if r.status_code in (401, 402, 429):
-        metrics["tts_errors"] += 1
-        raise HTTPException(status_code=429, detail=f"Upstream TTS error {r.status_code}. Check key/credits/limits.")
-    if r.status_code != 200:
-        body = ""
         try:
-            body = r.text or ""
-        except Exception:
+            r = http.post(url, headers=headers, json=payload, stream=True, timeout=60)
+        except Exception as e:
+            metrics["tts_errors"] += 1
+            histogram.inc("provider_requests", mode="stream", status="error")
+            raise HTTPException(status_code=502, detail=f"Upstream connection failed: {e}")
+        histogram.inc("provider_requests", mode="stream", status=r.status_code)
+
+        if r.status_code in (401, 402, 429):
+            metrics["tts_errors"] += 1
+            raise HTTPException(status_code=429, detail=f"Upstream TTS error {r.status_code}. Check key/credits/limits.")
+        if r.status_code != 200:
             body = ""
-        if allow_fallback and tenant_id and _should_retry_default_voice(r.status_code, body):
-            fallback_voice = _default_voice_id()
-            if fallback_voice and fallback_voice != voice:
-                logger.warning("[tenant] voice fallback tenant=%s voice_id=%s", tenant_id, voice)
-                r.close()
-                return stream_with_cache(
-                    text,
-                    fallback_voice,
-                    model,
-                    stability,
-                    similarity,
-                    style,
-                    speaker_boost,
-                    opt_latency,
-                    tenant_id=tenant_id,
-                    allow_fallback=False,
-                )
-    try:
-        r.raise_for_status()
-    except Exception as e:
-        metrics["tts_errors"] += 1
-        raise HTTPException(status_code=502, detail=f"TTS upstream error: {e}")
-
-    start = time.time()
-    chunk_iter = r.iter_content(32 * 1024)
-    first_chunk = None
-    try:
-        for c in chunk_iter:
-            if c:
-                first_chunk = c
-                metrics["tts_first_byte_ms"].append(int((time.time() - start) * 1000))
-                break
-    except Exception as e:
-        metrics["tts_errors"] += 1
-        raise HTTPException(status_code=502, detail=f"TTS fetch failed before first audio: {e}")
+            try:
+                body = r.text or ""
+            except Exception:
+                body = ""
+            if allow_fallback and tenant_id and _should_retry_default_voice(r.status_code, body):
+                fallback_voice = _default_voice_id()
+                if fallback_voice and fallback_voice != voice:
+                    logger.warning("[tenant] voice fallback tenant=%s voice_id=%s", tenant_id, voice)
+                    histogram.inc("voice_fallbacks", tier=tier)
+                    r.close()
+                    release_tenant_reservation(tenant_id, reserved)
+                    reserved = 0
+                    return stream_with_cache(
+                        text,
+                        fallback_voice,
+                        model,
+                        stability,
+                        similarity,
+                        style,
+                        speaker_boost,
+                        opt_latency,
+                        tenant_id=tenant_id,
+                        allow_fallback=False,
+                    )
+        try:
+            r.raise_for_status()
+        except Exception as e:
+            metrics["tts_errors"] += 1
+            raise HTTPException(status_code=502, detail=f"TTS upstream error: {e}")
 
-    if not first_chunk:
-        metrics["tts_errors"] += 1
-        raise HTTPException(status_code=502, detail="Upstream produced no audio.")
+        start = time.time()
+        chunk_iter = r.iter_content(32 * 1024)
+        first_chunk = None
+        first_byte_ms = 0
+        try:
+            for c in chunk_iter:
+                if c:
+                    first_chunk = c
+                    first_byte_ms = int((time.time() - start) * 1000)
+                    histogram.observe("tts_first_byte_ms", first_byte_ms, model=model, tier=tier)
+                    break
+        except Exception as e:
+            metrics["tts_errors"] += 1
+            raise HTTPException(status_code=502, detail=f"TTS fetch failed before first audio: {e}")
+
+        if not first_chunk:
+            metrics["tts_errors"] += 1
+            raise HTTPException(status_code=502, detail="Upstream produced no audio.")
+    except BaseException:
+        release_tenant_reservation(tenant_id, reserved)
+        raise
 
     tmp = path + ".part"
 
     def gen():
         complete = False
+        settled = False
         try:
             with open(tmp, "wb") as f:
                 f.write(first_chunk)
@@ -1932,11 +2101,12 @@ def stream_with_cache(
                     yield c
             os.replace(tmp, path)
             complete = True
+            histogram.observe("tts_render_ms", (time.perf_counter() - t_start) * 1000, model=model, tier=tier)
             enforce_cache_budget()
             write_stream_row(
                 int(time.time()*1000),
                 "MISS",
-                metrics["tts_first_byte_ms"][-1] if metrics["tts_first_byte_ms"] else 0,
+                first_byte_ms,
                 os.path.getsize(path),
                 model,
                 key
@@ -1945,8 +2115,8 @@ def stream_with_cache(
                 duration = mp3_duration_seconds(Path(path))
                 if not duration:
                     duration = estimate_seconds_from_text(tts_input)
-                if duration:
-                    record_tenant_usage_seconds(tenant_id, duration)
+                record_tenant_usage_seconds(tenant_id, duration, reserved=reserved)
+                settled = True
         except Exception:
             try:
                 if not complete and os.path.exists(tmp):
@@ -1954,6 +2124,10 @@ def stream_with_cache(
             except:
                 pass
             return
+        finally:
+            # Client disconnects and upstream errors mid-stream end up here too.
+            if not settled:
+                release_tenant_reservation(tenant_id, reserved)
 
     return StreamingResponse(gen(), media_type="audio/mpeg", headers={"X-Cache": "MISS"})
 
@@ -1973,6 +2147,79 @@ def _mp3_path(key: str) -> Path:
     return CACHE_DIR / f"{key}.mp3"
 
 
+# --- raw input -> cache key memo
+# The widget posts the same article body on every click. Keying the memo on a digest of
+# the raw request lets a repeat resolve its audio path with one hash; normalization
+# only runs on a memo miss (or when the audio has to be rendered).
+KEY_MEMO_SIZE = int(os.getenv("KEY_MEMO_SIZE", "4096"))
+_key_memo = LRU(KEY_MEMO_SIZE)
+_key_memo_lock = Lock()
+key_memo_stats = {"hits": 0, "misses": 0}
+
+
+def _raw_digest(namespace: str, raw: str, params: tuple) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    h.update(namespace.encode())
+    h.update(b"\x1f")
+    h.update(repr(params).encode("utf-8"))
+    h.update(b"\x1f")
+    h.update((raw or "").encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+def memo_cache_key(namespace: str, raw: str, params: tuple, prepare, make_key):
+    """
+    Return (key, prepared) for `raw`.
+
+    `prepare(raw)` normalizes the text and `make_key(prepared)` derives the cache key.
+    `params` must hold everything else the key depends on (voice, model, settings, tenant).
+    On a memo hit `prepared` is None; call `prepare(raw)` if the audio still has to be rendered.
+    """
+    digest = _raw_digest(namespace, raw, params)
+    with _key_memo_lock:
+        memo = _key_memo.get(digest)
+        if memo is not None:
+            _key_memo.move_to_end(digest)
+            key_memo_stats["hits"] += 1
+            return memo, None
+    prepared = prepare(raw)
+    key = make_key(prepared)
+    with _key_memo_lock:
+        _key_memo.put(digest, key)
+        key_memo_stats["misses"] += 1
+    return key, prepared
+
+
+# --- per-tenant pronunciation lexicon (written form -> spoken form), applied before hashing
+_tenant_lexicons = LRU(256)
+_tenant_lexicons_lock = Lock()
+
+
+def pronunciation_tag(tenant: Tenant | None) -> str:
+    """Short digest of the tenant's lexicon; part of every memo/cache key it affects."""
+    raw = getattr(tenant, "pronunciations", None) or ""
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest() if raw else ""
+
+
+def tenant_lexicon(tenant: Tenant | None) -> Lexicon | None:
+    raw = getattr(tenant, "pronunciations", None) or ""
+    if not raw:
+        return None
+    tag = pronunciation_tag(tenant)
+    with _tenant_lexicons_lock:
+        lex = _tenant_lexicons.get(tag)
+    if lex is None:
+        lex = Lexicon(parse_pronunciations(raw))
+        with _tenant_lexicons_lock:
+            _tenant_lexicons.put(tag, lex)
+    return lex
+
+
+def apply_pronunciations(text: str, tenant: Tenant | None) -> str:
+    lex = tenant_lexicon(tenant)
+    return lex.replace(text) if lex else text
+
+
 def compute_article_hash(tenant_id: str, text: str, voice_id: str, model_id: str) -> str:
     payload = {
         "tenant": tenant_id,
@@ -1997,7 +2244,7 @@ def article_mp3_path(hash_value: str) -> Path:
 async def ensure_article_cached(
     hash_value: str,
     *,
-    text: str,
+    text,
     tenant_id: str,
     voice_id: str,
     model_id: str,
@@ -2008,17 +2255,21 @@ async def ensure_article_cached(
     - If the MP3 already exists at article_mp3_path(hash), treat as a CACHE HIT and DO NOT call ElevenLabs.
     - If it does not exist, call ElevenLabs once, stream to a temp file, then atomically move to the final path.
 
+    `text` is the canonical article text, or a zero-argument callable producing it;
+    it is only resolved and validated on a miss.
+
     Returns:
         Path to the cached MP3 on disk.
     """
 
-    clean = (text or "").strip()
-    if not clean:
-        raise HTTPException(status_code=422, detail="Empty article text")
-    clean = clean[:MAX_CHARS]
-    tts_ready = enhance_prosody(clean)
-    if not tts_ready:
-        raise HTTPException(status_code=422, detail="Empty article text")
+    def _tts_ready() -> str:
+        clean = ((text() if callable(text) else text) or "").strip()
+        if not clean:
+            raise HTTPException(status_code=422, detail="Empty article text")
+        ready = enhance_prosody(clean[:MAX_CHARS])
+        if not ready:
+            raise HTTPException(status_code=422, detail="Empty article text")
+        return ready
 
     mp3_path = article_mp3_path(hash_value)
     lock = get_lock(hash_value)
@@ -2055,8 +2306,9 @@ async def ensure_article_cached(
             _mark_cache_status(True)
             return mp3_path
 
+        tts_ready = _tts_ready()
         # Quota enforcement happens only on cache miss just before rendering.
-        ensure_tenant_quota_ok(tenant_id)
+        reserved = (await aensure_tenant_quota_ok(tenant_id, reserve=estimate_seconds_from_text(tts_ready)))["reserved"]
         logger.info(
             "[cache] article_cache_miss hash=%s path=%s; generating via ElevenLabs",
             hash_value,
@@ -2069,6 +2321,7 @@ async def ensure_article_cached(
         try:
             data = await tts_bytes_with_fallback(tts_ready, voice_id, model_id, tenant_id)
         except Exception as e:
+            release_tenant_reservation(tenant_id, reserved)
             raise HTTPException(status_code=502, detail=f"Provider error: {e}")
 
         tmp = mp3_path.with_suffix(".part")
@@ -2078,8 +2331,7 @@ async def ensure_article_cached(
         duration = mp3_duration_seconds(mp3_path)
         if not duration:
             duration = estimate_seconds_from_text(tts_ready)
-        if duration:
-            record_tenant_usage_seconds(tenant_id, duration)
+        record_tenant_usage_seconds(tenant_id, duration, reserved=reserved)
         logger.info(
             "[cache] WRITE complete",
             extra={"hash": hash_value, "mp3_path": str(mp3_path), "bytes": size},
@@ -2114,29 +2366,44 @@ _precache_lock = Lock()
 
 @app.post("/precache_text")
 async def precache_text(req: PrecacheReq, request: Request):
-    tenant_id, tenant = get_validated_tenant_record(request, body=req)
+    tenant_id, tenant = await aget_validated_tenant_record(request, body=req)
     voice = resolve_tenant_voice_id(tenant)
     if not req.text.strip():
         raise HTTPException(400, "text required")
-    prepared = enhance_prosody(preprocess_for_tts(req.text))
-    key = _cache_key_simple(prepared, voice)
+    def _prepare(raw: str) -> str:
+        return normalize_for_tts(apply_pronunciations(raw, tenant))
+
+    lex_tag = pronunciation_tag(tenant)
+    key, prepared = memo_cache_key(
+        "precache",
+        req.text,
+        (voice, lex_tag) if lex_tag else (voice,),
+        _prepare,
+        lambda t: _cache_key_simple(t, voice),
+    )
     outp = _mp3_path(key)
     created = False
     duration = mp3_duration_seconds(outp) if outp.exists() else None
     with _precache_lock:
         if not outp.exists():
-            ensure_tenant_quota_ok(tenant_id, request=request)
-            await elevenlabs_tts_to_file(prepared, voice, outp, tenant_key=tenant_id)
+            prepared = prepared or _prepare(req.text)
+            reserved = (await aensure_tenant_quota_ok(
+                tenant_id, request=request, reserve=estimate_seconds_from_text(prepared)
+            ))["reserved"]
+            try:
+                await elevenlabs_tts_to_file(prepared, voice, outp, tenant_key=tenant_id)
+            except BaseException:
+                release_tenant_reservation(tenant_id, reserved)
+                raise
             created = True
             duration = mp3_duration_seconds(outp)
             if not duration:
                 duration = estimate_seconds_from_text(prepared)
-            if duration:
-                record_tenant_usage_seconds(tenant_id, duration)
+            record_tenant_usage_seconds(tenant_id, duration, reserved=reserved)
     if duration is None and outp.exists():
         duration = mp3_duration_seconds(outp)
     if not duration:
-        duration = estimate_seconds_from_text(prepared)
+        duration = estimate_seconds_from_text(prepared or _prepare(req.text))
     return {
         "ok": True,
         "created": created,
@@ -2146,19 +2413,49 @@ async def precache_text(req: PrecacheReq, request: Request):
     }
 
 @app.get("/precache_status")
-def precache_status(text: str, voice: Optional[str] = None):
+async def precache_status(request: Request, text: str, voice: Optional[str] = None):
+    # Key the lookup exactly as precache_text does: the tenant's voice and lexicon
+    # change the prepared text, so without them a tenant with a lexicon always misses.
+    tenant = None
+    if _extract_tenant_key(request):
+        _, tenant = await aget_validated_tenant_record(request)
+        voice = voice or resolve_tenant_voice_id(tenant)
     voice = voice or os.getenv("VOICE_ID", "")
-    prepared = enhance_prosody(preprocess_for_tts(text))
-    key = _cache_key_simple(prepared, voice)
+    lex_tag = pronunciation_tag(tenant)
+    key, _ = memo_cache_key(
+        "precache",
+        text,
+        (voice, lex_tag) if lex_tag else (voice,),
+        lambda raw: normalize_for_tts(apply_pronunciations(raw, tenant)),
+        lambda t: _cache_key_simple(t, voice),
+    )
     outp = _mp3_path(key)
     return {"ok": True, "exists": outp.exists(), "audioUrl": f"/cache/{outp.name}" if outp.exists() else None}
 
 @app.get("/cache/stats")
 def cache_stats():
     s = get_cache_stats()
-    return {**s, "hits": metrics["tts_cache_hits"], "misses": metrics["tts_cache_misses"]}
+    return {
+        **s,
+        "hits": metrics["tts_cache_hits"],
+        "misses": metrics["tts_cache_misses"],
+        "extraction": extraction_cache.stats(),
+        "boilerplate": boilerplate.stats(),
+        "ssrf_dns": dns_stats(),
+        "key_memo": {"entries": len(_key_memo), "capacity": KEY_MEMO_SIZE, **key_memo_stats},
+        "tenants": tenant_cache.stats(),
+        "usage": usage_ledger.stats(),
+        "tenant_db": tenant_store_async.pool_stats(),
+        "ratelimit": ratelimit.stats(),
+        "email_outbox": outbox.stats(),
+        "stripe_events": stripe_events.stats(),
+        "writers": buffered_writer.stats(),
+        "analytics": analytics_store.stats(),
+        "histograms": histogram.stats(),
+    }
 
 # --- Stripe provisioning helpers ---
+# Legacy JSON stores; imported once into tenant_emails / tenant_notify at startup.
 TENANT_STORE = Path("/cache/tenants.json")
 NOTIFY_STORE = Path("/cache/notify.json")
 
@@ -2230,79 +2527,31 @@ def _expand_allowed_domains(domain_raw: str) -> list[str]:
         domains.append(f"www.{normalized}")
     return normalize_domains(domains)
 
-def _load_tenant_store() -> dict:
-    if not TENANT_STORE.exists():
-        return {}
-    try:
-        return json.loads(TENANT_STORE.read_text("utf-8"))
-    except Exception:
-        return {}
-
-def _save_tenant_store(data: dict) -> None:
-    TENANT_STORE.parent.mkdir(parents=True, exist_ok=True)
-    tmp = TENANT_STORE.with_suffix(".part")
-    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), "utf-8")
-    tmp.replace(TENANT_STORE)
-
 def delete_tenant(tenant_key: str) -> bool:
     tenant_key = (tenant_key or "").strip()
     if not tenant_key:
         return False
-    store = _load_tenant_store()
-    if not isinstance(store, dict) or not store:
-        return False
-    updated: dict = {}
-    removed = False
-    for email, meta in store.items():
-        if isinstance(meta, dict) and meta.get("tenant_key") == tenant_key:
-            removed = True
-            continue
-        updated[email] = meta
-    if not removed:
-        return False
-    _save_tenant_store(updated)
-    return True
-
-def _load_notify_store() -> dict:
-    if not NOTIFY_STORE.exists():
-        return {}
-    try:
-        return json.loads(NOTIFY_STORE.read_text("utf-8"))
-    except Exception:
-        return {}
-
-
-def _save_notify_store(data: dict) -> None:
-    NOTIFY_STORE.parent.mkdir(parents=True, exist_ok=True)
-    tmp = NOTIFY_STORE.with_suffix(".part")
-    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), "utf-8")
-    tmp.replace(NOTIFY_STORE)
+    with tenant_session() as session:
+        return delete_email_bindings(session, tenant_key) > 0
 
 
 def _email_for_tenant(tenant_key: str) -> str | None:
-    store = _load_tenant_store()
-    for email, meta in store.items():
-        if isinstance(meta, dict) and meta.get("tenant_key") == tenant_key:
-            return email
-    return None
+    with tenant_session() as session:
+        return email_for_tenant(session, tenant_key)
 
 
 def _maybe_send_quota_email(tenant: Tenant, quota: int, request: Request | None = None) -> bool:
-    if not RESEND_API_KEY or not EMAIL_FROM:
+    """Queue the quota-reached email (at most one per tenant per 24h); the outbox worker sends it."""
+    if not outbox.enabled(RESEND_API_KEY, EMAIL_FROM) or outbox.recently_queued("quota", tenant.tenant_key):
         return False
     to_email = _email_for_tenant(tenant.tenant_key)
     if not to_email:
         return False
     now = datetime.now(timezone.utc)
-    notify = _load_notify_store()
-    last_raw = notify.get(tenant.tenant_key)
-    if last_raw:
-        try:
-            last_dt = datetime.fromisoformat(last_raw)
-            if now - last_dt < timedelta(hours=24):
-                return False
-        except Exception:
-            pass
+    with tenant_session() as session:
+        last_dt = last_quota_email_at(session, tenant.tenant_key)
+    if last_dt and now - last_dt < timedelta(hours=24):
+        return False
     public_base = _public_base_from_request(request)
     site_url = public_base or os.getenv("APP_URL", "").rstrip("/")
     safe_site = escape(site_url) if site_url else None
@@ -2318,24 +2567,16 @@ def _maybe_send_quota_email(tenant: Tenant, quota: int, request: Request | None
         f"<p>Plan limit: {int(quota)} seconds. Used: {int(tenant.used_seconds_month)} seconds.</p>"
         f"{cta}"
     )
+    payload = {
+        "from": EMAIL_FROM,
+        "to": [to_email],
+        "subject": "EasyAudio quota reached",
+        "html": html,
+    }
     try:
-        resp = httpx.post(
-            "https://api.resend.com/emails",
-            headers={"Authorization": f"Bearer {RESEND_API_KEY}"},
-            json={
-                "from": EMAIL_FROM,
-                "to": [to_email],
-                "subject": "EasyAudio quota reached",
-                "html": html,
-            },
-            timeout=10,
-        )
-        resp.raise_for_status()
-        notify[tenant.tenant_key] = now.isoformat()
-        _save_notify_store(notify)
-        return True
+        return outbox.enqueue("quota", payload, tenant.tenant_key, dedupe=True)
     except Exception as e:
-        logger.warning("quota notify send failed: %s", e)
+        logger.warning("quota notify enqueue failed: %s", e)
         return False
 
 
@@ -2347,10 +2588,11 @@ async def _send_resend_email(
     request: Request | None = None,
     pending_domain: bool = False,
     pending_review: bool = False,
+    public_base: str | None = None,
 ) -> bool:
-    if not RESEND_API_KEY or not EMAIL_FROM or not to_email:
+    if not outbox.enabled(RESEND_API_KEY, EMAIL_FROM) or not to_email:
         return False
-    public_base = _public_base_from_request(request) or "https://hgtts.onrender.com"
+    public_base = public_base or _public_base_from_request(request) or "https://hgtts.onrender.com"
     widget_src = PUBLIC_WIDGET_URL or f"{public_base}/static/tts-widget.v1.js?v=1"
     plan_label = (tier or "unknown").title()
     domains = domains or []
@@ -2384,39 +2626,26 @@ async def _send_resend_email(
         "<p>Install snippet (Ghost Admin -> Settings -> Code Injection -> Site Header):</p>"
         f"<pre><code>{escape(snippet)}</code></pre>"
     )
-    client: httpx.AsyncClient = app.state.http_client
+    payload = {
+        "from": EMAIL_FROM,
+        "to": [to_email],
+        "subject": "Your EasyAudio install snippet",
+        "html": html,
+        "tracking": {"clicks": False},
+    }
     try:
-        resp = await client.post(
-            "https://api.resend.com/emails",
-            headers={"Authorization": f"Bearer {RESEND_API_KEY}"},
-            json={
-                "from": EMAIL_FROM,
-                "to": [to_email],
-                "subject": "Your EasyAudio install snippet",
-                "html": html,
-                "tracking": {"clicks": False},
-            },
-            timeout=15,
-        )
-        resp.raise_for_status()
-        return True
+        return await asyncio.to_thread(outbox.enqueue, "onboarding", payload, tenant_key)
     except Exception as e:
-        logger.warning("resend email failed: %s", e)
+        logger.warning("onboarding email enqueue failed: %s", e)
         return False
 
 def _ensure_tenant_for_email(email: str, tier: str, stripe_customer_id: str | None = None) -> tuple[str, bool]:
     """Return (tenant_key, is_new)."""
-    email_key = (email or "").strip().lower()
-    store = _load_tenant_store()
-    if email_key in store and store[email_key].get("tenant_key"):
-        tenant_key = store[email_key]["tenant_key"]
-        created_at_raw = store[email_key].get("created_at")
-        created_at = None
-        if isinstance(created_at_raw, str):
-            try:
-                created_at = datetime.fromisoformat(created_at_raw)
-            except Exception:
-                created_at = None
+    with tenant_session() as session:
+        binding = get_email_binding(session, email)
+    if binding is not None:
+        tenant_key = binding.tenant_key
+        created_at = binding.created_at
         with tenant_session() as session:
             upsert_tenant(
                 session,
@@ -2426,19 +2655,11 @@ def _ensure_tenant_for_email(email: str, tier: str, stripe_customer_id: str | No
                 status="active",
                 created_at=created_at,
             )
+        tenant_cache.invalidate(tenant_key)
         return tenant_key, False
     tenant_key = f"tnt_{secrets.token_urlsafe(12)}"
-    store[email_key] = {
-        "tenant_key": tenant_key,
-        "tier": tier,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "stripe_customer_id": stripe_customer_id,
-    }
-    try:
-        _save_tenant_store(store)
-    except Exception as e:
-        logger.warning("tenant store write failed: %s", e)
     with tenant_session() as session:
+        bind_email(session, email, tenant_key, tier=tier, stripe_customer_id=stripe_customer_id)
         upsert_tenant(
             session,
             tenant_key=tenant_key,
@@ -2446,11 +2667,16 @@ def _ensure_tenant_for_email(email: str, tier: str, stripe_customer_id: str | No
             contact_email=email,
             status="active",
         )
+    tenant_cache.invalidate(tenant_key)
     return tenant_key, True
 
 
+STRIPE_HANDLED_EVENTS = {"checkout.session.completed"}
+
+
 @app.post("/stripe/webhook")
 async def stripe_webhook(request: Request):
+    """Verify, store the event (deduped on its id) and ack; _apply_stripe_event runs in the background."""
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
     if not sig_header:
@@ -2461,19 +2687,35 @@ async def stripe_webhook(request: Request):
         logger.warning("stripe webhook verify failed: %s", e)
         raise HTTPException(status_code=400, detail="Invalid signature")
     event_type = event.get("type")
-    logger.info("[stripe] event received type=%s", event_type)
+    if event_type not in STRIPE_HANDLED_EVENTS:
+        logger.info("[stripe] event ignored type=%s", event_type)
+        return JSONResponse({"ok": True})
+    # ?resend_email=1 replays an already-processed event to send the onboarding email again.
+    resend_email = request.query_params.get("resend_email", "").strip().lower() in ("1", "true", "yes")
+    options = {"resend_email": resend_email, "public_base": _public_base_from_request(request)}
+    stored = await asyncio.to_thread(stripe_events.record, payload, options, replay=resend_email)
+    stripe_events.notify()
+    logger.info("[stripe] event received type=%s id=%s duplicate=%s", event_type, event.get("id"), not stored)
+    return JSONResponse({"ok": True})
+
+
+async def _apply_stripe_event(event: dict, options: dict) -> None:
+    """Provision from a stored webhook event. Safe to run more than once for the same event."""
+    event_type = event.get("type")
+    public_base = options.get("public_base") or None
 
     if event_type == "checkout.session.completed":
         session_obj = event.get("data", {}).get("object", {})
         session_id = session_obj.get("id")
         try:
-            full_session = stripe.checkout.Session.retrieve(
+            full_session = await asyncio.to_thread(
+                stripe.checkout.Session.retrieve,
                 session_id,
                 expand=["line_items.data.price"],
             )
         except Exception as e:
             logger.warning("stripe session retrieve failed: %s", e)
-            return JSONResponse({"ok": True})
+            raise
 
         cust_email = (
             (full_session.get("customer_details") or {}).get("email")
@@ -2481,8 +2723,8 @@ async def stripe_webhook(request: Request):
         )
         if not cust_email:
             logger.warning("stripe checkout.completed missing email for session=%s", session_id)
-            return JSONResponse({"ok": True})
-        resend_email = request.query_params.get("resend_email", "").strip().lower() in ("1", "true", "yes")
+            return
+        resend_email = bool(options.get("resend_email"))
         stripe_customer_id = full_session.get("customer")
         stripe_subscription_id = full_session.get("subscription")
         stripe_checkout_session_id = full_session.get("id")
@@ -2524,7 +2766,7 @@ async def stripe_webhook(request: Request):
                             existing_by_session.tenant_key,
                             existing_by_session.plan_tier or "unknown",
                             domains=existing_domains,
-                            request=request,
+                            public_base=public_base,
                             pending_domain=existing_pending_domain,
                             pending_review=existing_pending_review,
                         )
@@ -2542,7 +2784,7 @@ async def stripe_webhook(request: Request):
                         tier,
                         existing_active and not existing_pending_review,
                     )
-                    return JSONResponse({"ok": True})
+                    return
             tenant = None
             if not tenant and stripe_subscription_id:
                 tenant = get_tenant_by_stripe_subscription_id(session, stripe_subscription_id)
@@ -2569,6 +2811,7 @@ async def stripe_webhook(request: Request):
                 stripe_checkout_session_id=stripe_checkout_session_id,
                 quota_seconds_month=quota_seconds_month,
             )
+        tenant_cache.invalidate(tenant_key)
         emailed = False
         activated = tier != "unknown" and status == "active"
         if email_onboarding and activated:
@@ -2577,7 +2820,7 @@ async def stripe_webhook(request: Request):
                 tenant_key,
                 tier,
                 domains=merged_domains,
-                request=request,
+                public_base=public_base,
                 pending_domain=pending_domain,
                 pending_review=pending_review,
             )
@@ -2602,7 +2845,6 @@ async def stripe_webhook(request: Request):
             tier,
             activated,
         )
-    return JSONResponse({"ok": True})
 
 @app.post("/cache/evict")
 def cache_evict():
@@ -2621,17 +2863,66 @@ def cache_clear():
             pass
     return {"cleared": n}
 
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "").strip()
+_CACHE_GAUGE_TTL_S = 30.0
+_cache_gauge_memo: dict = {"at": 0.0, "stats": None}
+
+
+def _cache_gauge_stats() -> dict:
+    # The inventory walks the cache dir; scrapes every 15s share one walk.
+    now = time.monotonic()
+    if _cache_gauge_memo["stats"] is None or now - _cache_gauge_memo["at"] > _CACHE_GAUGE_TTL_S:
+        _cache_gauge_memo["stats"] = get_cache_stats()
+        _cache_gauge_memo["at"] = now
+    return _cache_gauge_memo["stats"]
+
+
+prometheus.register_gauge("cache_files", "Audio files in the disk cache.", lambda: [({}, _cache_gauge_stats()["files"])])
+prometheus.register_gauge("cache_bytes", "Bytes in the disk cache.", lambda: [({}, _cache_gauge_stats()["bytes"])])
+prometheus.register_gauge(
+    "workers_publishing", "Worker processes with a live metrics snapshot.",
+    lambda: [({}, histogram.stats()["workers_publishing"])],
+)
+prometheus.register_gauge(
+    "email_outbox_pending", "Queued emails not yet sent.", lambda: [({}, outbox.stats()["pending"])]
+)
+prometheus.register_gauge(
+    "stripe_events_pending", "Stored Stripe events not yet applied.",
+    lambda: [({}, stripe_events.stats()["pending"])],
+)
+
+
+@app.get("/metrics/prometheus")
+def prometheus_metrics(request: Request, local: int = Query(0, ge=0, le=1)):
+    """Prometheus text (or OpenMetrics, by Accept) for every worker on this host unless ?local=1."""
+    if METRICS_TOKEN and request.headers.get("authorization", "") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    openmetrics = prometheus.wants_openmetrics(request.headers.get("accept"))
+    return Response(
+        content=prometheus.render(openmetrics=openmetrics, local_only=bool(local)),
+        media_type=prometheus.OPENMETRICS_TYPE if openmetrics else prometheus.TEXT_TYPE,
+    )
+
+
 @app.get("/metrics")
-def get_metrics():
-    arr = metrics["tts_first_byte_ms"]
-    avg_fb = int(sum(arr) / max(1, len(arr))) if arr else None
+def get_metrics(local: int = Query(0, ge=0, le=1)):
+    """Counters for this worker; latency histograms merged across workers unless ?local=1."""
+    series = histogram.collect(local_only=bool(local))
+    first_byte = histogram.LogHistogram()
+    latency: dict[str, list] = {}
+    for (name, labels), h in sorted(series.items()):
+        if name == "tts_first_byte_ms":
+            first_byte.merge(h)
+        latency.setdefault(name, []).append({**dict(labels), **h.summary()})
     cache = get_cache_stats()
     return {
         "tts_requests": metrics["tts_requests"],
         "tts_errors": metrics["tts_errors"],
         "tts_cache_hits": metrics["tts_cache_hits"],
         "tts_cache_misses": metrics["tts_cache_misses"],
-        "avg_first_byte_ms": avg_fb,
+        "avg_first_byte_ms": int(first_byte.sum / first_byte.count) if first_byte.count else None,
+        "p99_first_byte_ms": first_byte.summary()["p99"],
+        "latency_ms": latency,
         "cache_files": cache["files"],
         "cache_bytes_gb": cache["bytes_gb"],
     }
@@ -2640,32 +2931,42 @@ def get_metrics():
 @app.get("/tenants/stats")
 def tenants_stats():
     """Expose current tenant quota config + usage for debugging."""
-    with tenant_session() as session:
-        rows = list_tenants(session)
-        data = [
-            {
+    usage_ledger.flush()
+
+    def _iso(dt):
+        return dt.isoformat() if dt else None
+
+    def body():
+        # Streamed in keyset batches so the response never holds every tenant in memory.
+        yield '{"tenants":['
+        first = True
+        for t in iter_tenants():
+            item = {
                 "tenant_key": t.tenant_key,
                 "plan_tier": t.plan_tier,
                 "used_seconds_month": t.used_seconds_month,
                 "quota_seconds_month": quota_for_plan(t.plan_tier),
-                "renewal_at": t.renewal_at,
-                "created_at": t.created_at,
+                "renewal_at": _iso(t.renewal_at),
+                "created_at": _iso(t.created_at),
             }
-            for t in rows
-        ]
-    return {"tenants": data}
+            yield ("" if first else ",") + json.dumps(item)
+            first = False
+        yield "]}"
+
+    return StreamingResponse(body(), media_type="application/json")
 
 # --- TTS request (streaming via shared function)
 @app.post("/tts")
 async def tts(req: TTSRequest, request: Request):
-    tenant_id, tenant = get_validated_tenant_record(request, body=req)
+    tenant_id, tenant = await aget_validated_tenant_record(request, body=req)
     guard_request(request)
     sample_text = (
         "This is a short sample paragraph to verify streaming text to speech. "
         "Audio should begin quickly and continue without interruption."
     )
     text = (getattr(req, "text", "") or "").strip() or sample_text
-    return stream_with_cache(
+    return await asyncio.to_thread(
+        stream_with_cache,
         text,
         resolve_tenant_voice_id(tenant),
         MODEL_ID,
@@ -2711,25 +3012,29 @@ def _favicon():
     return Response(status_code=204)
 
 # --- extract
+async def _extract_precise(html: str, final_url: str) -> dict:
+    return await extract_document_or_raise(html, url=final_url, favor_precision=True)
+
+
 @app.get("/extract")
-def extract(url: str = Query(..., min_length=8), request: Request = None):
+async def extract(url: str = Query(..., min_length=8), request: Request = None):
     if request is not None:
         guard_request(request)
-    if not is_public_http_url(url):
+    if not await is_public_http_url(url):
         raise HTTPException(400, "Invalid URL")
     try:
-        r = http.get(url, timeout=8, headers={"User-Agent":"Mozilla/5.0 (ReaderBot)"})
-        if r.status_code != 200 or not r.text:
-            raise HTTPException(502, "Fetch failed")
-        extracted = trafilatura.extract(r.text, include_comments=False, include_tables=False,
-                                favor_precision=True)
-        if not extracted:
+        doc = await fetch_cached_document(
+            url,
+            _extract_precise,
+            profile="precise",
+            headers=READER_HDRS,
+            timeout=8,
+        )
+        if not doc["text"]:
             raise HTTPException(422, "No article content found")
 
-        # simple <title> fallback from the HTML
-        m = re.search(r"<title[^>]*>(.*?)</title>", r.text, flags=re.I|re.S)
-        title = (m.group(1).strip() if m else "")
-        text = extracted.strip()
+        title = doc["title"]
+        text = doc["text"]
 
         # basic cleanup
         text = re.sub(r'\n{3,}', '\n\n', text)
@@ -2738,6 +3043,65 @@ def extract(url: str = Query(..., min_length=8), request: Request = None):
     except Exception as e:
         raise HTTPException(500, f"Extract error")
     
+
+# --- batch extract (admin): qualify a publisher's archive for narration
+BATCH_MIN_WORDS = int(os.getenv("BATCH_MIN_WORDS", "150"))
+
+
+class BatchExtractRequest(BaseModel):
+    urls: list[str]
+    concurrency: int | None = None
+    per_origin: int | None = None
+
+
+async def _batch_extract_one(url: str) -> dict:
+    if not await is_public_http_url(url):
+        return {"url": url, "ok": False, "status": 400, "error": "Invalid URL"}
+    doc = await fetch_cached_document(url, _extract_precise, profile="precise", headers=READER_HDRS, timeout=8)
+    text = doc["text"] or ""
+    words = len(text.split())
+    return {
+        "url": url,
+        "ok": True,
+        "title": doc["title"],
+        "author": doc["author"] or None,
+        "words": words,
+        "est_seconds": estimate_seconds_from_text(text),
+        "narratable": words >= BATCH_MIN_WORDS,
+    }
+
+
+@app.post("/admin/extract/batch")
+async def extract_batch_admin(request: Request, body: BatchExtractRequest):
+    """Stream one NDJSON line per URL as it completes, then a summary line."""
+    _require_admin_secret(request)
+    urls = list(dict.fromkeys(u.strip() for u in body.urls if u and u.strip()))
+    if not urls:
+        raise HTTPException(400, "urls is required")
+    if len(urls) > BATCH_MAX_URLS:
+        raise HTTPException(413, f"At most {BATCH_MAX_URLS} urls per batch")
+    concurrency = min(body.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)
+    per_origin = min(body.per_origin or BATCH_PER_ORIGIN, BATCH_PER_ORIGIN)
+
+    async def gen():
+        started = time.time()
+        ok = narratable = 0
+        async for row in run_batch(urls, _batch_extract_one, concurrency=concurrency, per_origin=per_origin):
+            ok += bool(row.get("ok"))
+            narratable += bool(row.get("narratable"))
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+        summary = {
+            "done": True,
+            "total": len(urls),
+            "ok": ok,
+            "narratable": narratable,
+            "elapsed_s": round(time.time() - started, 2),
+        }
+        print({"event": "extract_batch", **summary})
+        yield json.dumps(summary) + "\n"
+
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
+
 # --- prosody: add pauses/structure
 def prosody(title: str, body: str) -> str:
     t = (title or "").strip()
@@ -2763,15 +3127,6 @@ def strip_captions(text: str) -> str:
     keep = [p for p in parts if not looks_like_caption(p)]
     return "\n\n".join(keep)
 
-def find_author_from_meta(html: str) -> str | None:
-    m = re.search(r'<meta[^>]+name=["\']author["\'][^>]+content=["\']([^"\']+)["\']', html, flags=re.I)
-    if m: return m.group(1).strip()
-    m = re.search(r'"author"\s*:\s*"\s*([^"]+)\s*"', html, flags=re.I)
-    if m: return m.group(1).strip()
-    m = re.search(r'"author"\s*:\s*{\s*"@type"\s*:\s*"Person"\s*,\s*"name"\s*:\s*"([^"]+)"', html, flags=re.I)
-    if m: return m.group(1).strip()
-    return None
-
 def build_read_text(title: str, body: str, author: str | None) -> str:
     intro = f"Now reading: {title}.\n\n" if title else ""
     core = strip_captions(body)
@@ -2779,49 +3134,23 @@ def build_read_text(title: str, body: str, author: str | None) -> str:
     core = re.sub(r'\n{3,}', '\n\n', core)
     return intro + core + outro
 
-# --- helpers for /meta (title/subtitle/author/cover) ---
-def _meta_clean(s: str) -> str:
-    return re.sub(r'\s+', ' ', s).strip()
-
-def find_subtitle(html: str) -> str | None:
-    m = re.search(r'<h2[^>]*>(.*?)</h2>', html, flags=re.I|re.S)
-    if m:
-        return _meta_clean(re.sub(r'<[^>]+>', '', m.group(1)))
-    m = re.search(r'<meta[^>]+name=["\']description["\'][^>]+content=["\']([^"\']+)["\']', html, flags=re.I)
-    return _meta_clean(m.group(1)) if m else None
-
-def find_author(html: str) -> str | None:
-    m = re.search(r'<meta[^>]+name=["\']author["\'][^>]+content=["\']([^"\']+)["\']', html, flags=re.I)
-    if m: return _meta_clean(m.group(1))
-    m = re.search(r'"author"\s*:\s*"\s*([^"]+)\s*"', html, flags=re.I)
-    if m: return _meta_clean(m.group(1))
-    m = re.search(r'"author"\s*:\s*{\s*"@type"\s*:\s*"Person"\s*,\s*"name"\s*:\s*"([^"]+)"', html, flags=re.I)
-    if m: return _meta_clean(m.group(1))
-    m = re.search(r'>\s*By\s+([A-Z][A-Za-z0-9.\- ]+)\s*<', html, flags=re.I)
-    return _meta_clean(m.group(1)) if m else None
-
-def find_og_image(html: str) -> str | None:
-    m = re.search(r'<meta[^>]+property=["\']og:image["\'][^>]+content=["\']([^"\']+)["\']', html, flags=re.I)
-    return m.group(1).strip() if m else None
+# --- /meta: title/subtitle/author/cover from one streaming parse
+async def _extract_meta(html: str, final_url: str) -> dict:
+    return await asyncio.to_thread(extract_page_meta, html)
+
 
 @app.get("/meta")
-def meta(url: str = Query(..., min_length=8)):
-    if not is_public_http_url(url):
+async def meta(url: str = Query(..., min_length=8)):
+    if not await is_public_http_url(url):
         raise HTTPException(400, "Invalid URL")
     try:
-        r = http.get(url, timeout=8, headers={"User-Agent":"Mozilla/5.0 (ReaderBot)"})
-        if r.status_code != 200 or not r.text:
-            raise HTTPException(502, "Fetch failed")
-        html = r.text
-
-        mt = re.search(r"<title[^>]*>(.*?)</title>", html, flags=re.I|re.S)
-        title = _meta_clean(mt.group(1)) if mt else ""
-        return {
-            "title": title,
-            "subtitle": find_subtitle(html),
-            "author": find_author(html),
-            "image": find_og_image(html),
-        }
+        return await fetch_cached_document(
+            url,
+            _extract_meta,
+            profile="meta",
+            headers=READER_HDRS,
+            timeout=8,
+        )
     except HTTPException: raise
     except Exception:
         raise HTTPException(500, "Meta error")
@@ -2830,9 +3159,15 @@ def meta(url: str = Query(..., min_length=8)):
 NEG = {"dies","dead","death","shooting","war","massacre","earthquake","flood","famine","injured","tragedy","lawsuit","bankrupt","recall","layoffs","crash","toxic","drought","meltdown"}
 POS = {"record","soared","booming","surge","breakthrough","discovery","wins","celebrates","milestone","landmark","thrilled","optimistic"}
 
+def _tone_forms(words: set[str], label: str) -> dict[str, tuple[str, str]]:
+    # Whole-word matching, so list the plural/third-person forms ("deaths", "crashes") explicitly.
+    return {form: (label, w) for w in words for form in (w, w + "s", w + "es")}
+
+_TONE_LEXICON = Lexicon({**_tone_forms(POS, "pos"), **_tone_forms(NEG, "neg")})
+
 def pick_tone(title: str, body: str) -> str:
-    t = (title or "").lower(); b = (body or "").lower()
-    n = sum(w in t or w in b for w in NEG); p = sum(w in t or w in b for w in POS)
+    found = _TONE_LEXICON.matches(title or "") | _TONE_LEXICON.matches(body or "")
+    n = sum(label == "neg" for label, _ in found); p = sum(label == "pos" for label, _ in found)
     if n > p and n >= 2: return "somber"
     if p > n and p >= 2: return "upbeat"
     return "neutral"
@@ -2861,45 +3196,63 @@ class ArticleAudioRequest(BaseModel):
 # POST the same text twice → first call MISS, second HIT, same audio output.
 @app.post("/api/article-audio")
 async def article_audio(req: ArticleAudioRequest, request: Request):
-    tenant_id, tenant = get_validated_tenant_record(request, body=req)
+    tenant_id, tenant = await aget_validated_tenant_record(request, body=req)
 
     raw_text = (req.text or "").strip()
+    # Client-supplied text is filtered with what the server learned from pages it fetched itself,
+    # but never trains the index (any caller could post lines under any href).
+    filter_url = (req.href or req.url) if raw_text else None
 
     if not raw_text and req.url:
-        title, author, text = extract_article(req.url)
-        cleaned = preprocess_for_tts(text or "")
-        raw_text = prepare_article(title, author, cleaned)
+        title, author, text = await extract_article(req.url)
+        raw_text = prepare_article(title, author, text or "")
 
     if not raw_text:
         raise HTTPException(status_code=400, detail="Must provide url or text")
 
-    canonical = (preprocess_for_tts(raw_text) or "").strip()
-    if not canonical:
-        raise HTTPException(status_code=422, detail="Empty article text")
-    canonical = canonical[:MAX_CHARS]
-
-    canonical, truncated = enforce_article_length_limit(tenant_id, canonical)
-    if truncated:
-        logger.info(
-            "[quota] trial preview audio truncated for tenant=%s; full article exceeds trial per-article limit",
-            tenant_id,
-        )
-
     voice_id = resolve_tenant_voice_id(tenant)
     if not voice_id:
         raise HTTPException(status_code=400, detail="Voice not provided (and ELEVENLABS_VOICE/VOICE_ID not set).")
     model_id = MODEL_ID.strip()
 
-    hash_value = compute_article_hash(tenant_id, canonical, voice_id, model_id)
+    def _canonical(raw: str) -> str:
+        canonical = (preprocess_for_tts(apply_pronunciations(raw, tenant)) or "").strip()
+        if not canonical:
+            raise HTTPException(status_code=422, detail="Empty article text")
+        canonical, truncated = enforce_article_length_limit(tenant_id, canonical[:MAX_CHARS])
+        if truncated:
+            logger.info(
+                "[quota] trial preview audio truncated for tenant=%s; full article exceeds trial per-article limit",
+                tenant_id,
+            )
+        return canonical
+
+    max_chars = get_tenant_limits(tenant_id).get("max_chars_per_article")
+    hash_value, canonical = memo_cache_key(
+        "article",
+        raw_text,
+        (tenant_id, voice_id, model_id, max_chars, pronunciation_tag(tenant)),
+        _canonical,
+        lambda t: compute_article_hash(tenant_id, t, voice_id, model_id),
+    )
     mp3_path = article_mp3_path(hash_value)
     logger.info(
         "[cache] request",
         extra={"tenant": tenant_id, "hash": hash_value, "mp3_path": str(mp3_path)},
     )
 
+    def _render_text() -> str:
+        # The cache key stays on the unfiltered text: learned counts keep moving, and
+        # already-cached articles must not be re-rendered (and re-billed) when they do.
+        if filter_url:
+            stripped = boilerplate.filter_text(filter_url, raw_text, learn=False).strip()
+            if stripped and stripped != raw_text:
+                return _canonical(stripped)
+        return canonical if canonical is not None else _canonical(raw_text)
+
     mp3_path = await ensure_article_cached(
         hash_value,
-        text=canonical,
+        text=_render_text,
         tenant_id=tenant_id,
         voice_id=voice_id,
         model_id=model_id,
@@ -2936,38 +3289,38 @@ class ReadRequest(BaseModel):
 # ---- READ: fetch article → extract → prosody → stream (cached) ----
 @app.post("/read")
 async def read(req: ReadRequest, request: Request):
-    tenant_id, tenant = get_validated_tenant_record(request, body=req)
-    ensure_tenant_quota_ok(tenant_id, request=request)
+    tenant_id, tenant = await aget_validated_tenant_record(request, body=req)
     guard_request(request)
     if not (req.text or req.url):
         raise HTTPException(400, "Provide 'text' or 'url'")
 
     if req.url:
-        if not is_public_http_url(req.url):
+        if not await is_public_http_url(req.url):
             raise HTTPException(400, "Invalid URL")
 
-        client: httpx.AsyncClient = app.state.http_client
-        r = await client.get(req.url, timeout=8, headers={"User-Agent": "Mozilla/5.0 (ReaderBot)"})
-        if r.status_code != 200 or not r.text:
-            raise HTTPException(502, "Fetch failed")
-
-        extracted = trafilatura.extract(
-            r.text, include_comments=False, include_tables=False, favor_precision=True
+        # Refuse tenants already over quota before paying for the fetch and extraction;
+        # the reservation below needs the narration length.
+        await aensure_tenant_quota_ok(tenant_id, request=request)
+        doc = await fetch_cached_document(
+            req.url,
+            _extract_precise,
+            profile="precise",
+            headers=READER_HDRS,
+            timeout=8,
         )
-        if not extracted:
+        if not doc["text"]:
             raise HTTPException(422, "No article content found")
 
         # title + author + cleaned body
-        m = re.search(r"<title[^>]*>(.*?)</title>", r.text, flags=re.I | re.S)
-        author = find_author_from_meta(r.text)
-        title = (m.group(1).strip() if m else "")
-        body = extracted.strip()
+        author = doc["author"] or None
+        title = doc["title"]
+        body = doc["text"]
         tone = pick_tone(title, body)
-        text = build_read_text(title, body, author)
+        text = apply_pronunciations(build_read_text(title, body, author), tenant)
         text, voice_settings = shape_text_for_tone(text, tone)
     else:
         tone = "neutral"
-        text = prosody("", (req.text or ""))
+        text = prosody("", apply_pronunciations(req.text or "", tenant))
         text, voice_settings = shape_text_for_tone(text, tone)
 
     # Demo cap for full reads
@@ -2975,78 +3328,46 @@ async def read(req: ReadRequest, request: Request):
         text = text[:MAX_CHARS]
     # Use the shared cached streamer (disk + memory). This saves credits.
     usage_seconds = estimate_seconds_from_text(text)
-    resp = await stream_tts_for_text(
-        text,
-        voice_id=resolve_tenant_voice_id(tenant),
-        model_id=MODEL_ID,
-        voice_settings=voice_settings,
-        tone=tone,
-        tenant_key=tenant_id,
-    )
-    if usage_seconds:
-        record_tenant_usage_seconds(tenant_id, usage_seconds)
+    reserved = (await aensure_tenant_quota_ok(tenant_id, request=request, reserve=usage_seconds))["reserved"]
+    try:
+        resp = await stream_tts_for_text(
+            text,
+            voice_id=resolve_tenant_voice_id(tenant),
+            model_id=MODEL_ID,
+            voice_settings=voice_settings,
+            tone=tone,
+            tenant_key=tenant_id,
+        )
+    except BaseException:
+        release_tenant_reservation(tenant_id, reserved)
+        raise
+    record_tenant_usage_seconds(tenant_id, usage_seconds, reserved=reserved)
     return resp
 
 @app.get("/read")
 async def read(request: Request, url: str, voice: str | None = None, model: str | None = None):
-    tenant_id, tenant = get_validated_tenant_record(request)
-    ensure_tenant_quota_ok(tenant_id, request=request)
-    title, author, text = extract_article(url)
-    narration = prepare_article(title, author, text)
+    tenant_id, tenant = await aget_validated_tenant_record(request)
+    # Refuse tenants already over quota before paying for the fetch and extraction;
+    # the reservation below needs the narration length.
+    await aensure_tenant_quota_ok(tenant_id, request=request)
+    title, author, text = await extract_article(url)
+    narration = apply_pronunciations(prepare_article(title, author, text), tenant)
     # stream_tts_for_text is async and already returns a StreamingResponse
     usage_seconds = estimate_seconds_from_text(narration)
-    resp = await stream_tts_for_text(
-        narration,
-        voice_id=resolve_tenant_voice_id(tenant),
-        model_id=model or MODEL_ID,
-        tenant_key=tenant_id,
-    )
-    if usage_seconds:
-        record_tenant_usage_seconds(tenant_id, usage_seconds)
+    reserved = (await aensure_tenant_quota_ok(tenant_id, request=request, reserve=usage_seconds))["reserved"]
+    try:
+        resp = await stream_tts_for_text(
+            narration,
+            voice_id=resolve_tenant_voice_id(tenant),
+            model_id=model or MODEL_ID,
+            tenant_key=tenant_id,
+        )
+    except BaseException:
+        release_tenant_reservation(tenant_id, reserved)
+        raise
+    record_tenant_usage_seconds(tenant_id, usage_seconds, reserved=reserved)
     return resp
 
-@app.get("/read_chunked")
-async def read_chunked(request: Request, url: str, voice: str | None = None, model: str | None = None):
-    tenant_id, tenant = get_validated_tenant_record(request)
-    ensure_tenant_quota_ok(tenant_id, request=request)
-    # 1) Extract & prepare
-    title, author, text = extract_article(url)
-    cleaned = preprocess_for_tts(text or "")
-    narration = prepare_article(title, author, cleaned)
-
-    if not narration or len(narration.strip()) < 40:
-        # Bail early with a clear error instead of sending empty 200
-        raise HTTPException(status_code=422, detail="No narratable text extracted from page")
-
-    parts = chunk_by_sentence(narration, target=1200, hard_max=1600)
-    usage_seconds = estimate_seconds_from_text(narration)
-    usage_recorded = False
-
-    # 2) Prefetch-to-bytes for each chunk (safe and predictable)
-    async def multi():
-        nonlocal usage_recorded
-        for i, part in enumerate(parts):
-            try:
-                processed_part = enhance_prosody(preprocess_for_tts(part))
-                data = await tts_bytes_with_fallback(
-                    processed_part,
-                    resolve_tenant_voice_id(tenant),
-                    model or MODEL_ID,
-                    tenant_id,
-                )
-                if usage_seconds and not usage_recorded:
-                    record_tenant_usage_seconds(tenant_id, usage_seconds)
-                    usage_recorded = True
-                # yield the whole chunk as one piece (or slice into smaller pieces if you prefer)
-                yield data
-            except Exception as e:
-                # Log and stop cleanly. Do NOT raise after streaming started.
-                print({"event": "chunk_fail", "i": i, "err": str(e)[:300]})
-                break
-
-    return StreamingResponse(multi(), media_type="audio/mpeg", headers={"X-AIL-Tenant": tenant_id})
-
-
 # _split_text_for_tts: reserved for future chunked synthesis
 
 
@@ -3083,12 +3404,13 @@ def tts_full(
     speaker_boost: bool = Query(True),
 ):
     tenant_id, tenant = get_validated_tenant_record(request)
-    ensure_tenant_quota_ok(tenant_id, request=request)
     voice = resolve_tenant_voice_id(tenant)
     if not voice:
         raise HTTPException(status_code=400, detail="Voice not provided.")
-    clean = preprocess_for_tts(text)
+    clean = preprocess_for_tts(apply_pronunciations(text, tenant))
     usage_seconds = estimate_seconds_from_text(clean)
+    reserved = ensure_tenant_quota_ok(tenant_id, request=request, reserve=usage_seconds)["reserved"]
+    t0 = time.perf_counter()
     url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice}"
     headers = {
         "xi-api-key": os.environ.get("ELEVENLABS_API_KEY",""),
@@ -3105,18 +3427,25 @@ def tts_full(
             "use_speaker_boost": bool(speaker_boost),
         },
     }
-    r = http.post(url, headers=headers, json=payload, timeout=60)
-    if r.status_code >= 400:
-        if _should_retry_default_voice(r.status_code, r.text):
-            fallback_voice = _default_voice_id()
-            if fallback_voice and fallback_voice != voice:
-                logger.warning("[tenant] voice fallback tenant=%s voice_id=%s", tenant_id, voice)
-                url = f"https://api.elevenlabs.io/v1/text-to-speech/{fallback_voice}"
-                r = http.post(url, headers=headers, json=payload, timeout=60)
+    try:
+        r = http.post(url, headers=headers, json=payload, timeout=60)
+        histogram.inc("provider_requests", mode="full", status=r.status_code)
         if r.status_code >= 400:
-            raise HTTPException(status_code=r.status_code, detail=r.text)
-    if usage_seconds:
-        record_tenant_usage_seconds(tenant_id, usage_seconds)
+            if _should_retry_default_voice(r.status_code, r.text):
+                fallback_voice = _default_voice_id()
+                if fallback_voice and fallback_voice != voice:
+                    logger.warning("[tenant] voice fallback tenant=%s voice_id=%s", tenant_id, voice)
+                    histogram.inc("voice_fallbacks", tier=tenant.plan_tier)
+                    url = f"https://api.elevenlabs.io/v1/text-to-speech/{fallback_voice}"
+                    r = http.post(url, headers=headers, json=payload, timeout=60)
+                    histogram.inc("provider_requests", mode="full", status=r.status_code)
+            if r.status_code >= 400:
+                raise HTTPException(status_code=r.status_code, detail=r.text)
+    except BaseException:
+        release_tenant_reservation(tenant_id, reserved)
+        raise
+    histogram.observe("tts_render_ms", (time.perf_counter() - t0) * 1000, model=model, tier=tenant.plan_tier)
+    record_tenant_usage_seconds(tenant_id, usage_seconds, reserved=reserved)
     return Response(content=r.content, media_type="audio/mpeg")
 
 
@@ -3126,21 +3455,28 @@ TEMPLATE = Path("static/demo-shell.html")  # <- uses your exact index.html shell
 async def demo(url: str):
     # fetch page
     try:
-        async with httpx.AsyncClient(timeout=12) as client:
-            r = await client.get(
-                url,
-                headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-            )
-            r.raise_for_status()
+        r = await fetch_html(
+            app.state.fetch_client,
+            url,
+            headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"},
+            timeout=12,
+            follow_redirects=False,
+        )
+        if r.status_code != 200:
+            raise HTTPException(r.status_code, detail=f"Upstream returned {r.status_code}")
         raw = r.text
+    except FetchRejected as e:
+        return HTMLResponse(f"<h1>Fetch error</h1><pre>{escape(e.detail)}</pre>", status_code=e.status)
     except Exception as e:
         return HTMLResponse(f"<h1>Fetch error</h1><pre>{escape(str(e))}</pre>", status_code=502)
 
-    # extract body + title
-    meta = trafilatura.bare_extraction(raw) or {}
-    title = escape(meta.get("title") or "Demo Article")
-    body  = trafilatura.extract(raw, include_comments=False, include_images=False) \
-           or "<p>No article content extracted.</p>"
+    # extract body + title (one parse)
+    try:
+        doc = await extract_html(raw, url=url)
+    except Exception as e:
+        return HTMLResponse(f"<h1>Extract error</h1><pre>{escape(str(e))}</pre>", status_code=502)
+    title = escape(doc["title"] or "Demo Article")
+    body  = doc["text"] or "<p>No article content extracted.</p>"
 
     # load your shell and inject content
     html = TEMPLATE.read_text(encoding="utf-8")
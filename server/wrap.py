@@ -1,6 +1,9 @@
 # server/wrap.py
 from fastapi import APIRouter, HTTPException, Query, Response
-import httpx, re, html
+import re, html
+
+from app.html_fetch import FetchRejected, fetch_html
+from app.ssrf_guard import pinned_client
 
 router = APIRouter()
 
@@ -20,13 +23,15 @@ async def wrap(url: str = Query(..., description="Public article URL to preview"
     if not (url.startswith("http://") or url.startswith("https://")):
         raise HTTPException(400, "URL must start with http:// or https://")
     try:
-        async with httpx.AsyncClient(follow_redirects=True, headers={"User-Agent":"AI-Listen-Demo/1.0"}) as c:
-            r = await c.get(url, timeout=10)
+        async with pinned_client(headers={"User-Agent":"AI-Listen-Demo/1.0"}) as c:
+            # The whole page is re-served, so keep reading past </body>; only the size cap applies.
+            r = await fetch_html(c, url, timeout=10, stop_after_close=False, allowed_types=("text/html",))
+    except FetchRejected as e:
+        raise HTTPException(e.status, e.detail)
     except Exception as e:
         raise HTTPException(400, f"Fetch failed: {e}")
-    ct = r.headers.get("content-type","")
-    if "text/html" not in ct:
-        raise HTTPException(415, f"Not HTML (content-type: {ct})")
+    if r.status_code != 200:
+        raise HTTPException(400, f"Fetch failed: upstream returned {r.status_code}")
     body = r.text
 
     # Strip all inline scripts to avoid CSP and hostile JS
@@ -31,7 +31,7 @@ from src.storage import (
     LOCAL_DIR,
 )
 from src.prosody import shape_text_for_tone, sentiment_from_title
-from src.metrics import append_stream_row
+from src.metrics import append_stream_row, flush_stream_rows
 
 try:
     import trafilatura
@@ -130,6 +130,20 @@ async def get_http() -> httpx.AsyncClient:
     return _http_client
 
 
+@app.middleware("http")
+async def flush_metrics_rows(request: Request, call_next):
+    # Each request writes its own segment, under uvicorn as well as on Lambda.
+    try:
+        return await call_next(request)
+    finally:
+        await asyncio.to_thread(flush_stream_rows)
+
+
+@app.on_event("shutdown")
+def _flush_metrics_on_shutdown():
+    flush_stream_rows()
+
+
 @app.get("/health")
 def health():
     return {"ok": True}
@@ -364,6 +378,14 @@ async def api_tts(
 
 
 # Lambda entrypoint
-handler = Mangum(app)
+_asgi_handler = Mangum(app)
+
+
+def handler(event, context):
+    try:
+        return _asgi_handler(event, context)
+    finally:
+        # The middleware already flushed; this catches rows left by a failed PUT or an error path.
+        flush_stream_rows()
 
 
@@ -1,11 +1,59 @@
-import os
+"""Stream metrics as an append-only log of immutable S3 segments.
+
+append_stream_row() only buffers the row in memory. flush_stream_rows() writes
+the buffered rows as one small CSV object under a unique, timestamped key. It
+is called after every request by src.app's middleware (under uvicorn and on
+Lambda alike), from the Lambda handler and at shutdown:
+
+    metrics/streams/segments/YYYY-MM-DD/HH/<ts_ms>-<rand>.csv
+
+Every segment is a fresh key, so concurrent invocations never overwrite each
+other, and the per-request cost is one PUT of a few hundred bytes no matter
+how large the log grows.
+
+compact_segments() (scheduled, see ops/template.yaml) folds each closed hour
+into one object, metrics/streams/hourly/YYYY-MM-DD/HH.csv, and then deletes
+that hour's segments. An hour is closed once METRICS_COMPACT_GRACE_S has
+passed since it ended, so no new segment can land in it. The hourly object
+is always built from the hour's complete segment set. If a run dies after
+writing it but before deleting, the next run only finishes the deletes,
+which never loses or duplicates rows.
+
+With S3_BUCKET unset or "local", objects go under LOCAL_CACHE_DIR instead,
+as in src.storage.
+"""
 import csv
 import io
+import os
+import pathlib
+import secrets
+import threading
 import time
-import boto3
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List
+
+HEADER = ["ts_ms", "source", "first_audio_ms", "total_bytes", "model_id", "cache_key"]
+PREFIX = os.getenv("METRICS_PREFIX", "metrics/streams").strip("/")
+SEGMENTS = f"{PREFIX}/segments"
+HOURLY = f"{PREFIX}/hourly"
+METRICS_BUFFER_MAX = int(os.getenv("METRICS_BUFFER_MAX", "10000"))
+METRICS_COMPACT_GRACE_S = int(os.getenv("METRICS_COMPACT_GRACE_S", "600"))
+
+USE_LOCAL = (os.getenv("S3_BUCKET", "").strip().lower() in ("", "local"))
+LOCAL_DIR = pathlib.Path(os.getenv("LOCAL_CACHE_DIR", "./.cache")).resolve()
 
+_s3 = None
+_rows: List[list] = []
+# Flushes run in worker threads (asyncio.to_thread) while requests keep appending.
+_rows_lock = threading.Lock()
 
-_s3 = boto3.client("s3", region_name=os.getenv("REGION", os.getenv("AWS_REGION", "us-east-1")))
+
+def _client():
+    global _s3
+    if _s3 is None:
+        import boto3
+        _s3 = boto3.client("s3", region_name=os.getenv("REGION", os.getenv("AWS_REGION", "us-east-1")))
+    return _s3
 
 
 def _bucket() -> str:
@@ -15,30 +63,167 @@ def _bucket() -> str:
     return b
 
 
+# --- object store: S3, or a directory when running locally
+
+def _put(key: str, body: bytes) -> None:
+    if USE_LOCAL:
+        path = LOCAL_DIR / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".part")
+        tmp.write_bytes(body)
+        tmp.replace(path)
+        return
+    _client().put_object(Bucket=_bucket(), Key=key, Body=body, ContentType="text/csv")
+
+
+def _get(key: str) -> bytes:
+    if USE_LOCAL:
+        return (LOCAL_DIR / key).read_bytes()
+    return _client().get_object(Bucket=_bucket(), Key=key)["Body"].read()
+
+
+def _exists(key: str) -> bool:
+    if USE_LOCAL:
+        return (LOCAL_DIR / key).exists()
+    from botocore.exceptions import ClientError
+    try:
+        _client().head_object(Bucket=_bucket(), Key=key)
+        return True
+    except ClientError:
+        return False
+
+
+def _list(prefix: str) -> List[str]:
+    if USE_LOCAL:
+        root = LOCAL_DIR / prefix
+        if not root.exists():
+            return []
+        return sorted(
+            p.relative_to(LOCAL_DIR).as_posix()
+            for p in root.rglob("*.csv")
+            if p.is_file()
+        )
+    keys: List[str] = []
+    paginator = _client().get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=_bucket(), Prefix=prefix + "/"):
+        for obj in page.get("Contents", []) or []:
+            keys.append(obj["Key"])
+    return sorted(keys)
+
+
+def _delete(keys: List[str]) -> None:
+    if USE_LOCAL:
+        for k in keys:
+            (LOCAL_DIR / k).unlink(missing_ok=True)
+        return
+    for i in range(0, len(keys), 1000):
+        _client().delete_objects(
+            Bucket=_bucket(),
+            Delete={"Objects": [{"Key": k} for k in keys[i:i + 1000]], "Quiet": True},
+        )
+
+
+def _csv(rows: List[list]) -> bytes:
+    out = io.StringIO()
+    w = csv.writer(out)
+    w.writerow(HEADER)
+    w.writerows(rows)
+    return out.getvalue().encode("utf-8")
+
+
+def _parse(body: bytes) -> List[list]:
+    reader = csv.reader(io.StringIO(body.decode("utf-8", errors="ignore")))
+    return [row for row in reader if row and row != HEADER]
+
+
+# --- write path
+
 def append_stream_row(ts_ms: int, source: str, first_audio_ms: int, total_bytes: int, model_id: str, cache_key: str) -> None:
-    key = "metrics/streams.csv"
-    # MVP approach: get, append, put back (race conditions acceptable for MVP)
+    """Buffer one row; flush_stream_rows() writes it at the end of the request."""
+    with _rows_lock:
+        if len(_rows) >= METRICS_BUFFER_MAX:
+            del _rows[0]
+        _rows.append([ts_ms, source, first_audio_ms, total_bytes, model_id, cache_key])
+
+
+def flush_stream_rows() -> int:
+    """Write the buffered rows as one new segment; returns rows written. Never raises."""
+    # Take the rows out under the lock, so a concurrent flush cannot write them
+    # again and rows appended during the PUT stay in the buffer.
+    with _rows_lock:
+        if not _rows:
+            return 0
+        batch, _rows[:] = _rows[:], []
+    now = datetime.now(timezone.utc)
+    key = f"{SEGMENTS}/{now:%Y-%m-%d/%H}/{int(now.timestamp() * 1000)}-{secrets.token_hex(4)}.csv"
     try:
+        _put(key, _csv(batch))
+    except Exception as e:
+        # Put the rows back in front; the next invocation in this container retries them.
+        with _rows_lock:
+            _rows[:0] = batch
+            if len(_rows) > METRICS_BUFFER_MAX:
+                del _rows[:len(_rows) - METRICS_BUFFER_MAX]
+        print({"event": "metrics_flush_failed", "rows": len(batch), "err": str(e)[:200]})
+        return 0
+    return len(batch)
+
+
+# --- compaction and reads
+
+def _hour_of(segment_key: str) -> str:
+    # .../segments/YYYY-MM-DD/HH/<file>.csv -> "YYYY-MM-DD/HH"
+    parts = segment_key.split("/")
+    return f"{parts[-3]}/{parts[-2]}"
+
+
+def compact_segments(now: datetime | None = None) -> dict:
+    """Fold every closed hour's segments into its hourly object; returns a small report."""
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=METRICS_COMPACT_GRACE_S)
+    by_hour: dict[str, List[str]] = {}
+    for key in _list(SEGMENTS):
+        by_hour.setdefault(_hour_of(key), []).append(key)
+    report = {"hours": 0, "segments": 0, "rows": 0, "open_hours": 0}
+    for hour, keys in sorted(by_hour.items()):
+        end = datetime.strptime(hour, "%Y-%m-%d/%H").replace(tzinfo=timezone.utc) + timedelta(hours=1)
+        if end > cutoff:
+            report["open_hours"] += 1
+            continue
+        target = f"{HOURLY}/{hour}.csv"
+        if not _exists(target):
+            rows: List[list] = []
+            for key in keys:
+                rows.extend(_parse(_get(key)))
+            rows.sort(key=lambda r: int(r[0]) if r[0].isdigit() else 0)
+            _put(target, _csv(rows))
+            report["rows"] += len(rows)
+        # The hour is closed, so `target` already covers every key listed here.
+        _delete(keys)
+        report["hours"] += 1
+        report["segments"] += len(keys)
+    return report
+
+
+def iter_stream_rows(day: str) -> Iterator[list]:
+    """Rows for a UTC day (YYYY-MM-DD): compacted hours plus any segments not yet compacted."""
+    # Segments first: if a compaction lands in between, its hourly object shows up in
+    # the second listing and those segments are skipped instead of read twice.
+    segments = _list(f"{SEGMENTS}/{day}")
+    hourly = _list(f"{HOURLY}/{day}")
+    done = {f"{day}/{k.rsplit('/', 1)[-1][:-4]}" for k in hourly}
+    for key in hourly + [k for k in segments if _hour_of(k) not in done]:
         try:
-            obj = _s3.get_object(Bucket=_bucket(), Key=key)
-            body = obj["Body"].read()
-        except _s3.exceptions.NoSuchKey:  # type: ignore[attr-defined]
-            body = b""
+            body = _get(key)
         except Exception:
-            body = b""
-
-        output = io.StringIO()
-        if not body:
-            # write header
-            output.write("ts_ms,source,first_audio_ms,total_bytes,model_id,cache_key\n")
-        else:
-            output.write(body.decode("utf-8", errors="ignore"))
-        w = csv.writer(output)
-        w.writerow([ts_ms, source, first_audio_ms, total_bytes, model_id, cache_key])
-        data = output.getvalue().encode("utf-8")
-        _s3.put_object(Bucket=_bucket(), Key=key, Body=data, ContentType="text/csv")
-    except Exception:
-        # best-effort, ignore
-        pass
+            continue
+        yield from _parse(body)
 
 
+def compact_handler(event=None, context=None) -> dict:
+    """Scheduled Lambda entrypoint for the compactor."""
+    t0 = time.time()
+    report = compact_segments()
+    report["ms"] = int((time.time() - t0) * 1000)
+    print({"event": "metrics_compact", **report})
+    return report